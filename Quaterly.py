@@ -1,5 +1,5 @@
 # extract_financials_quarterly_only.py
-import json, re
+import json
 from pathlib import Path
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -10,43 +10,33 @@ import pandas as pd
 
 import os
 
+from src.common.dates import dateish, norm_date
+from src.common.html_stream import iter_tables
+from src.common.io_utils import decode_text
+from src.common.json_stream import candidate_nodes
+from src.common.numbers import clean_matrix, matrix_rows
+from src.common.parse_cache import open_cache, shaped_or_parse, format_stats
+from src.common import prescreen
+from src.common import logging_utils as trace
+from src.common.sections import classifier as section_classifier
+from src.common.blobstore import captures
+
 # ---------- CONFIG ----------
 ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
 NETDUMP = ROOT / "netdump"
 SYMBOL  = "1111"   # change if needed
 VERBOSE = True
+HTML_BACKEND = os.getenv("FINJSON_HTML_BACKEND", "bs4")   # "lxml": stream <table>s with src.common.html_stream
+JSON_BACKEND = os.getenv("FINJSON_JSON_BACKEND", "loads") # "stream": ijson scan via src.common.json_stream
 # ----------------------------
 
+EXTRACTOR_VERSION = "1"   # bump when shaping/header logic changes (invalidates the parse cache)
+
 # Make sure folders exist
 ROOT.mkdir(parents=True, exist_ok=True)
 NETDUMP.mkdir(parents=True, exist_ok=True)
 
 
-RE_Y   = re.compile(r"^(?:19|20)\d{2}$")
-RE_ISO = re.compile(r"^(?:19|20)\d{2}-\d{2}-\d{2}$")
-RE_S   = re.compile(r"^\d{1,2}/\d{1,2}/(?:19|20)\d{2}$")
-
-def dateish(s):
-    s=(str(s) or "").strip()
-    return bool(RE_Y.match(s) or RE_ISO.match(s) or RE_S.match(s))
-
-def norm_date(s):
-    s=(str(s) or "").replace("\u00A0"," ").strip()
-    for dayfirst in (False, True):
-        dt = pd.to_datetime(s, dayfirst=dayfirst, errors="coerce")
-        if not pd.isna(dt):
-            return dt.strftime("%Y-%m-%d")
-    return s
-
-def to_number(x):
-    if x is None: return None
-    s = str(x).replace("\u00A0"," ").strip()
-    if s in {"","-","—","–"}: return None
-    s = re.sub(r"^\((.*)\)$", r"-\1", s)  # (1,234) -> -1234
-    s = s.replace(",", "")
-    try: return float(s)
-    except: return None
-
 LABEL_KEYS = ["metric","name","label","account","item","description","heading","field","title","lineItem","accountName","caption","displayName","line_name","LineItem","Line_Name"]
 NOISE_METRICS = {"All Currency In","All Currency in","All Figures in","All Figures In","Announced Date","Eligibility Date","Distribution Date","Last Update Date","Name","Price","Change %"}
 
@@ -130,13 +120,14 @@ def parse_html_table(tbl):
 
     return rows, date_cols
 
-def scrape_html_file(path: Path):
-    html = path.read_text(encoding="utf-8", errors="ignore")
-    soup = BeautifulSoup(html, "lxml")
-    tables = soup.find_all("table")
+def best_html_table(tables):
+    """Highest-scoring parse_html_table() hit among a page's tables, or None."""
+    return best_parsed(map(parse_html_table, tables))
+
+def best_parsed(hits):
+    """Highest-scoring (rows, date_cols) among parse_html_table() results (None = miss)."""
     best = None
-    for t in tables:
-        parsed = parse_html_table(t)
+    for parsed in hits:
         if not parsed: continue
         rows, dates = parsed
         score = len(rows) + 3*len(dates)
@@ -146,9 +137,47 @@ def scrape_html_file(path: Path):
     _, rows, dates = best
     return rows, dates
 
+def page_tables(text):
+    """Every <table> of a capture page, from HTML_BACKEND."""
+    if HTML_BACKEND == "lxml":
+        return iter_tables(text)
+    return BeautifulSoup(text, "lxml").find_all("table")
+
+def scrape_html_file(path: Path):
+    return best_html_table(page_tables(path.read_text(encoding="utf-8", errors="ignore")))
+
+def cache_version():
+    """Parse-cache version; each backend's results are cached separately."""
+    return f"{EXTRACTOR_VERSION}-{HTML_BACKEND}-{JSON_BACKEND}"
+
+def shape_text(text, suffix):
+    """Decode/parse one capture body -> [(table, date_cols)]."""
+    with trace.span("shape"):
+        if suffix == ".json":
+            return json_tables(json_nodes(text))
+        return html_tables(page_tables(text))
+
+def json_nodes(text):
+    """JSON nodes of a capture for shape_json(), from JSON_BACKEND (same nodes, same order)."""
+    if JSON_BACKEND == "stream":
+        return candidate_nodes(text, LABEL_KEYS)
+    payload = json.loads(text)
+    obj = payload.get("json", payload)
+    return (node for _, node in walk(obj))
+
+def json_tables(nodes):
+    """shape_json() hits among already-walked JSON nodes -> [(table, date_cols)]."""
+    return [shaped for shaped in map(shape_json, nodes) if shaped]
+
+def html_tables(tables):
+    """Like json_tables() for a page's tables: only the best one counts."""
+    best = best_html_table(tables)
+    return [best] if best else []
+
 def score_table(date_cols):
     # quarterly-ish if months subset of {3,6,9,12} and enough columns
     try:
+        trace.count("pd_to_datetime", len(date_cols))
         months = [pd.to_datetime(d, dayfirst=True, errors="coerce").month for d in date_cols]
         months = [m for m in months if pd.notna(m)]
         if months and set(months).issubset({3,6,9,12}) and len(months) >= 4:
@@ -157,70 +186,96 @@ def score_table(date_cols):
         pass
     return False
 
-def to_json(table, date_cols, symbol):
+def to_json(table, date_cols, symbol, infer_section=None):
+    infer_section = infer_section or section_classifier()
     iso_dates = [norm_date(d) for d in date_cols]
 
-    def infer_section(metric):
-        m = (metric or "").lower()
-        if any(x in m for x in ["equity","assets","liabil","inventory","payable","receivable","balance"]): return "Balance Sheet"
-        if any(x in m for x in ["revenue","sales","profit","loss","income","operat","eps","expenses","cost"]): return "Statement Of Income"
-        if any(x in m for x in ["cash","operating","financing","investing","free cash"]): return "Cash Flows"
-        return None
-
     sections = {"Balance Sheet": [], "Statement Of Income": [], "Cash Flows": []}
-    for row in table:
+    numbers = matrix_rows(clean_matrix(table, date_cols))
+    for row, nums in zip(table, numbers):
         metric = str(row.get("Metric","")).strip()
         if not metric or metric in NOISE_METRICS: 
             continue
         sec = infer_section(metric)
         if sec not in sections: 
             continue
-        values = {d_iso: to_number(row.get(d_raw)) for d_raw, d_iso in zip(date_cols, iso_dates)}
+        values = dict(zip(iso_dates, nums))
         if any(v is not None for v in values.values()):
             sections[sec].append({"metric": metric, "values": values})
     sections = {k:v for k,v in sections.items() if v}
     return {"symbol": symbol, "frequency": "quarterly", "sections": sections}
 
-def main():
-    net = NETDUMP
+def extract(netdump=None, symbol=None, root=None):
+    """Scan one netdump folder and write <symbol>_quarterly.json into root.
+    Defaults to the CONFIG block; returns (output path, source capture name)."""
+    net    = Path(netdump or NETDUMP)
+    symbol = symbol or SYMBOL
+    root   = Path(root or ROOT)
     if not net.exists():
         raise SystemExit("Run your capture first. netdump/ is missing.")
 
     candidates = []
-    for p in sorted(net.iterdir()):
-        if p.suffix.lower() not in {".json",".html",".txt"}:
-            continue
-        try:
-            if p.suffix.lower()==".json":
-                payload = json.loads(p.read_text(encoding="utf-8", errors="ignore"))
-                obj = payload.get("json", payload)
-                for _, node in walk(obj):
-                    shaped = shape_json(node)
-                    if shaped:
-                        table, date_cols = shaped
-                        if score_table([norm_date(d) for d in date_cols]):
-                            score = len(table) + 3*len(date_cols)
-                            candidates.append((score, table, date_cols, p.name))
-            else:
-                parsed = scrape_html_file(p)
-                if parsed:
-                    rows, date_cols = parsed
-                    if score_table([norm_date(d) for d in date_cols]):
-                        score = len(rows) + 3*len(date_cols)
-                        candidates.append((score, rows, date_cols, p.name))
-        except Exception:
-            continue
+    screen = prescreen.open_prescreen(net)
+    cache = open_cache(root)
+    try:
+        for p in captures(net):
+            trace.count("files_scanned")
+            try:
+                if screen and not screen.keep(p):
+                    trace.count("files_prescreened_out")
+                    continue
+                with trace.span("parse", file=p.name):
+                    data = p.read_bytes()
+                    shaped = shaped_or_parse(cache, data, "quarterly", cache_version(),
+                                             lambda: shape_text(decode_text(data), p.suffix.lower()))
+            except Exception:
+                continue
+            trace.count("tables_found", len(shaped))
+            add_candidates(candidates, shaped, p.name)
+    finally:
+        if screen:
+            print("[prescreen]", prescreen.format_stats(screen.stats()))
+        if cache:
+            print("[cache]", format_stats(cache.stats()))
+            cache.close()
+
+    return write_best(candidates, symbol, root)
+
+def is_quarterly(date_cols):
+    return score_table([norm_date(d) for d in date_cols])
 
+def add_candidates(candidates, shaped, src):
+    """Append the quarterly-looking tables of one capture as (score, table, date_cols, src)."""
+    found = 0
+    with trace.span("classify"):
+        for table, date_cols in shaped:
+            if is_quarterly(date_cols):
+                score = len(table) + 3*len(date_cols)
+                candidates.append((score, table, date_cols, src))
+                found += 1
+    trace.count("candidates", found)
+    return found
+
+def write_best(candidates, symbol, root):
     if not candidates:
         raise SystemExit("No quarterly-looking tables found. Open a clear file in netdump/ and try again.")
 
     candidates.sort(key=lambda x: x[0], reverse=True)
     score, table, date_cols, src = candidates[0]
 
-    out = ROOT / f"{SYMBOL}_quarterly.json"
-    q_js = to_json(table, date_cols, SYMBOL)
-    out.write_text(json.dumps(q_js, ensure_ascii=False, indent=2), encoding="utf-8")
+    out = Path(root) / f"{symbol}_quarterly.json"
+    with trace.span("serialize", symbol=symbol):
+        labels = section_classifier(root)
+        q_js = to_json(table, date_cols, symbol, labels)
+        labels.save()
+        out.write_text(json.dumps(q_js, ensure_ascii=False, indent=2), encoding="utf-8")
     print("[ok] quarterly ->", out, "(from", src, ")")
+    return out, src
+
+def main():
+    with trace.span("quarterly", symbol=SYMBOL):
+        extract()
+    trace.report("quarterly")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,5 @@
 # annual_only.py
-import json, re, sys
+import json, sys
 from pathlib import Path
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -12,89 +12,37 @@ import pandas as pd
 # ---------------------------
 import os
 
+from src.common.dates import clean_text, first_year, looks_like_date_header, norm_date_header
+from src.common.html_stream import iter_tables
+from src.common.io_utils import decode_text
+from src.common.json_stream import candidate_nodes
+from src.common.numbers import clean_matrix, matrix_rows
+from src.common.parse_cache import open_cache, shaped_or_parse, format_stats
+from src.common import prescreen
+from src.common import logging_utils as trace
+from src.common.sections import classifier as section_classifier
+from src.common.blobstore import captures
+
 # ---------- CONFIG ----------
 ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
 NETDUMP = ROOT / "netdump"
 SYMBOL  = "1111"   # change if needed
 VERBOSE = True
+HTML_BACKEND = os.getenv("FINJSON_HTML_BACKEND", "bs4")   # "lxml": stream <table>s with src.common.html_stream
+JSON_BACKEND = os.getenv("FINJSON_JSON_BACKEND", "loads") # "stream": ijson scan via src.common.json_stream
 # ----------------------------
 
+EXTRACTOR_VERSION = "1"   # bump when shaping/header logic changes (invalidates the parse cache)
+
 # Make sure folders exist
 ROOT.mkdir(parents=True, exist_ok=True)
 NETDUMP.mkdir(parents=True, exist_ok=True)
 
 
-# date-ish patterns (way more permissive)
-RE_YEAR        = re.compile(r"(19|20)\d{2}")
-RE_PURE_YEAR   = re.compile(r"^(?:19|20)\d{2}$")
-RE_ISO         = re.compile(r"^(?:19|20)\d{2}-\d{2}-\d{2}$")
-RE_SLASH_DATE  = re.compile(r"^\d{1,2}/\d{1,2}/(?:19|20)\d{2}$")
-RE_FY_PREFIX   = re.compile(r"^(?:FY|F/Y|FYE)\s*(?:19|20)\d{2}$", re.I)
-RE_YEAR_SUFFIX = re.compile(r"^(?:19|20)\d{2}\s*(?:FY|Y|Annual|\(12M\))$", re.I)
-RE_YEAR_SLASH  = re.compile(r"^(?:19|20)\d{2}/(?:19|20)\d{2}$")
-
 def dbg(*a):
     if VERBOSE:
         print(*a, file=sys.stderr)
 
-def clean_text(s):
-    return (str(s) or "").replace("\u00A0", " ").strip()
-
-def looks_like_date_header(s: str) -> bool:
-    s = clean_text(s)
-    return bool(
-        RE_PURE_YEAR.match(s)
-        or RE_ISO.match(s)
-        or RE_SLASH_DATE.match(s)
-        or RE_FY_PREFIX.match(s)
-        or RE_YEAR_SUFFIX.match(s)
-        or RE_YEAR_SLASH.match(s)
-        or RE_YEAR.search(s)  # as a last resort, any 4-digit year somewhere
-    )
-
-def first_year(s: str):
-    m = RE_YEAR.search(clean_text(s))
-    return int(m.group()) if m else None
-
-def norm_date_header(s: str) -> str:
-    s = clean_text(s)
-    if RE_PURE_YEAR.match(s):
-        return f"{s}-12-31"
-    if RE_YEAR_SLASH.match(s):
-        y2 = int(s.split("/")[-1])
-        return f"{y2}-12-31"
-    if RE_FY_PREFIX.match(s) or RE_YEAR_SUFFIX.match(s):
-        y = first_year(s)
-        return f"{y}-12-31" if y else s
-
-    # ↓ add these two lines to parse 31/12/2023 style without warnings
-    if RE_SLASH_DATE.match(s):
-        dt = pd.to_datetime(s, format="%d/%m/%Y", errors="coerce")
-        if not pd.isna(dt):
-            return dt.strftime("%Y-%m-%d")
-
-    # fallback attempts
-    for dayfirst in (False, True):
-        dt = pd.to_datetime(s, dayfirst=dayfirst, errors="coerce")
-        if not pd.isna(dt):
-            return dt.strftime("%Y-%m-%d")
-    y = first_year(s)
-    return f"{y}-12-31" if y else s
-
-
-def to_number(x):
-    if x is None:
-        return None
-    s = clean_text(x)
-    if s in {"", "-", "—", "–"}:
-        return None
-    s = re.sub(r"^\((.*)\)$", r"-\1", s)  # (1,234) -> -1234
-    s = s.replace(",", "")
-    try:
-        return float(s)
-    except:
-        return None
-
 LABEL_KEYS = ["metric","name","label","account","item","description","heading","field","title","lineItem","accountName","caption","displayName","line_name","LineItem","Line_Name"]
 NOISE_METRICS = {"All Currency In","All Currency in","All Figures in","All Figures In","Announced Date","Eligibility Date","Distribution Date","Last Update Date","Name","Price","Change %"}
 
@@ -216,14 +164,66 @@ def parse_html_table(tbl):
 
     return rows, date_cols
 
-def soup_for_file(path: Path) -> BeautifulSoup:
-    text = path.read_text(encoding="utf-8", errors="ignore")
+def looks_like_xml(text: str) -> bool:
     head = text.lstrip()[:200].lower()
+    return head.startswith("<?xml") or "<workbook" in head or "<xml" in head
+
+def soup_for_text(text: str) -> BeautifulSoup:
     # quiet the XML warning by using the XML parser when appropriate
-    if head.startswith("<?xml") or "<workbook" in head or "<xml" in head:
+    if looks_like_xml(text):
         return BeautifulSoup(text, "xml")
     return BeautifulSoup(text, "lxml")
 
+def soup_for_file(path: Path) -> BeautifulSoup:
+    return soup_for_text(path.read_text(encoding="utf-8", errors="ignore"))
+
+def cache_version():
+    """Parse-cache version; each backend's results are cached separately."""
+    return f"{EXTRACTOR_VERSION}-{HTML_BACKEND}-{JSON_BACKEND}"
+
+def shape_text(text, suffix):
+    """Decode/parse one capture body -> [(table, date_cols)]."""
+    with trace.span("shape"):
+        if suffix == ".json":
+            return json_tables(json_nodes(text))
+        return html_tables(page_tables(text))
+
+def json_nodes(text):
+    """JSON nodes of a capture for shape_json(), from JSON_BACKEND (same nodes, same order)."""
+    if JSON_BACKEND == "stream":
+        return candidate_nodes(text, LABEL_KEYS)
+    payload = json.loads(text)
+    obj = payload.get("json", payload)
+    return (node for _, node in walk(obj))
+
+def page_tables(text):
+    """Every <table> of a capture page, from HTML_BACKEND (XML-ish bodies always go through bs4)."""
+    if HTML_BACKEND == "lxml" and not looks_like_xml(text):
+        return iter_tables(text)
+    return soup_for_text(text).find_all("table")
+
+def json_tables(nodes):
+    """shape_json() hits among already-walked JSON nodes -> [(table, date_cols)]."""
+    out = []
+    for node in nodes:
+        shaped = shape_json(node)
+        if shaped:
+            dbg("  - json table cols:", [clean_text(c) for c in shaped[1]][:8], "...")
+            out.append(shaped)
+    return out
+
+def html_tables(tables):
+    """parse_html_table() hits for every <table> of a page -> [(rows, date_cols)]."""
+    out = []
+    n = 0
+    for n, t in enumerate(tables, 1):
+        parsed = parse_html_table(t)
+        if parsed:
+            dbg("  - html table cols:", [clean_text(c) for c in parsed[1]][:8], "...")
+            out.append(parsed)
+    dbg("  html tables found:", n)
+    return out
+
 def is_annual(date_cols):
     """More forgiving annual detector:
        - >=3 distinct years in headers, OR
@@ -236,6 +236,7 @@ def is_annual(date_cols):
     if len(set(years)) >= 3:
         return True
 
+    trace.count("pd_to_datetime", len(normed))
     ts = [pd.to_datetime(d, errors="coerce") for d in normed]
     ts = [t for t in ts if pd.notna(t)]
     if len(ts) >= 3:
@@ -248,74 +249,83 @@ def is_annual(date_cols):
             return True
     return False
 
-def to_json(table, date_cols, symbol):
+def to_json(table, date_cols, symbol, infer_section=None):
+    infer_section = infer_section or section_classifier()
     iso_dates = [norm_date_header(d) for d in date_cols]
 
-    def infer_section(metric):
-        m = (metric or "").lower()
-        if any(x in m for x in ["equity","assets","liabil","inventory","payable","receivable","balance"]): return "Balance Sheet"
-        if any(x in m for x in ["revenue","sales","profit","loss","income","operat","eps","expenses","cost"]): return "Statement Of Income"
-        if any(x in m for x in ["cash","operating","financing","investing","free cash"]): return "Cash Flows"
-        return None
-
     sections = {"Balance Sheet": [], "Statement Of Income": [], "Cash Flows": []}
-    for row in table:
+    numbers = matrix_rows(clean_matrix(table, date_cols))
+    for row, nums in zip(table, numbers):
         metric = clean_text(row.get("Metric",""))
         if not metric or metric in NOISE_METRICS:
             continue
         sec = infer_section(metric)
         if sec not in sections:
             continue
-        values = {d_iso: to_number(row.get(d_raw)) for d_raw, d_iso in zip(date_cols, iso_dates)}
+        values = dict(zip(iso_dates, nums))
         if any(v is not None for v in values.values()):
             sections[sec].append({"metric": metric, "values": values})
     sections = {k:v for k,v in sections.items() if v}
     return {"symbol": symbol, "frequency": "annual", "sections": sections}
 
-def main():
-    if not NETDUMP.exists():
-        raise SystemExit(f"Missing folder: {NETDUMP}")
+def extract(netdump=None, symbol=None, root=None):
+    """Scan one netdump folder and write <symbol>_annual.json into root.
+    Defaults to the CONFIG block; returns (output path, source capture name)."""
+    netdump = Path(netdump or NETDUMP)
+    symbol  = symbol or SYMBOL
+    root    = Path(root or ROOT)
+    if not netdump.exists():
+        raise SystemExit(f"Missing folder: {netdump}")
 
-    dbg("[info] scanning:", NETDUMP)
+    dbg("[info] scanning:", netdump)
     candidates = []
-    files = sorted([p for p in NETDUMP.iterdir() if p.suffix.lower() in {".json",".html",".txt"}])
+    files = captures(netdump)
     if not files:
         raise SystemExit("netdump/ is empty. Save your captured files there.")
 
-    for p in files:
-        try:
-            dbg("\n[file]", p.name)
-            if p.suffix.lower() == ".json":
-                payload = json.loads(p.read_text(encoding="utf-8", errors="ignore"))
-                obj = payload.get("json", payload)
-                found = 0
-                for _, node in walk(obj):
-                    shaped = shape_json(node)
-                    if shaped:
-                        table, date_cols = shaped
-                        dbg("  - json table cols:", [clean_text(c) for c in date_cols][:8], "...")
-                        if is_annual(date_cols):
-                            score = len(table) + 3*len(date_cols)
-                            candidates.append((score, table, date_cols, p.name))
-                            found += 1
-                dbg("  json candidates:", found)
-            else:
-                soup = soup_for_file(p)
-                tables = soup.find_all("table")
-                dbg("  html tables found:", len(tables))
-                for t in tables:
-                    parsed = parse_html_table(t)
-                    if not parsed:
-                        continue
-                    rows, date_cols = parsed
-                    dbg("  - html table cols:", [clean_text(c) for c in date_cols][:8], "...")
-                    if is_annual(date_cols):
-                        score = len(rows) + 3*len(date_cols)
-                        candidates.append((score, rows, date_cols, p.name))
-        except Exception as e:
-            dbg("  [warn] error parsing", p.name, "->", e)
-            continue
-
+    screen = prescreen.open_prescreen(netdump)
+    cache = open_cache(root)
+    try:
+        for p in files:
+            trace.count("files_scanned")
+            try:
+                dbg("\n[file]", p.name)
+                if screen and not screen.keep(p):
+                    dbg("  [skip] no table markers")
+                    trace.count("files_prescreened_out")
+                    continue
+                with trace.span("parse", file=p.name):
+                    data = p.read_bytes()
+                    shaped = shaped_or_parse(cache, data, "annual", cache_version(),
+                                             lambda: shape_text(decode_text(data), p.suffix.lower()))
+            except Exception as e:
+                dbg("  [warn] error parsing", p.name, "->", e)
+                continue
+            trace.count("tables_found", len(shaped))
+            found = add_candidates(candidates, shaped, p.name)
+            dbg("  annual candidates:", found)
+    finally:
+        if screen:
+            dbg("\n[prescreen]", prescreen.format_stats(screen.stats()))
+        if cache:
+            dbg("\n[cache]", format_stats(cache.stats()))
+            cache.close()
+
+    return write_best(candidates, symbol, root)
+
+def add_candidates(candidates, shaped, src):
+    """Append the annual-looking tables of one capture as (score, table, date_cols, src)."""
+    found = 0
+    with trace.span("classify"):
+        for table, date_cols in shaped:
+            if is_annual(date_cols):
+                score = len(table) + 3*len(date_cols)
+                candidates.append((score, table, date_cols, src))
+                found += 1
+    trace.count("candidates", found)
+    return found
+
+def write_best(candidates, symbol, root):
     if not candidates:
         raise SystemExit("No annual-looking tables found. Tip: open the ANNUAL financials page, export/copy its HTML or network JSON into netdump/, then rerun.")
 
@@ -323,12 +333,21 @@ def main():
     score, table, date_cols, src = candidates[0]
     dbg("\n[best] from", src, "| score:", score, "| cols:", [clean_text(c) for c in date_cols])
 
-    out = ROOT / f"{SYMBOL}_annual.json"
-    js = to_json(table, date_cols, SYMBOL)
-    if not js.get("sections"):
-        raise SystemExit("Found a table, but all rows were empty after cleaning. Try another capture.")
-    out.write_text(json.dumps(js, ensure_ascii=False, indent=2), encoding="utf-8")
+    out = Path(root) / f"{symbol}_annual.json"
+    with trace.span("serialize", symbol=symbol):
+        labels = section_classifier(root)
+        js = to_json(table, date_cols, symbol, labels)
+        labels.save()
+        if not js.get("sections"):
+            raise SystemExit("Found a table, but all rows were empty after cleaning. Try another capture.")
+        out.write_text(json.dumps(js, ensure_ascii=False, indent=2), encoding="utf-8")
     print("[ok] annual  ->", out, "(from", src, ")")
+    return out, src
+
+def main():
+    with trace.span("annual", symbol=SYMBOL):
+        extract()
+    trace.report("annual")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,5 @@
 # json_to_csv_financials_annual_only.py
-import json
+import json, os
 from pathlib import Path
 import pandas as pd
 
@@ -7,6 +7,8 @@ import pandas as pd
 IN_DIR = Path(r"C:\Users\Vishal\Desktop\Internship\financials_json")
 FILES  = ["1111_annual.json"]  # only annual now
 EXPORT_PER_SECTION = False
+OUTPUT = os.getenv("FINJSON_OUTPUT", "csv")   # csv | parquet | both
+PARQUET_DIR = IN_DIR / "parquet"              # frequency=<f>/symbol=<s>/part-0.parquet
 # ----------------------------
 
 def load_json(path: Path) -> dict:
@@ -61,6 +63,13 @@ def main():
             print(f"[warn] No rows for {fname}")
             continue
 
+        if OUTPUT in ("parquet", "both"):
+            from src.common.parquet_out import write_partition  # pyarrow is only needed here
+            out_pq, n, dropped = write_partition(js, PARQUET_DIR, symbol, freq)
+            print(f"[ok] {out_pq} ({n} rows" + (f", {dropped} non-date periods skipped)" if dropped else ")"))
+        if OUTPUT == "parquet":
+            continue
+
         out_wide = IN_DIR / f"{symbol}_{freq}_wide.csv"
         out_long = IN_DIR / f"{symbol}_{freq}_long.csv"
         df_wide.to_csv(out_wide, index=False, encoding="utf-8-sig")
@@ -0,0 +1,105 @@
+# batch_extract.py
+# Runs the single-pass annual + quarterly extractor (extract_all.py) for every
+# symbol in the company list.
+# Each symbol has its own capture folder: ./financials_json/netdump/<symbol>/
+# Outputs land next to the single-symbol ones: <symbol>_annual.json / <symbol>_quarterly.json
+#
+#   python batch_extract.py              # whole universe from list of company urls.csv
+#   python batch_extract.py 1111 2222    # just these symbols
+
+import json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import annual
+import extract_all
+from src.common import prescreen
+from src.common import logging_utils as trace
+from src.common.io_utils import load_symbols
+
+# ---------- CONFIG ----------
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+NETDUMP = ROOT / "netdump"                              # per-symbol subfolders live here
+COMPANIES_CSV = os.getenv("FINJSON_COMPANIES")          # default: saudiexchangecodefiles/list of company urls.csv
+WORKERS = int(os.getenv("FINJSON_WORKERS", "0")) or os.cpu_count() or 1
+SUMMARY = ROOT / "batch_summary.json"
+# ----------------------------
+
+EXTRACTORS = extract_all.EXTRACTORS
+
+
+def run_symbol(symbol, root=ROOT):
+    """Worker: extract both frequencies for one symbol; never raises."""
+    annual.VERBOSE = False
+    t0 = time.perf_counter()
+    res = {"symbol": symbol}
+    try:
+        with trace.span("extract", symbol=symbol):
+            res.update(extract_all.extract(Path(root) / "netdump" / symbol, symbol, root))
+    except SystemExit as e:  # missing / empty netdump folder
+        res.update({freq: {"ok": False, "error": str(e)} for freq, _ in EXTRACTORS})
+    except Exception as e:
+        res.update({freq: {"ok": False, "error": f"{type(e).__name__}: {e}"} for freq, _ in EXTRACTORS})
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    if trace.ENABLED:
+        res["trace"] = trace.snapshot(reset=True)
+    return res
+
+
+def run(symbols, root=ROOT):
+    """Extract `symbols` (captures under root/netdump) over WORKERS processes; writes and returns the summary."""
+    root = Path(root)
+    print(f"[info] {len(symbols)} symbols, {WORKERS} workers, netdump: {root / 'netdump'}")
+    t0 = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        futs = {pool.submit(run_symbol, s, root): s for s in symbols}
+        for fut in as_completed(futs):
+            sym = futs[fut]
+            try:
+                res = fut.result()
+            except Exception as e:  # worker died (e.g. killed / pickling error)
+                res = {"symbol": sym, "error": f"{type(e).__name__}: {e}"}
+            trace.merge(res.pop("trace", None))
+            results[sym] = res
+            flags = " ".join(f"{f}={'ok' if res.get(f, {}).get('ok') else 'FAIL'}" for f, _ in EXTRACTORS)
+            print(f"[{len(results)}/{len(symbols)}] {sym} {flags} ({res.get('seconds', '?')}s)")
+
+    per_symbol = [results[s] for s in symbols]
+    counts = {}
+    for freq, _ in EXTRACTORS:
+        ok = sum(1 for r in per_symbol if r.get(freq, {}).get("ok"))
+        counts[freq] = {"ok": ok, "failed": len(per_symbol) - ok}
+    cache = {k: sum(r.get("cache", {}).get(k, 0) for r in per_symbol) for k in ("hits", "misses", "bytes_saved")}
+    screen = {k: sum(r.get("prescreen", {}).get(k, 0) for r in per_symbol)
+              for k in ("scanned", "skipped", "skipped_meta", "skipped_scan", "bytes_skipped")}
+    screen["skip_ratio"] = round(screen["skipped"] / screen["scanned"], 3) if screen["scanned"] else 0.0
+    summary = {
+        "symbols": len(symbols),
+        "workers": WORKERS,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "counts": counts,
+        "parse_cache": cache,
+        "prescreen": screen,
+        "results": per_symbol,
+    }
+    (root / SUMMARY.name).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    trace.report("batch_extract")
+    return summary
+
+
+def main():
+    symbols = sys.argv[1:] or load_symbols(COMPANIES_CSV)
+    if not symbols:
+        raise SystemExit("No symbols to process.")
+    summary = run(symbols)
+    counts, screen, cache = summary["counts"], summary["prescreen"], summary["parse_cache"]
+    for freq, c in counts.items():
+        print(f"[ok] {freq}: {c['ok']} ok, {c['failed']} failed")
+    print("[prescreen]", prescreen.format_stats(screen))
+    print(f"[cache] hits={cache['hits']} misses={cache['misses']} saved={cache['bytes_saved'] / 1e6:.1f}MB")
+    print("[ok] summary ->", SUMMARY)
+
+
+if __name__ == "__main__":
+    main()
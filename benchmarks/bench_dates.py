@@ -0,0 +1,101 @@
+# benchmarks/bench_dates.py
+# Micro-benchmark: src.common.dates vs the per-call regex chain / pd.to_datetime
+# fallbacks annual.py and Quaterly.py used before it.
+#
+#   python -m benchmarks.bench_dates [repeats]
+#
+# The corpus mimics what the extractors feed the classifier: every cell of every
+# header row (labels, numbers, blanks as well as dates), the same few dozen strings
+# over and over.
+
+import random, re, sys, time
+
+from src.common import dates
+
+HEADERS = [
+    "2019", "2020", "2021", "2022", "2023", "2024",
+    "31/12/2021", "31/12/2022", "31/12/2023", "30/06/2023", "30/09/2023", "31/03/2024",
+    "2022-12-31", "2023-03-31", "2023-06-30", "2023-09-30", "2023-12-31",
+    "FY2021", "FY 2022", "F/Y 2023", "2022 Annual", "2023 (12M)", "2022/2023",
+    "Q1 2023", "Dec 2023",
+]
+CELLS = [
+    "", "-", "—", "Total Assets", "Total Liabilities", "Net Profit", "Revenue",
+    "Cash and cash equivalents", "1,234", "(5,678)", "12.5", "All Figures in",
+    "Shareholders' Equity", "EPS",
+]
+
+# ---- pre-src.common.dates reference implementations ----
+RE_YEAR        = re.compile(r"(19|20)\d{2}")
+RE_PURE_YEAR   = re.compile(r"^(?:19|20)\d{2}$")
+RE_ISO         = re.compile(r"^(?:19|20)\d{2}-\d{2}-\d{2}$")
+RE_SLASH_DATE  = re.compile(r"^\d{1,2}/\d{1,2}/(?:19|20)\d{2}$")
+RE_FY_PREFIX   = re.compile(r"^(?:FY|F/Y|FYE)\s*(?:19|20)\d{2}$", re.I)
+RE_YEAR_SUFFIX = re.compile(r"^(?:19|20)\d{2}\s*(?:FY|Y|Annual|\(12M\))$", re.I)
+RE_YEAR_SLASH  = re.compile(r"^(?:19|20)\d{2}/(?:19|20)\d{2}$")
+
+def old_looks_like_date_header(s):
+    s = dates.clean_text(s)
+    return bool(
+        RE_PURE_YEAR.match(s) or RE_ISO.match(s) or RE_SLASH_DATE.match(s)
+        or RE_FY_PREFIX.match(s) or RE_YEAR_SUFFIX.match(s) or RE_YEAR_SLASH.match(s)
+        or RE_YEAR.search(s)
+    )
+
+def old_norm_date(s):
+    import pandas as pd
+    s = (str(s) or "").replace("\u00A0", " ").strip()
+    for dayfirst in (False, True):
+        dt = pd.to_datetime(s, dayfirst=dayfirst, errors="coerce")
+        if not pd.isna(dt):
+            return dt.strftime("%Y-%m-%d")
+    return s
+# ---------------------------------------------------------
+
+
+def corpus(n=20000, seed=7):
+    rnd = random.Random(seed)
+    pool = HEADERS * 2 + CELLS
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def timed(fn, items, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for s in items:
+            fn(s)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def report(name, old, new, n):
+    print(f"{name:<24} old {old * 1e6 / n:7.2f}us/call  new {new * 1e6 / n:7.2f}us/call  x{old / new:5.1f}")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    items = corpus()
+    n = len(items)
+    print(f"[info] {n} cells, {len(set(items))} distinct, best of {repeats}")
+
+    for s in set(items):
+        assert dates.looks_like_date_header(s) == old_looks_like_date_header(s), s
+    report("looks_like_date_header", timed(old_looks_like_date_header, items, repeats),
+           timed(dates.looks_like_date_header, items, repeats), n)
+
+    headers = [s for s in items if dates.dateish(s)]
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("[skip] norm_date: pandas not installed")
+        return
+    for s in set(headers):
+        assert dates.norm_date(s) == old_norm_date(s), s
+    # pandas is slow enough that one pass says it all
+    report("norm_date", timed(old_norm_date, headers, 1), timed(dates.norm_date, headers, repeats), len(headers))
+    print("[cache]", dates.norm_date.cache_info())
+
+
+if __name__ == "__main__":
+    main()
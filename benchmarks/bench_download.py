@@ -0,0 +1,153 @@
+# benchmarks/bench_download.py
+# Runs src.tasks.download_reports against a local HTTP stand-in for the report
+# host: a threaded http.server that serves report files with ETag, answers
+# If-None-Match with 304 and Range / If-Range with 206.
+#
+#   python -m benchmarks.bench_download [symbols] [file KB]
+#
+# Round 1 ("cold") fetches everything, but the server cuts a few bodies off
+# halfway; those must fail and leave a .part behind. Round 2 ("resume") must
+# fetch only the missing tails with Range requests. Round 3 ("warm") must be
+# all 304s. Round 4 ("changed") edits a few files server-side and must refetch
+# exactly those. The server also checks that no more than PER_HOST requests
+# are ever in flight at once.
+
+import hashlib, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.tasks import download_reports as dl
+
+PER_HOST = 4
+FILES = ("annual_report.xlsx", "q1.zip", "board_report.pdf")
+
+
+class StandIn(BaseHTTPRequestHandler):
+    bodies = {}       # path -> bytes
+    cut = set()       # paths whose next 200 is cut off halfway
+    hits = {"200": 0, "206": 0, "304": 0, "404": 0}
+    inflight = 0
+    peak = 0
+    lock = threading.Lock()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.lock:
+            StandIn.inflight += 1
+            StandIn.peak = max(StandIn.peak, StandIn.inflight)
+        try:
+            time.sleep(0.002)   # a little service time so requests overlap
+            self.serve()
+        finally:
+            with self.lock:
+                StandIn.inflight -= 1
+
+    def serve(self):
+        body = self.bodies.get(self.path)
+        if body is None:
+            return self.reply(404, b"")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", etag)
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") in (None, etag):
+            start = int(rng.split("=")[1].split("-")[0])
+            return self.reply(206, body[start:], etag, f"bytes {start}-{len(body) - 1}/{len(body)}")
+        with self.lock:
+            cut = self.path in self.cut
+            self.cut.discard(self.path)
+        self.reply(200, body, etag, cut=cut)
+
+    def reply(self, status, body, etag=None, content_range=None, cut=False):
+        with self.lock:
+            self.hits[str(status)] += 1
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        if content_range:
+            self.send_header("Content-Range", content_range)
+            self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if cut:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def payload(path, size, bump=0):
+    seed = hashlib.sha256(f"{path}:{bump}".encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def round_(label, symbols, root):
+    before = dict(StandIn.hits)
+    stats = dl.run(symbols, root=root, limits=dl.HostLimits(per_host=PER_HOST, rate=2000, burst=50))
+    hits = {k: StandIn.hits[k] - before[k] for k in before}
+    print(f"{label:<8} {dl.format_stats(stats)}  server={hits}")
+    return stats, hits
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size = (int(sys.argv[2]) if len(sys.argv) > 2 else 256) * 1024
+    symbols = [str(2000 + i) for i in range(n)]
+    paths = [f"/files/{s}/{name}" for s in symbols for name in FILES]
+    StandIn.bodies = {p: payload(p, size) for p in paths}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    total = len(paths)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            # two files per symbol from report_links.csv, the third from an href in a capture
+            with (root / dl.LINKS_CSV).open("w", encoding="utf-8") as f:
+                f.write("symbol,url\n")
+                for s in symbols:
+                    for name in FILES[:2]:
+                        f.write(f"{s},{base}/files/{s}/{name}\n")
+            for s in symbols:
+                folder = root / "netdump" / s
+                folder.mkdir(parents=True)
+                (folder / "0001_page.html").write_text(
+                    f'<a href="/files/{s}/{FILES[2]}">Board report</a>', encoding="utf-8")
+                (folder / "index.csv").write_text(
+                    f"file,url,mime,dropped,blob\n0001_page.html,{base}/issuer/{s},text/html,,\n", encoding="utf-8")
+
+            StandIn.cut = set(paths[::10])
+            n_cut = len(StandIn.cut)
+            stats, hits = round_("cold", symbols, root)
+            assert stats["files"] == total and stats["failed_count"] == n_cut, stats
+            assert len(list(root.glob("reports/*/*.part"))) == n_cut
+
+            stats, hits = round_("resume", symbols, root)
+            assert stats["resumed"] == n_cut and hits["206"] == n_cut and hits["304"] == total - n_cut, hits
+            assert stats["bytes_fetched"] == n_cut * (size - size // 2), stats
+            assert stats["bytes_fetched"] + stats["bytes_skipped"] == total * size, stats
+            assert not list(root.glob("reports/*/*.part*"))
+
+            stats, hits = round_("warm", symbols, root)
+            assert hits["304"] == total and stats["bytes_fetched"] == 0, hits
+
+            changed = paths[:5]
+            for p in changed:
+                StandIn.bodies[p] = payload(p, size, bump=1)
+            stats, hits = round_("changed", symbols, root)
+            assert hits["200"] == len(changed) and stats["fetched"] == len(changed), hits
+            for p in paths:
+                _, _, s, name = p.split("/")
+                assert (root / "reports" / s / name).read_bytes() == StandIn.bodies[p], p
+            assert StandIn.peak <= PER_HOST, StandIn.peak
+    finally:
+        server.shutdown()
+    print(f"[ok] resume + conditional replay behave (peak in flight {StandIn.peak})")
+
+
+if __name__ == "__main__":
+    main()
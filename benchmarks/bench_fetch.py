@@ -0,0 +1,130 @@
+# benchmarks/bench_fetch.py
+# Runs fetch_direct against a local HTTP stand-in for the exchange: a threaded
+# http.server that serves one JSON statement per symbol with ETag / Last-Modified
+# and answers conditional requests with 304.
+#
+#   python -m benchmarks.bench_fetch [symbols]
+#
+# Round 1 learns the endpoint templates from a fake capture (index.csv + bodies)
+# and fetches everything; round 2 must be all 304s; round 3 changes a few
+# statements server-side and must refetch exactly those. One symbol's endpoint
+# answers 500 and has to come back as a failure (Selenium fallback disabled).
+
+import csv, hashlib, json, sys, tempfile, threading, time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import fetch_direct
+
+BROKEN = "9999"
+
+
+class StandIn(BaseHTTPRequestHandler):
+    bodies = {}      # symbol -> bytes
+    hits = {"200": 0, "304": 0, "500": 0}
+    lock = threading.Lock()
+    protocol_version = "HTTP/1.1"   # keep-alive
+
+    def do_GET(self):
+        symbol = parse_qs(urlsplit(self.path).query).get("companySymbol", [""])[0]
+        if symbol == BROKEN or symbol not in self.bodies:
+            return self.reply(500, b"boom")
+        body = self.bodies[symbol]
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", etag)
+        self.reply(200, body, etag)
+
+    def reply(self, status, body, etag=None):
+        with self.lock:
+            self.hits[str(status)] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def statement(symbol, bump=0):
+    years = ["2021", "2022", "2023", "2024"]
+    rows = [{"name": m, **{y: 1000 * i + j + bump for j, y in enumerate(years)}}
+            for i, m in enumerate(["Total Assets", "Total Liabilities", "Revenue", "Net Profit"])]
+    return json.dumps({"symbol": symbol, "data": rows}).encode()
+
+
+def fake_capture(netdump, base, symbols):
+    """A shared index.csv as capture_batch.py writes it, for the first symbol only:
+    the other symbols must be served by the learned {symbol} template."""
+    first = symbols[0]
+    (netdump / first).mkdir(parents=True)
+    (netdump / first / "0001_standin.json").write_bytes(StandIn.bodies[first])
+    (netdump / first / "0002_standin.txt").write_text("not a table", encoding="utf-8")
+    with (netdump / "index.csv").open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["symbol", "file", "url", "mime", "dropped"])
+        w.writeheader()
+        w.writerow({"symbol": first, "file": f"{first}/0001_standin.json",
+                    "url": f"{base}/api/financials?companySymbol={first}&locale=en", "mime": "application/json"})
+        w.writerow({"symbol": first, "file": f"{first}/0002_standin.txt",
+                    "url": f"{base}/api/ticker?companySymbol={first}", "mime": "text/plain"})
+        w.writerow({"symbol": first, "file": "", "url": f"{base}/logo.png", "mime": "", "dropped": "blocked"})
+
+
+def round_(label, symbols, root, netdump):
+    before = dict(StandIn.hits)
+    t0 = time.perf_counter()
+    summary = fetch_direct.run(symbols, root=root, netdump=netdump, fallback=False)
+    dt = time.perf_counter() - t0
+    hits = {k: StandIn.hits[k] - before[k] for k in before}
+    print(f"{label:<10} {dt * 1e3:7.1f}ms  {summary['counts']}  server={hits}")
+    return summary, hits
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    symbols = [str(1000 + i) for i in range(n)] + [BROKEN]
+    StandIn.bodies = {s: statement(s) for s in symbols}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    fetch_direct.VERBOSE = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            netdump = root / "netdump"
+            netdump.mkdir()
+            fake_capture(netdump, base, symbols)
+
+            _, hits = round_("cold", symbols, root, netdump)
+            assert hits == {"200": n, "304": 0, "500": 1}, hits
+            assert json.loads((root / fetch_direct.ENDPOINTS).read_text())[symbols[0]] == [
+                {"url": f"{base}/api/financials?companySymbol={{symbol}}&locale=en", "mime": "application/json"}]
+            assert not (netdump / symbols[0] / "0002_standin.txt").exists()   # stale capture body pruned
+
+            _, hits = round_("warm", symbols, root, netdump)
+            assert hits == {"200": 0, "304": n, "500": 1}, hits
+
+            changed = symbols[:5]
+            for s in changed:
+                StandIn.bodies[s] = statement(s, bump=1)
+            summary, hits = round_("changed", symbols, root, netdump)
+            assert hits == {"200": len(changed), "304": n - len(changed), "500": 1}, hits
+            assert [r["symbol"] for r in summary["results"] if not r["ok"]] == [BROKEN]
+            for s in changed:
+                url = f"{base}/api/financials?companySymbol={s}&locale=en"
+                body = netdump / s / fetch_direct.body_name(url, "application/json")
+                assert body.read_bytes() == StandIn.bodies[s]
+    finally:
+        server.shutdown()
+    print("[ok] conditional replay behaves")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_html.py
+# Equivalence check + timing: BeautifulSoup vs the lxml streaming backend
+# (src.common.html_stream) for both extractors' parse_html_table().
+#
+#   python -m benchmarks.bench_html [chrome_kb]
+#
+# The page mixes what real portal captures look like: lots of nav/script chrome,
+# a multi-row <thead> annual table, a quarterly table with NBSPs and comments,
+# a nested layout table and a table without any dates.
+
+import sys, time, tracemalloc
+
+from bs4 import BeautifulSoup
+
+import annual
+import Quaterly
+from src.common.html_stream import iter_tables
+
+METRICS = ["Total Assets", "Total Liabilities", "Shareholders' Equity", "Revenue",
+           "Net Profit", "EPS", "Cash from operating activities", "Inventory"]
+
+
+def chrome(kb):
+    block = ('<div class="nav"><ul>' + "".join(f'<li><a href="/m/{i}">Menu {i}</a></li>' for i in range(20))
+             + '</ul><script>var x = {"a": 1, "year": 2023};</script></div>\n')
+    return block * max(1, kb * 1024 // len(block))
+
+
+def annual_table():
+    years = ["2020", "2021", "2022", "2023"]
+    head = ('<thead><tr><th colspan="5">All Figures in (Thousands)</th></tr>'
+            '<tr><th>Item</th>' + "".join(f"<th>{y}</th>" for y in years) + "</tr></thead>")
+    body = "".join(f"<tr><td>{m}</td>" + "".join(f"<td>({i * 1234:,})</td>" for i in range(4)) + "</tr>"
+                   for m in METRICS)
+    return f"<table>{head}<tbody><tr><td>Balance Sheet</td><td></td></tr>{body}</tbody></table>"
+
+
+def quarterly_table():
+    dates = ["31/03/2023", "30/06/2023", "30/09/2023", "31/12/2023"]
+    head = "<tr><th>Metric</th>" + "".join(f"<th>\u00A0{d}</th>" for d in dates) + "</tr>"
+    body = "".join(f"<tr><td>{m} <!-- note --></td>" + "".join(f"<td>{i},000&nbsp;</td>" for i in range(4))
+                   + "</tr>" for m in METRICS)
+    return f"<table>{head}{body}</table>"
+
+
+def nested_table():
+    return (f'<table class="layout"><tr><td>Layout 2022</td><td>2023</td></tr>'
+            f"<tr><td>{quarterly_table()}</td></tr></table>")
+
+
+def page(chrome_kb):
+    parts = [chrome(chrome_kb), annual_table(), chrome(chrome_kb), quarterly_table(),
+             "<table><tr><td>Price</td><td>12.3</td></tr></table>", nested_table(), chrome(chrome_kb)]
+    return "<html><head><title>Issuer</title></head><body>" + "".join(parts) + "</body></html>"
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, dt, peak
+
+
+def main():
+    chrome_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    annual.VERBOSE = False
+    text = page(chrome_kb)
+    print(f"[info] page {len(text) / 1e6:.1f}MB")
+
+    for name, mod in (("annual", annual), ("quarterly", Quaterly)):
+        bs, bs_t, bs_mem = measure(lambda: [mod.parse_html_table(t) for t in BeautifulSoup(text, "lxml").find_all("table")])
+        lx, lx_t, lx_mem = measure(lambda: [mod.parse_html_table(t) for t in iter_tables(text)])
+        assert bs == lx, f"{name}: backends disagree"
+        print(f"{name:<10} tables={len(lx)} hits={sum(1 for p in lx if p)}  "
+              f"bs4 {bs_t * 1e3:7.1f}ms peak {bs_mem / 1e6:6.1f}MB  "
+              f"lxml {lx_t * 1e3:7.1f}ms peak {lx_mem / 1e6:6.1f}MB  x{bs_t / lx_t:4.1f}")
+    print("[ok] backends agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_json.py
+# Equivalence check + timing: json.loads() + walk() vs the ijson candidate scan
+# (src.common.json_stream) for both extractors' json_tables().
+#
+#   python -m benchmarks.bench_json [noise_rows]
+#
+# The payload wraps every table shape shape_json() accepts in a {"json": ...}
+# capture envelope, buried among a large amount of non-table noise.
+
+import json, random, sys, time, tracemalloc
+
+import annual
+import Quaterly
+from src.common.json_stream import candidate_nodes
+
+METRICS = ["Total Assets", "Total Liabilities", "Revenue", "Net Profit", "EPS", "Cash and equivalents"]
+YEARS = ["2020", "2021", "2022", "2023"]
+QUARTERS = ["2023-03-31", "2023-06-30", "2023-09-30", "2023-12-31"]
+
+
+def list_of_dicts(cols):
+    return [{"name": m, **{c: f"{i * 1000 + j:,}" for j, c in enumerate(cols)}} for i, m in enumerate(METRICS)]
+
+
+def columns_rows(cols):
+    return {"columns": cols, "rows": [{"label": m, "values": [i, i + 1, i + 2, i + 3]} for i, m in enumerate(METRICS)]}
+
+
+def list_of_lists(cols):
+    return [["Item", *cols]] + [[m, *range(len(cols))] for m in METRICS]
+
+
+def payload(noise_rows, seed=11):
+    rnd = random.Random(seed)
+    noise = [{"id": i, "ts": "2023-01-01T00:00:00", "price": rnd.random(), "tags": ["a", "b"],
+              "meta": {"source": "portal", "year": 2023}} for i in range(noise_rows)]
+    return {
+        "url": "https://example.invalid/api",
+        "columns": YEARS, "rows": [],            # outside the envelope: must be ignored
+        "json": {
+            "chart": {"data": [[i, rnd.random()] for i in range(noise_rows // 10)]},
+            "annual": list_of_dicts(YEARS),
+            "quarterly": columns_rows(QUARTERS),
+            "grid": {"items": list_of_lists(YEARS), "headers": {"x": 1}},
+            "nested": [{"block": columns_rows(YEARS)}, {"block": list_of_dicts(QUARTERS)}],
+            "empty": {"columns": [], "dates": QUARTERS, "data": list_of_lists(QUARTERS)},
+            "noise": noise,
+        },
+    }
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, dt, peak
+
+
+def loads_nodes(text):
+    obj = json.loads(text)
+    return [node for _, node in annual.walk(obj.get("json", obj))]
+
+
+def same_tables(a, b):
+    # date_cols of list[dict] tables come out in set order, which is arbitrary
+    norm = lambda shaped: [(table, sorted(map(str, cols))) for table, cols in shaped]
+    return norm(a) == norm(b)
+
+
+def main():
+    noise_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    annual.VERBOSE = False
+    text = json.dumps(payload(noise_rows))
+    print(f"[info] payload {len(text) / 1e6:.1f}MB")
+
+    for name, mod in (("annual", annual), ("quarterly", Quaterly)):
+        old, old_t, old_mem = measure(lambda: mod.json_tables(loads_nodes(text)))
+        new, new_t, new_mem = measure(lambda: mod.json_tables(candidate_nodes(text, mod.LABEL_KEYS)))
+        assert same_tables(old, new), f"{name}: candidates differ"
+        print(f"{name:<10} tables={len(new)}  loads+walk {old_t * 1e3:7.1f}ms peak {old_mem / 1e6:6.1f}MB  "
+              f"stream {new_t * 1e3:7.1f}ms peak {new_mem / 1e6:6.1f}MB  x{old_t / new_t:4.1f}")
+    print("[ok] scanners agree")
+
+
+if __name__ == "__main__":
+    main()
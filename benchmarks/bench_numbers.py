@@ -0,0 +1,51 @@
+# benchmarks/bench_numbers.py
+# Per-table cost of numeric cleaning: to_number() per cell vs clean_matrix().
+#
+#   python -m benchmarks.bench_numbers [rows] [cols]
+#
+# Cells mix what captures contain: "1,234", "(5,678)", NBSP padding, dashes,
+# blanks, JSON numbers, None and the odd non-number.
+
+import random, sys, time
+
+import numpy as np
+
+from src.common.numbers import clean_matrix, matrix_rows, to_number
+
+CELLS = ["1,234", "(5,678)", "12.5", "-", "—", "–", "", "\u00A09,876\u00A0", "(0.35)",
+         "1,234,567.89", "N/A", None, 42, 3.14, "-17", "١٢٣"]
+
+
+def table(rows, cols, seed=3):
+    rnd = random.Random(seed)
+    dates = [f"{2000 + i}" for i in range(cols)]
+    return [{"Metric": f"Line {r}", **{d: rnd.choice(CELLS) for d in dates}} for r in range(rows)], dates
+
+
+def best_of(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    tbl, dates = table(rows, cols)
+
+    old = [[to_number(r.get(d)) for d in dates] for r in tbl]
+    assert matrix_rows(clean_matrix(tbl, dates)) == old, "clean_matrix disagrees with to_number"
+
+    per_cell = best_of(lambda: [[to_number(r.get(d)) for d in dates] for r in tbl])
+    matrix = best_of(lambda: clean_matrix(tbl, dates))
+    print(f"[info] {rows}x{cols} table ({rows * cols} cells)")
+    print(f"to_number per cell  {per_cell * 1e3:8.2f}ms")
+    print(f"clean_matrix        {matrix * 1e3:8.2f}ms  x{per_cell / matrix:4.1f}")
+    print(f"nan cells: {int(np.isnan(clean_matrix(tbl, dates)).sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_transform.py
+# Runs src.tasks.clean_transform over synthetic report workbooks of growing
+# size and prints the rows written and the workers' peak RSS for each. Read-only
+# streaming + chunked output should keep the peak roughly flat while the row
+# count grows by orders of magnitude.
+#
+#   python -m benchmarks.bench_transform [metrics per sheet ...]
+#
+# Each workbook has two sheets of statements with a year header row, section
+# rows, "(1,234)" negatives and blanks; next to it sits an HTML page saved as
+# .xls (as exchanges serve them), which must be read as HTML.
+
+import csv, sys, tempfile, time
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from src.tasks import clean_transform as ct
+
+YEARS = [2024, 2023, 2022, 2021]
+
+
+def write_workbook(path, metrics):
+    wb = Workbook(write_only=True)
+    for title in ("Balance Sheet", "Income"):
+        ws = wb.create_sheet(title)
+        ws.append([f"{title} (SAR '000)"])
+        ws.append(["", *YEARS])
+        for i in range(metrics):
+            if i % 50 == 0:
+                ws.append([f"Section {i // 50}"])
+            ws.append([f"Metric {i}", 1000 + i, f"({i:,})", "-", 2.5 * i])
+    wb.save(path)
+    return 2 * metrics * 3   # cells that hold a number
+
+
+def write_page(path):
+    rows = "".join(f"<tr><td>Metric {i}</td><td>{i}</td><td>{i + 1}</td></tr>" for i in range(10))
+    path.write_text(f"<html><body><table><tr><th>Item</th><th>31/12/2024</th><th>31/12/2023</th></tr>"
+                    f"{rows}</table></body></html>", encoding="utf-8")
+    return 10 * 2
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    peaks = []
+    for metrics in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            folder = root / "reports" / "1111"
+            folder.mkdir(parents=True)
+            expected = write_workbook(folder / "fy.xlsx", metrics) + write_page(folder / "disclosure.xls")
+            t0 = time.perf_counter()
+            totals = ct.run(root=root, workers=2)
+            dt = time.perf_counter() - t0
+            assert not totals["failed"] and totals["rows"] == expected, (totals, expected)
+            with (root / "tables" / "1111" / "r__fy.csv").open(encoding="utf-8-sig") as f:
+                first = next(r for r in csv.DictReader(f) if r["metric"] == "Metric 1")
+            assert first["section"] == "Section 0" and first["period"] == "2024-12-31", first
+            peaks.append(totals["peak_rss_mb"])
+            print(f"{metrics:>8} metrics/sheet  {totals['rows']:>8} rows  {dt:7.2f}s  "
+                  f"peak_rss={totals['peak_rss_mb']}MB")
+    print(f"[ok] peak RSS {min(peaks)}..{max(peaks)}MB across {min(sizes)}..{max(sizes)} metrics per sheet")
+
+
+if __name__ == "__main__":
+    main()
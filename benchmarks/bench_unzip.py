@@ -0,0 +1,72 @@
+# benchmarks/bench_unzip.py
+# Runs src.tasks.unzip_reports over a synthetic reports/ tree: per symbol one
+# archive holding two spreadsheets, an HTML page, a PDF and an unsafe "../"
+# member.
+#
+#   python -m benchmarks.bench_unzip [symbols] [member KB]
+#
+# Round 1 ("cold") must extract the three wanted members of every archive and
+# nothing else. Round 2 ("warm") must skip them all from the state files alone.
+# Round 3 ("changed") rewrites a few archives with one member edited and one
+# dropped, and must extract exactly the edited ones and remove the dropped ones.
+
+import hashlib, os, sys, tempfile, time, zipfile
+from pathlib import Path
+
+from src.tasks import unzip_reports as uz
+
+MEMBERS = ("statements/balance.xlsx", "statements/income.xls", "notes.html", "auditor.pdf", "../escape.xlsx")
+
+
+def payload(name, size, bump=0):
+    seed = hashlib.sha256(f"{name}:{bump}".encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def write_archive(path, size, bump=0, drop=()):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name in MEMBERS:
+            if name not in drop:
+                zf.writestr(name, payload(name, size, bump if name == MEMBERS[0] else 0))
+
+
+def round_(label, root):
+    t0 = time.perf_counter()
+    totals = uz.run(root=root)
+    print(f"{label:<8} {(time.perf_counter() - t0) * 1e3:7.1f}ms  {uz.format_stats(totals)}")
+    return totals
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    size = (int(sys.argv[2]) if len(sys.argv) > 2 else 512) * 1024
+    symbols = [str(3000 + i) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for s in symbols:
+            (root / "reports" / s).mkdir(parents=True)
+            write_archive(root / "reports" / s / "fy2024.zip", size)
+        wanted = sum(1 for m in MEMBERS if uz.wanted(m) and uz.member_path(m))
+
+        totals = round_("cold", root)
+        assert totals["extracted"] == wanted * n and totals["filtered"] == n and not totals["failed"], totals
+        assert not (root / "reports_unzipped" / "escape.xlsx").exists()
+        assert not list(root.glob("reports_unzipped/*/*/*.pdf"))
+
+        totals = round_("warm", root)
+        assert totals["skipped"] == wanted * n and totals["extracted"] == 0, totals
+
+        changed = symbols[:5]
+        for s in changed:
+            write_archive(root / "reports" / s / "fy2024.zip", size, bump=1, drop=("notes.html",))
+        totals = round_("changed", root)
+        assert totals["extracted"] == len(changed) and totals["removed"] == len(changed), totals
+        for s in changed:
+            out = root / "reports_unzipped" / s / "fy2024"
+            assert (out / MEMBERS[0]).read_bytes() == payload(MEMBERS[0], size, 1)
+            assert not (out / "notes.html").exists()
+    print(f"[ok] unzip skips and prunes as expected ({os.cpu_count()} cpus)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/corpus.py
+# Synthetic netdump corpora for offline benchmarks: one capture folder per
+# symbol, laid out as capture_batch.py writes them (bodies + index.csv), with
+# what real portal captures contain:
+#
+#   - issuer pages: portal chrome (nav lists, inline scripts) around a multi-row
+#     <thead> annual table, a d/m/Y quarterly table with NBSPs and comments, a
+#     nested layout table and a table without dates
+#   - JSON payloads in every shape shape_json() accepts (list of dicts,
+#     columns/rows dict, list of lists), wrapped in a capture envelope
+#   - noise: scripts, stylesheets, tracking JSON and plain text without tables
+#
+#   python -m benchmarks.corpus OUT_ROOT [symbols] [chrome_kb] [noise_files]
+#
+# Figures are drawn from a seeded RNG per symbol, so the same arguments always
+# give byte-identical corpora.
+
+import csv, json, random, sys
+from pathlib import Path
+
+SECTIONS = {
+    "Balance Sheet": ["Total Assets", "Total Liabilities", "Shareholders' Equity", "Inventory",
+                      "Accounts Receivable", "Accounts Payable"],
+    "Statement Of Income": ["Revenue", "Cost of Sales", "Gross Profit", "Operating Income",
+                            "Net Profit", "EPS"],
+    "Cash Flows": ["Cash from operating activities", "Cash from investing activities",
+                   "Cash from financing activities", "Free Cash Flow"],
+}
+METRICS = [m for ms in SECTIONS.values() for m in ms]
+YEARS = ["2019", "2020", "2021", "2022", "2023"]
+QUARTERS = ["31/03/2023", "30/06/2023", "30/09/2023", "31/12/2023", "31/03/2024"]
+QUARTERS_ISO = ["2023-03-31", "2023-06-30", "2023-09-30", "2023-12-31", "2024-03-31"]
+BASE_URL = "https://www.saudiexchange.sa"
+
+
+def figure(rnd):
+    """A cell as the portal renders it: thousands commas, (negatives), the odd blank."""
+    r = rnd.random()
+    if r < 0.05:
+        return "-"
+    v = rnd.randint(1_000, 90_000_000)
+    return f"({v:,})" if r < 0.2 else f"{v:,}"
+
+
+def chrome(rnd, kb):
+    block = ('<div class="nav"><ul>' + "".join(f'<li><a href="/m/{i}">Menu {i}</a></li>' for i in range(20))
+             + '</ul><script>var cfg = {"a": %d, "year": 2023};</script></div>\n' % rnd.randint(0, 9))
+    return block * max(1, kb * 1024 // len(block))
+
+
+def annual_table(rnd):
+    head = ('<thead><tr><th colspan="6">All Figures in (Thousands)</th></tr>'
+            '<tr><th>Item</th>' + "".join(f"<th>{y}</th>" for y in YEARS) + "</tr></thead>")
+    body = []
+    for section, metrics in SECTIONS.items():
+        body.append(f"<tr><td>{section}</td><td></td></tr>")
+        body += [f"<tr><td>{m}</td>" + "".join(f"<td>{figure(rnd)}</td>" for _ in YEARS) + "</tr>"
+                 for m in metrics]
+    return f"<table>{head}<tbody>{''.join(body)}</tbody></table>"
+
+
+def quarterly_table(rnd):
+    head = "<tr><th>Metric</th>" + "".join(f"<th> {d}</th>" for d in QUARTERS) + "</tr>"
+    body = "".join(f"<tr><td>{m} <!-- note --></td>" + "".join(f"<td>{figure(rnd)}&nbsp;</td>" for _ in QUARTERS)
+                   + "</tr>" for m in METRICS)
+    return f"<table>{head}{body}</table>"
+
+
+def page(rnd, chrome_kb):
+    parts = [chrome(rnd, chrome_kb), annual_table(rnd), chrome(rnd, chrome_kb), quarterly_table(rnd),
+             "<table><tr><td>Price</td><td>12.3</td></tr></table>",
+             f'<table class="layout"><tr><td>Layout 2022</td><td>2023</td></tr>'
+             f"<tr><td>{quarterly_table(rnd)}</td></tr></table>",
+             chrome(rnd, chrome_kb)]
+    return "<html><head><title>Issuer</title></head><body>" + "".join(parts) + "</body></html>"
+
+
+def list_of_dicts(rnd, cols):
+    return [{"name": m, **{c: figure(rnd) for c in cols}} for m in METRICS]
+
+
+def columns_rows(rnd, cols):
+    return {"columns": cols, "rows": [{"label": m, "values": [figure(rnd) for _ in cols]} for m in METRICS]}
+
+
+def list_of_lists(rnd, cols):
+    return [["Item", *cols]] + [[m, *(figure(rnd) for _ in cols)] for m in METRICS]
+
+
+def envelope(url, body):
+    return json.dumps({"url": url, "json": body}, ensure_ascii=False)
+
+
+def noise(rnd, i, kb):
+    """(name suffix, mime, body) of a capture without tables."""
+    n = max(1, kb * 1024 // 64)
+    kind = i % 4
+    if kind == 0:
+        return ".js", "application/javascript", "".join(f"function f{j}(a){{return a+{j};}}\n" for j in range(n))
+    if kind == 1:
+        return ".css", "text/css", "".join(f".c{j}{{margin:{j % 9}px;color:#{j % 999:03d}}}\n" for j in range(n))
+    if kind == 2:
+        events = [{"event": "view", "ts": 1700000000 + j, "v": rnd.random()} for j in range(n // 2)]
+        return ".json", "application/json", envelope(f"{BASE_URL}/track", {"events": events})
+    return ".txt", "text/plain", "ok\n" * n
+
+
+def write_symbol(folder, symbol, chrome_kb=64, noise_files=8, noise_kb=16, seed=0):
+    """One symbol's capture folder; returns the bytes written."""
+    rnd = random.Random(f"{seed}:{symbol}")
+    folder.mkdir(parents=True, exist_ok=True)
+    api = f"{BASE_URL}/api/financials?companySymbol={symbol}"
+    files = [
+        (".html", "text/html", f"{BASE_URL}/issuer/{symbol}", page(rnd, chrome_kb)),
+        (".json", "application/json", f"{api}&period=annual", envelope(api, list_of_dicts(rnd, YEARS))),
+        (".json", "application/json", f"{api}&period=quarterly",
+         envelope(api, {"statement": columns_rows(rnd, QUARTERS_ISO)})),
+        (".json", "application/json", f"{api}&view=grid", envelope(api, {"grid": list_of_lists(rnd, YEARS)})),
+    ]
+    for i in range(noise_files):
+        suffix, mime, body = noise(rnd, i, noise_kb)
+        files.append((suffix, mime, f"{BASE_URL}/static/{i}{suffix}", body))
+    rnd.shuffle(files)
+
+    size = 0
+    with (folder / "index.csv").open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["file", "url", "mime", "dropped", "blob"])
+        w.writeheader()
+        for i, (suffix, mime, url, body) in enumerate(files, 1):
+            name = f"{i:04d}_capture{suffix}"
+            data = body.encode("utf-8")
+            (folder / name).write_bytes(data)
+            size += len(data)
+            w.writerow({"file": name, "url": url, "mime": mime, "dropped": "", "blob": ""})
+    return size
+
+
+def generate(root, symbols=20, chrome_kb=64, noise_files=8, noise_kb=16, seed=0):
+    """<root>/netdump/<symbol>/ for `symbols` symbols; returns ([symbol], total bytes)."""
+    names = [str(1000 + i) for i in range(symbols)] if isinstance(symbols, int) else list(symbols)
+    total = sum(write_symbol(Path(root) / "netdump" / s, s, chrome_kb, noise_files, noise_kb, seed)
+                for s in names)
+    return names, total
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python -m benchmarks.corpus OUT_ROOT [symbols] [chrome_kb] [noise_files]")
+    args = [int(a) for a in sys.argv[2:5]]
+    names, total = generate(Path(sys.argv[1]), *args)
+    print(f"[ok] {len(names)} symbols, {total / 1e6:.1f}MB -> {Path(sys.argv[1]) / 'netdump'}")
@@ -0,0 +1,177 @@
+# benchmarks/suite.py
+# Offline end-to-end benchmark: generates a synthetic netdump corpus
+# (benchmarks/corpus.py) and times each stage of the single-symbol pipeline on
+# it, each in a fresh process so its peak RSS is its own:
+#
+#   annual         annual.extract() for every symbol      (captures -> <symbol>_annual.json)
+#   quarterly      Quaterly.extract() for every symbol    (captures -> <symbol>_quarterly.json)
+#   annual_csv     annual_csv.main() over those outputs   (-> _wide.csv / _long.csv)
+#   quarterly_csv  Quaterly_csv.main() over those outputs
+#
+# The parse cache is off so every run parses cold. Backends and prescreening
+# follow the usual FINJSON_* environment variables, which are recorded with
+# the results.
+#
+#   python -m benchmarks.suite                     # small profile, compare with its baseline
+#   python -m benchmarks.suite --profile medium --repeat 3
+#   python -m benchmarks.suite --save              # (re)write benchmarks/baselines/<profile>.json
+#   python -m benchmarks.suite --check             # exit 1 if a stage regressed past TOLERANCE
+#   python -m benchmarks.suite annual quarterly    # just these stages
+#
+# Baselines are machine-specific: compare runs on the same box.
+
+import contextlib, io, json, multiprocessing, os, platform, resource, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks import corpus
+
+PROFILES = {
+    "small": {"symbols": 10, "chrome_kb": 32, "noise_files": 6, "noise_kb": 8},
+    "medium": {"symbols": 50, "chrome_kb": 64, "noise_files": 8, "noise_kb": 16},
+    "large": {"symbols": 200, "chrome_kb": 128, "noise_files": 12, "noise_kb": 32},
+}
+STAGES = ("annual", "quarterly", "annual_csv", "quarterly_csv")
+NEEDS = {"annual_csv": "annual", "quarterly_csv": "quarterly"}   # reads that stage's outputs
+BASELINES = Path(__file__).resolve().parent / "baselines"
+TOLERANCE = 0.25   # slower / bigger than baseline by more than this is a regression
+ENV_KEYS = ("FINJSON_HTML_BACKEND", "FINJSON_JSON_BACKEND", "FINJSON_PRESCREEN")
+
+
+def extract_stage(module, root, symbols):
+    """Run one extractor over every symbol; returns (items, input bytes)."""
+    module.VERBOSE = False
+    size = 0
+    for s in symbols:
+        folder = root / "netdump" / s
+        size += sum(p.stat().st_size for p in folder.iterdir())
+        module.extract(folder, s, root)
+    return len(symbols), size
+
+
+def csv_stage(module, root, symbols, freq):
+    """Run a per-file CSV converter over every output of `freq`; returns (items, input bytes)."""
+    files = [f"{s}_{freq}.json" for s in symbols if (root / f"{s}_{freq}.json").exists()]
+    module.IN_DIR = root
+    module.FILES = files
+    module.PARQUET_DIR = root / "parquet"
+    module.OUTPUT = "csv"
+    module.main()
+    return len(files), sum((root / f).stat().st_size for f in files)
+
+
+def run_stage(stage, root, symbols):
+    """Worker (fresh process): one stage -> {"seconds", "items", "bytes", "peak_rss_mb"}."""
+    os.environ["FINJSON_PARSE_CACHE"] = "0"
+    import warnings
+    warnings.simplefilter("ignore")
+    import annual, annual_csv, Quaterly, Quaterly_csv
+    runs = {
+        "annual": lambda: extract_stage(annual, root, symbols),
+        "quarterly": lambda: extract_stage(Quaterly, root, symbols),
+        "annual_csv": lambda: csv_stage(annual_csv, root, symbols, "annual"),
+        "quarterly_csv": lambda: csv_stage(Quaterly_csv, root, symbols, "quarterly"),
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        items, size = runs[stage]()
+        seconds = time.perf_counter() - t0
+    return {"seconds": seconds, "items": items, "bytes": size,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def measure(stage, root, symbols, repeat=1):
+    """Best time / worst peak over `repeat` fresh-process runs, with derived throughput."""
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            runs.append(pool.submit(run_stage, stage, root, symbols).result())
+    best = min(runs, key=lambda r: r["seconds"])
+    return {
+        "seconds": round(best["seconds"], 4),
+        "items": best["items"],
+        "items_per_s": round(best["items"] / best["seconds"], 2),
+        "mb_per_s": round(best["bytes"] / 1e6 / best["seconds"], 3),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+    }
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def compare(stages, baseline, tolerance=TOLERANCE):
+    """[(stage, time ratio, rss ratio, regressed)] against a saved baseline."""
+    out = []
+    for name, cur in stages.items():
+        base = (baseline or {}).get("stages", {}).get(name)
+        if not base:
+            out.append((name, None, None, False))
+            continue
+        t = cur["seconds"] / base["seconds"]
+        m = cur["peak_rss_mb"] / base["peak_rss_mb"]
+        out.append((name, t, m, t > 1 + tolerance or m > 1 + tolerance))
+    return out
+
+
+def run(profile="small", stages=STAGES, repeat=1):
+    cfg = PROFILES[profile]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        t0 = time.perf_counter()
+        symbols, size = corpus.generate(root, **cfg)
+        print(f"[info] corpus: {len(symbols)} symbols, {size / 1e6:.1f}MB in {time.perf_counter() - t0:.1f}s")
+        needed = set(stages) | {NEEDS[s] for s in stages if s in NEEDS}
+        results = {}
+        for stage in STAGES:
+            if stage in needed:
+                results[stage] = measure(stage, root, symbols, repeat)
+        results = {s: r for s, r in results.items() if s in stages}
+    return {"profile": profile, "config": cfg, "env": {k: os.getenv(k, "") for k in ENV_KEYS},
+            "machine": machine(), "at": time.strftime("%Y-%m-%d %H:%M:%S"), "stages": results}
+
+
+def main():
+    args = sys.argv[1:]
+
+    def opt(flag, default):
+        if flag in args:
+            i = args.index(flag)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    profile = opt("--profile", "small")
+    repeat = int(opt("--repeat", "1"))
+    save = "--save" in args
+    check = "--check" in args
+    stages = [a for a in args if not a.startswith("--")] or list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown or profile not in PROFILES:
+        raise SystemExit(f"Unknown stage(s)/profile: {', '.join(sorted(unknown)) or profile}")
+
+    res = run(profile, stages, repeat)
+    path = BASELINES / f"{profile}.json"
+    baseline = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+    regressed = []
+    print(f"{'stage':<14} {'seconds':>8} {'items/s':>9} {'MB/s':>8} {'peak MB':>8}   vs baseline")
+    for name, t, m, bad in compare(res["stages"], baseline):
+        r = res["stages"][name]
+        delta = "-" if t is None else f"time x{t:.2f}  rss x{m:.2f}" + ("  REGRESSED" if bad else "")
+        print(f"{name:<14} {r['seconds']:>8.3f} {r['items_per_s']:>9.1f} {r['mb_per_s']:>8.2f} "
+              f"{r['peak_rss_mb']:>8.1f}   {delta}")
+        if bad:
+            regressed.append(name)
+    if save:
+        if baseline and set(baseline["stages"]) - set(res["stages"]):
+            res["stages"] = {**baseline["stages"], **res["stages"]}   # keep stages not rerun
+        BASELINES.mkdir(exist_ok=True)
+        path.write_text(json.dumps(res, indent=2) + "\n", encoding="utf-8")
+        print(f"[ok] baseline -> {path}")
+    if check and regressed:
+        raise SystemExit(f"[warn] regressed beyond {TOLERANCE:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
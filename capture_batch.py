@@ -0,0 +1,207 @@
+# capture_batch.py
+# Runs the scrape_basic.py capture for many symbols at once: N browser workers,
+# each with its own Chromium (debugging port, profile dir), pulling symbols off
+# a shared queue. Each symbol is captured into a staging folder and swapped into
+# ./financials_json/netdump/<symbol>/ (the layout batch_extract.py reads), along
+# with its rows of the shared netdump/index.csv, only when the capture succeeds:
+# a failed capture leaves the last good one in place. The host limits cover
+# page loads only, so all WORKERS browsers capture at once.
+# With FINJSON_NETDUMP_STORE=blobs the bodies go to the shared compressed store
+# netdump/blobs/ instead (see src/common/blobstore.py).
+#
+#   python capture_batch.py              # whole universe from list of company urls.csv
+#   python capture_batch.py 1111 2222    # just these symbols
+
+import contextlib, csv, json, os, queue, shutil, sys, threading, time
+from urllib.parse import urlparse
+
+import scrape_basic
+from src.common import logging_utils as trace
+from src.common.blobstore import format_stats, open_store
+from src.common.io_utils import load_symbols
+
+# ---------- CONFIG ----------
+ROOT = scrape_basic.ROOT
+NETDUMP = scrape_basic.NETDUMP                                   # per-symbol subfolders live here
+COMPANIES_CSV = os.getenv("FINJSON_COMPANIES")                   # default: saudiexchangecodefiles/list of company urls.csv
+WORKERS = int(os.getenv("FINJSON_CAPTURE_WORKERS", "4"))
+BASE_PORT = int(os.getenv("FINJSON_CAPTURE_BASE_PORT", "9222"))  # worker i debugs on BASE_PORT + i
+PER_HOST = int(os.getenv("FINJSON_CAPTURE_PER_HOST", "2"))       # page loads in flight per host
+HOST_INTERVAL = float(os.getenv("FINJSON_CAPTURE_HOST_INTERVAL", "2.0"))  # min seconds between loads per host
+PROFILES = ROOT / "profiles"
+STAGING = ROOT / "cache" / "capture"                             # captures in progress; swapped into netdump/ on success
+SUMMARY = ROOT / "capture_summary.json"
+# ----------------------------
+
+
+class SharedIndex:
+    """One netdump/index.csv for all workers; `file` is relative to netdump/.
+    A symbol's rows are buffered while it is captured and only swapped in by
+    commit(), so a failed capture keeps the last good rows: with the blob store
+    they are the only pointers to that symbol's captures. Rows of symbols
+    outside this run are kept."""
+    FIELDS = ["symbol", *scrape_basic.INDEX_FIELDS]
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows = {}      # symbol -> [row], in file order
+        self.pending = {}   # symbol -> [row] of the capture in progress
+        if path.exists():
+            with path.open(newline="", encoding="utf-8", errors="ignore") as f:
+                for row in csv.DictReader(f):
+                    self.rows.setdefault(row.get("symbol") or "", []).append(row)
+
+    def for_symbol(self, symbol):
+        rows = self.pending[symbol] = []
+
+        class Writer:  # the csv_writer scrape_basic.capture_all() expects
+            def writerow(self, row):
+                file = f"{symbol}/{row['file']}" if row["file"] else ""   # dropped: nothing saved
+                rows.append({**row, "symbol": symbol, "file": file})
+        return Writer()
+
+    def commit(self, symbol):
+        """Replace the symbol's rows with those of its finished capture and rewrite the file."""
+        with self.lock:
+            self.rows[symbol] = self.pending.pop(symbol, [])
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with tmp.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for rows in self.rows.values():
+                    writer.writerows(rows)
+            os.replace(tmp, self.path)
+
+    def discard(self, symbol):
+        self.pending.pop(symbol, None)
+
+
+class HostPoliteness:
+    """At most PER_HOST loads in flight per host, started >= HOST_INTERVAL apart."""
+
+    def __init__(self, per_host=PER_HOST, interval=HOST_INTERVAL):
+        self.per_host = per_host
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.slots = {}    # host -> Semaphore
+        self.last = {}     # host -> monotonic time of the last load start
+
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            sem = self.slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        return host, sem
+
+    def wait_turn(self, host):
+        while True:
+            with self.lock:
+                wait = self.last.get(host, 0) + self.interval - time.monotonic()
+                if wait <= 0:
+                    self.last[host] = time.monotonic()
+                    return
+            time.sleep(wait)
+
+    @contextlib.contextmanager
+    def load(self, url):
+        """Held around one page load only, not the capture windows after it."""
+        host, sem = self.slot(url)
+        with sem:
+            self.wait_turn(host)
+            yield
+
+
+def worker(i, todo, index, polite, results, store=None):
+    """Capture symbols off `todo` with one browser until the queue is empty."""
+    profile = PROFILES / f"worker-{i}"
+    drv = None
+    while True:
+        try:
+            symbol = todo.get_nowait()
+        except queue.Empty:
+            break
+        t0 = time.perf_counter()
+        res = {"symbol": symbol, "worker": i}
+        staging = STAGING / symbol   # the last good netdump/<symbol>/ stays until this capture succeeds
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        url = scrape_basic.company_url(symbol)
+        try:
+            if drv is None:
+                drv = scrape_basic.start_driver(port=BASE_PORT + i, profile_dir=profile)
+            drv.get_log("performance")  # drop events left over from the previous symbol
+            with trace.span("capture", symbol=symbol):
+                res.update(scrape_basic.capture_symbol(
+                    drv, url, index.for_symbol(symbol), staging, politeness=polite.load, store=store))
+            netdump = NETDUMP / symbol
+            shutil.rmtree(netdump, ignore_errors=True)
+            NETDUMP.mkdir(parents=True, exist_ok=True)
+            os.replace(staging, netdump)
+            index.commit(symbol)
+            res["ok"] = True
+        except Exception as e:
+            res.update(ok=False, error=f"{type(e).__name__}: {e}")
+            index.discard(symbol)
+            shutil.rmtree(staging, ignore_errors=True)
+            if drv is not None:  # start clean for the next symbol
+                try:
+                    drv.quit()
+                except Exception:
+                    pass
+                drv = None
+        res["elapsed_s"] = round(time.perf_counter() - t0, 3)   # incl. browser start / politeness waits
+        results[symbol] = res
+        print(f"[{len(results)}] {symbol} {'ok' if res['ok'] else 'FAIL'} "
+              f"{res.get('responses', 0)} responses ({res['elapsed_s']}s) [worker {i}]")
+    if drv is not None:
+        drv.quit()
+
+
+def run(symbols):
+    """Capture `symbols` with WORKERS browsers; writes and returns the summary."""
+    todo = queue.Queue()
+    for s in symbols:
+        todo.put(s)
+    workers = max(1, min(WORKERS, len(symbols)))
+    print(f"[info] {len(symbols)} symbols, {workers} browsers, {PER_HOST} per host, netdump: {NETDUMP}")
+
+    t0 = time.perf_counter()
+    index = SharedIndex(NETDUMP / "index.csv")
+    results = {}
+    polite = HostPoliteness()
+    store = open_store(NETDUMP / "blobs")   # shared by every symbol: one copy per distinct body
+    threads = [threading.Thread(target=worker, args=(i, todo, index, polite, results, store), daemon=True)
+               for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    per_symbol = [results.get(s, {"symbol": s, "ok": False, "error": "not captured"}) for s in symbols]
+    ok = sum(1 for r in per_symbol if r.get("ok"))
+    summary = {
+        "symbols": len(symbols),
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "counts": {"ok": ok, "failed": len(symbols) - ok},
+        "results": per_symbol,
+    }
+    if store:
+        summary["blobs"] = store.stats()
+        print("[blobs]", format_stats(summary["blobs"]))
+    SUMMARY.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    trace.report("capture_batch")
+    return summary
+
+
+def main():
+    symbols = sys.argv[1:] or load_symbols(COMPANIES_CSV)
+    if not symbols:
+        raise SystemExit("No symbols to capture.")
+    summary = run(symbols)
+    print(f"[ok] captured {summary['counts']['ok']}/{len(symbols)} in {summary['elapsed_s']}s")
+    print("[ok] summary ->", SUMMARY)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# extract_all.py
+# One pass over netdump/: every capture is read, decoded and parsed once, then each
+# candidate table is classified by period (annual.is_annual / Quaterly.score_table)
+# and both <symbol>_annual.json and <symbol>_quarterly.json are written in the same run.
+
+import os
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+import annual
+import Quaterly
+from annual import dbg
+from src.common.html_stream import iter_tables
+from src.common.io_utils import decode_text
+from src.common.parse_cache import open_cache, content_hash, format_stats
+from src.common import prescreen
+from src.common import logging_utils as trace
+from src.common.blobstore import captures
+
+# ---------- CONFIG ----------
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+NETDUMP = ROOT / "netdump"
+SYMBOL  = "1111"   # change if needed
+# ----------------------------
+
+EXTRACTORS = (("annual", annual), ("quarterly", Quaterly))
+
+
+def shape_text(text, suffix):
+    """Parse one capture body once; return {frequency: [(table, date_cols), ...]}."""
+    shaped = {}
+    if suffix == ".json":
+        nodes = list(annual.json_nodes(text))
+        for freq, mod in EXTRACTORS:
+            shaped[freq] = mod.json_tables(nodes)
+    elif annual.HTML_BACKEND == "lxml" and not annual.looks_like_xml(text):
+        # one streamed pass; each <table> goes to both parsers before lxml frees it
+        hits = {"annual": [], "quarterly": []}
+        for t in iter_tables(text):
+            hits["annual"].append(annual.parse_html_table(t))
+            hits["quarterly"].append(Quaterly.parse_html_table(t))
+        shaped["annual"] = [p for p in hits["annual"] if p]
+        best = Quaterly.best_parsed(hits["quarterly"])
+        shaped["quarterly"] = [best] if best else []
+    else:
+        soup = annual.soup_for_text(text)
+        shaped["annual"] = annual.html_tables(soup.find_all("table"))
+        # Quaterly always parses as HTML; only re-parse in the rare XML-sniffed case
+        if soup.is_xml:
+            soup = BeautifulSoup(text, "lxml")
+        shaped["quarterly"] = Quaterly.html_tables(soup.find_all("table"))
+    return shaped
+
+
+def shape_capture(p, cache=None):
+    """shape_text() for one capture (Path or blobstore.Blob), served from the parse cache when every frequency hits.
+    Shares cache entries with the standalone annual.py / Quaterly.py runs."""
+    data = p.read_bytes()
+    if cache is None:
+        with trace.span("shape"):
+            return shape_text(decode_text(data), p.suffix.lower())
+    digest = content_hash(data)
+    keys = {freq: cache.key(digest, freq, mod.cache_version()) for freq, mod in EXTRACTORS}
+    shaped = {}
+    for freq, key in keys.items():
+        hit = cache.get(key, len(data))
+        if hit is None:
+            break
+        shaped[freq] = hit
+    else:
+        return shaped
+    with trace.span("shape"):
+        shaped = shape_text(decode_text(data), p.suffix.lower())
+    for freq, key in keys.items():
+        cache.put(key, shaped[freq])
+    return shaped
+
+
+def extract(netdump=None, symbol=None, root=None):
+    """Scan one netdump folder, write both frequencies.
+    Returns {frequency: {"ok": True, "out": name, "src": capture} | {"ok": False, "error": msg}},
+    plus "cache": ParseCache.stats() / "prescreen": Prescreen.stats() when those are enabled."""
+    netdump = Path(netdump or NETDUMP)
+    symbol  = symbol or SYMBOL
+    root    = Path(root or ROOT)
+    if not netdump.exists():
+        raise SystemExit(f"Missing folder: {netdump}")
+
+    dbg("[info] scanning:", netdump)
+    files = captures(netdump)
+    if not files:
+        raise SystemExit("netdump/ is empty. Save your captured files there.")
+
+    candidates = {freq: [] for freq, _ in EXTRACTORS}
+    screen = prescreen.open_prescreen(netdump)
+    cache = open_cache(root)
+    try:
+        for p in files:
+            dbg("\n[file]", p.name)
+            trace.count("files_scanned")
+            try:
+                if screen and not screen.keep(p):
+                    dbg("  [skip] no table markers")
+                    trace.count("files_prescreened_out")
+                    continue
+                with trace.span("parse", file=p.name):
+                    shaped = shape_capture(p, cache)
+            except Exception as e:
+                dbg("  [warn] error parsing", p.name, "->", e)
+                continue
+            trace.count("tables_found", sum(len(v) for v in shaped.values()))
+            for freq, mod in EXTRACTORS:
+                found = mod.add_candidates(candidates[freq], shaped[freq], p.name)
+                dbg(f"  {freq} candidates:", found)
+    finally:
+        screen_stats = screen.stats() if screen else None
+        if screen:
+            dbg("\n[prescreen]", prescreen.format_stats(screen_stats))
+        cache_stats = cache.stats() if cache else None
+        if cache:
+            dbg("\n[cache]", format_stats(cache_stats))
+            cache.close()
+
+    results = {}
+    for freq, mod in EXTRACTORS:
+        try:
+            out, src = mod.write_best(candidates[freq], symbol, root)
+            results[freq] = {"ok": True, "out": out.name, "src": src}
+        except SystemExit as e:
+            print(f"[warn] {freq}:", e)
+            results[freq] = {"ok": False, "error": str(e)}
+    if cache_stats:
+        results["cache"] = cache_stats
+    if screen_stats:
+        results["prescreen"] = screen_stats
+    return results
+
+
+def main():
+    with trace.span("extract", symbol=SYMBOL):
+        results = extract()
+    trace.report("extract_all")
+    if not any(results[freq]["ok"] for freq, _ in EXTRACTORS):
+        raise SystemExit("No annual or quarterly tables found.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# fetch_direct.py
+# Browserless refresh. A capture (scrape_basic.py / capture_batch.py) records every
+# endpoint behind the FINANCIAL INFORMATION widget in index.csv; this script learns
+# them as per-symbol URL templates (./financials_json/endpoints.json) and replays
+# them with one pooled, keep-alive requests.Session instead of driving Chromium.
+# Requests are conditional (If-None-Match / If-Modified-Since from the last run,
+# kept in fetch_state.json), so an unchanged endpoint costs one 304.
+# Bodies land in netdump/<symbol>/ with their own index.csv, the layout
+# batch_extract.py reads. Symbols with no learned endpoint, or whose replay
+# failed, are handed to the Selenium capture (capture_batch.run).
+#
+#   python fetch_direct.py              # whole universe from list of company urls.csv
+#   python fetch_direct.py 1111 2222    # just these symbols
+
+import csv, hashlib, json, os, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.common.blobstore import Blob, find_store
+from src.common.io_utils import load_symbols
+from src.common.prescreen import NON_TABLE_MIME, has_candidate_bytes
+
+# ---------- CONFIG ----------
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+NETDUMP = ROOT / "netdump"                                   # per-symbol subfolders live here
+COMPANIES_CSV = os.getenv("FINJSON_COMPANIES")               # default: saudiexchangecodefiles/list of company urls.csv
+WORKERS = int(os.getenv("FINJSON_FETCH_WORKERS", "8"))       # symbols (= connections) in flight
+TIMEOUT = float(os.getenv("FINJSON_FETCH_TIMEOUT", "20"))    # seconds per request
+FALLBACK = os.getenv("FINJSON_FETCH_FALLBACK", "1") != "0"   # Selenium capture when a replay fails
+USER_AGENT = os.getenv("FINJSON_FETCH_UA", "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                                           "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+ENDPOINTS = "endpoints.json"      # under ROOT: {symbol: [{"url": template, "mime": ...}]}
+STATE = "fetch_state.json"        # under ROOT: {url: {"etag": ..., "last_modified": ...}}
+SUMMARY = "fetch_summary.json"
+VERBOSE = True
+# ----------------------------
+
+SLOT = "{symbol}"
+INDEX_FIELDS = ["file", "url", "mime", "dropped", "blob"]   # scrape_basic.INDEX_FIELDS (not imported: pulls in selenium)
+DATA_SUFFIXES = {".json", ".html", ".txt"}
+
+
+def to_template(url, symbol):
+    """`url` with path segments / query values equal to `symbol` replaced by {symbol}."""
+    parts = urlsplit(url)
+    path = "/".join(SLOT if seg == symbol else seg for seg in parts.path.split("/"))
+
+    def param(kv):
+        key, eq, value = kv.partition("=")
+        return f"{key}={SLOT}" if eq and value == symbol else kv
+    query = "&".join(map(param, parts.query.split("&"))) if parts.query else ""
+    return urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+
+def index_rows(netdump):
+    """(symbol, body, url, mime) for every saved body listed in the shared
+    netdump/index.csv and in the per-symbol netdump/<symbol>/index.csv files.
+    `body` is the capture Path, or a Blob for rows kept in the blob store."""
+    store = find_store(netdump)
+
+    def body(folder, row):
+        if row.get("blob") and store:
+            return Blob(store, Path(row["file"]).name, row["blob"])
+        return folder / row["file"]
+
+    shared = netdump / "index.csv"
+    if shared.exists():
+        with shared.open(newline="", encoding="utf-8", errors="ignore") as f:
+            for row in csv.DictReader(f):
+                if row.get("file") and row.get("symbol"):
+                    yield row["symbol"], body(netdump, row), row.get("url") or "", row.get("mime") or ""
+    for own in sorted(netdump.glob("*/index.csv")):
+        with own.open(newline="", encoding="utf-8", errors="ignore") as f:
+            for row in csv.DictReader(f):
+                if row.get("file"):
+                    yield own.parent.name, body(own.parent, row), row.get("url") or "", row.get("mime") or ""
+
+
+def learn_endpoints(netdump=NETDUMP):
+    """{symbol: [{"url": template, "mime": mime}]} for the captured bodies that
+    could hold a table (same byte test as the extract pre-screen)."""
+    learned = {}
+    for symbol, body, url, mime in index_rows(netdump):
+        if not url or NON_TABLE_MIME.search(mime) or not body.exists():
+            continue
+        if not has_candidate_bytes(body.read_bytes(), body.suffix.lower()):
+            continue
+        eps = learned.setdefault(symbol, [])
+        template = to_template(url, symbol)
+        if all(e["url"] != template for e in eps):
+            eps.append({"url": template, "mime": mime})
+    return learned
+
+
+def load_json(path):
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def update_endpoints(root=ROOT, netdump=NETDUMP):
+    """Merge what the current netdump teaches into root/endpoints.json (learned
+    templates are kept even after the capture they came from is gone)."""
+    path = root / ENDPOINTS
+    endpoints = load_json(path)
+    for symbol, eps in learn_endpoints(netdump).items():
+        known = endpoints.setdefault(symbol, [])
+        known.extend(e for e in eps if all(k["url"] != e["url"] for k in known))
+    path.write_text(json.dumps(endpoints, ensure_ascii=False, indent=2), encoding="utf-8")
+    return endpoints
+
+
+def endpoints_for(symbol, endpoints):
+    """The symbol's own endpoints, else every {symbol} template learned elsewhere."""
+    if endpoints.get(symbol):
+        return endpoints[symbol]
+    generic = {}
+    for eps in endpoints.values():
+        for e in eps:
+            if SLOT in e["url"]:
+                generic.setdefault(e["url"], e)
+    return list(generic.values())
+
+
+def body_name(url, mime):
+    """File name derived from the URL itself, so a 304 keeps that URL's own body
+    on disk even when the order of the learned endpoints changes."""
+    m = (mime or "").lower()
+    ext = ".json" if "json" in m else ".html" if "html" in m else ".txt"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return f"{digest}_{urlsplit(url).netloc.replace(':', '_')}{ext}"
+
+
+def make_session(workers=WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def fetch_symbol(session, symbol, eps, state, netdump=NETDUMP):
+    """Replay `eps` for one symbol into netdump/<symbol>/; never raises.
+    Returns (result, {url: validators}) -- validators of the 200 responses."""
+    t0 = time.perf_counter()
+    folder = netdump / symbol
+    folder.mkdir(parents=True, exist_ok=True)
+    res = {"symbol": symbol, "endpoints": len(eps), "fetched": 0, "unchanged": 0, "failed": 0, "errors": []}
+    validators, rows = {}, []
+    for ep in eps:
+        url = ep["url"].replace(SLOT, symbol)
+        path = folder / body_name(url, ep.get("mime"))
+        headers = {}
+        known = state.get(url) if path.exists() else None
+        if known and known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known and known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+        try:
+            r = session.get(url, headers=headers, timeout=TIMEOUT)
+            if r.status_code == 304:
+                res["unchanged"] += 1
+            elif r.ok:
+                path.write_bytes(r.content)
+                validators[url] = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+                res["fetched"] += 1
+            else:
+                raise requests.HTTPError(f"HTTP {r.status_code}")
+            rows.append({"file": path.name, "url": url, "mime": ep.get("mime") or r.headers.get("Content-Type", "")})
+        except Exception as e:
+            res["failed"] += 1
+            res["errors"].append(f"{url}: {type(e).__name__}: {e}")
+    res["ok"] = bool(eps) and not res["failed"]
+    if res["ok"]:
+        # the folder now mirrors the endpoints: drop bodies of an older capture
+        keep = {row["file"] for row in rows}
+        for p in folder.iterdir():
+            if p.suffix in DATA_SUFFIXES and p.name not in keep:
+                p.unlink()
+        with (folder / "index.csv").open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=INDEX_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res, validators
+
+
+def selenium_fallback(symbols):
+    import capture_batch   # selenium only when it is actually needed
+    return capture_batch.run(symbols)
+
+
+def run(symbols, root=ROOT, netdump=NETDUMP, workers=WORKERS, fallback=FALLBACK):
+    """Replay the learned endpoints of `symbols`; writes and returns the summary."""
+    t0 = time.perf_counter()
+    endpoints = update_endpoints(root, netdump)
+    state_path = root / STATE
+    state = load_json(state_path)
+    lock = threading.Lock()
+    results = {}
+
+    with make_session(workers) as session:
+        def one(symbol):
+            res, validators = fetch_symbol(session, symbol, endpoints_for(symbol, endpoints), state, netdump)
+            with lock:
+                state.update(validators)
+                results[symbol] = res
+            if VERBOSE:
+                print(f"[{len(results)}] {symbol} {'ok' if res['ok'] else 'FAIL'} fetched={res['fetched']} "
+                      f"unchanged={res['unchanged']} failed={res['failed']} ({res['seconds']}s)")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(one, symbols))
+    state_path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    retry = [s for s in symbols if not results[s]["ok"]]
+    if retry and fallback:
+        print(f"[info] {len(retry)} symbols -> Selenium capture")
+        captured = {r["symbol"]: r for r in selenium_fallback(retry)["results"]}
+        for s in retry:
+            results[s]["fallback"] = captured.get(s, {"ok": False})
+            results[s]["ok"] = bool(results[s]["fallback"].get("ok"))
+        update_endpoints(root, netdump)   # learn from the fresh captures for next time
+
+    per_symbol = [results[s] for s in symbols]
+    ok = sum(1 for r in per_symbol if r["ok"])
+    summary = {
+        "symbols": len(symbols),
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "counts": {"ok": ok, "failed": len(symbols) - ok,
+                   "fetched": sum(r["fetched"] for r in per_symbol),
+                   "unchanged": sum(r["unchanged"] for r in per_symbol),
+                   "fallback": sum(1 for r in per_symbol if "fallback" in r)},
+        "results": per_symbol,
+    }
+    (root / SUMMARY).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    return summary
+
+
+def main():
+    symbols = sys.argv[1:] or load_symbols(COMPANIES_CSV)
+    if not symbols:
+        raise SystemExit("No symbols to fetch.")
+    NETDUMP.mkdir(parents=True, exist_ok=True)
+    summary = run(symbols)
+    c = summary["counts"]
+    print(f"[ok] {c['ok']}/{len(symbols)} symbols in {summary['elapsed_s']}s "
+          f"(fetched={c['fetched']} unchanged={c['unchanged']} fallback={c['fallback']})")
+    print("[ok] summary ->", ROOT / SUMMARY)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# financials_csv.py
+# One converter for every extractor output in FINJSON_ROOT (<symbol>_annual.json and
+# <symbol>_quarterly.json): all files go into a single long frame
+# (DataFrame.from_records, one vectorized date parse over the distinct period
+# headers), and each symbol's wide view is a pivot of its slice. Writes the same
+# <symbol>_<freq>_wide.csv / _long.csv that annual_csv.py / Quaterly_csv.py
+# produce, for all symbols in one pass, plus Parquet partitions with FINJSON_OUTPUT.
+#
+#   python financials_csv.py              # every output in FINJSON_ROOT
+#   python financials_csv.py 1111 2222    # just these symbols
+
+import json, os, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+IN_DIR = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+OUT_DIR = IN_DIR
+FREQUENCIES = ("annual", "quarterly")
+EXPORT_PER_SECTION = False
+OUTPUT = os.getenv("FINJSON_OUTPUT", "csv")   # csv | parquet | both
+PARQUET_DIR = IN_DIR / "parquet"              # frequency=<f>/symbol=<s>/part-0.parquet
+# ----------------------------
+
+ITEM_COLS = ["symbol", "frequency", "row", "Section", "Metric"]
+VALUE_COLS = ["symbol", "frequency", "row", "Date", "Value"]
+
+
+def find_files(in_dir=IN_DIR, frequencies=FREQUENCIES, symbols=None):
+    """[(symbol, frequency, path)] of the extractor outputs in in_dir."""
+    out = []
+    for freq in frequencies:
+        suffix = f"_{freq}.json"
+        for path in sorted(in_dir.glob(f"*{suffix}")):
+            symbol = path.name[:-len(suffix)]
+            if symbols is None or symbol in symbols:
+                out.append((symbol, freq, path))
+    return out
+
+
+def load_outputs(files):
+    """(items, values, docs): one record per metric row and one per (row, period) cell,
+    across every file; `row` numbers the metric rows of one output in file order."""
+    items, values, docs = [], [], {}
+    for symbol, freq, path in files:
+        with path.open("r", encoding="utf-8") as f:
+            js = json.load(f)
+        symbol = js.get("symbol", symbol)
+        freq = js.get("frequency", freq)
+        docs[(symbol, freq)] = js
+        row = 0
+        for section, its in (js.get("sections") or {}).items():
+            for it in its:
+                items.append((symbol, freq, row, section, it.get("metric", "")))
+                values.extend((symbol, freq, row, d, v) for d, v in (it.get("values") or {}).items())
+                row += 1
+    return (pd.DataFrame.from_records(items, columns=ITEM_COLS),
+            pd.DataFrame.from_records(values, columns=VALUE_COLS), docs)
+
+
+def parse_dates(values):
+    """{period header: Timestamp} over the distinct headers (dayfirst, as the per-file converters sort)."""
+    dates = values["Date"].unique()
+    return dict(zip(dates, pd.to_datetime(pd.Series(dates), dayfirst=True, errors="coerce")))
+
+
+def pivot_all(items, values):
+    """Every output's cells in one pivot, aligned with `items` (a row per metric row,
+    rows without any value included): (float matrix, {period header: column})."""
+    cells = values.set_index(["symbol", "frequency", "row", "Date"])["Value"].unstack("Date")
+    cells = cells.reindex(pd.MultiIndex.from_frame(items[["symbol", "frequency", "row"]]))
+    return cells.to_numpy(dtype=float), {d: i for i, d in enumerate(cells.columns)}
+
+
+def wide_frame(items, block, columns, dates, ts):
+    """Section, Metric, then one column per period of this output, newest first.
+    `block`: this output's rows of the pivot_all() matrix; `columns`: its period -> column map."""
+    dates = sorted(dates, key=lambda d: ts[d], reverse=True)
+    wide = pd.DataFrame(block[:, [columns[d] for d in dates]], columns=dates)
+    wide.insert(0, "Metric", items["Metric"].to_numpy())
+    wide.insert(0, "Section", items["Section"].to_numpy())
+    return wide
+
+
+def long_frame(wide, ts):
+    """wide.melt() stably sorted by Section, Metric and newest period first, built
+    with one np.lexsort over melt-order index arrays instead of melt + sort_values."""
+    dates = list(wide.columns[2:])
+    n, k = len(wide), len(dates)
+    row = np.tile(np.arange(n), k)            # melt order: column by column
+    col = np.repeat(np.arange(k), n)
+    section = wide["Section"].to_numpy(dtype=object)
+    metric = wide["Metric"].to_numpy(dtype=object)
+    newest = pd.Series([ts[d] for d in dates]).rank(method="dense", ascending=False, na_option="bottom").to_numpy()
+    order = np.lexsort((newest[col], pd.factorize(metric, sort=True)[0][row],
+                        pd.factorize(section, sort=True)[0][row]))
+    row, col = row[order], col[order]
+    return pd.DataFrame({
+        "Section": section[row],
+        "Metric": metric[row],
+        "Date": np.array(dates, dtype=object)[col],
+        "Value": wide.iloc[:, 2:].to_numpy(dtype=float)[row, col],
+    })
+
+
+def write_csvs(wide, long, symbol, freq, out_dir=OUT_DIR):
+    out_wide = out_dir / f"{symbol}_{freq}_wide.csv"
+    out_long = out_dir / f"{symbol}_{freq}_long.csv"
+    wide.to_csv(out_wide, index=False, encoding="utf-8-sig")
+    long.to_csv(out_long, index=False, encoding="utf-8-sig")
+    if EXPORT_PER_SECTION:
+        for sec, g in wide.groupby("Section", dropna=False):
+            if not sec:
+                continue
+            slug = sec.lower().replace(" ", "_")
+            g.to_csv(out_dir / f"{symbol}_{freq}_wide_{slug}.csv", index=False, encoding="utf-8-sig")
+    return out_wide, out_long
+
+
+def convert(in_dir=IN_DIR, out_dir=OUT_DIR, frequencies=FREQUENCIES, symbols=None, output=OUTPUT):
+    """Convert every matching output; returns {"files": n, "written": [...], "timings": {...}}."""
+    timings = {}
+    t = time.perf_counter()
+    files = find_files(in_dir, frequencies, symbols)
+    items, values, docs = load_outputs(files)
+    timings["load"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    ts = parse_dates(values)
+    timings["dates"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    matrix, columns = pivot_all(items, values)
+    dates = values.groupby(["symbol", "frequency"], sort=False)["Date"].unique()
+    pivot_s = time.perf_counter() - t
+
+    written, write_s = [], 0.0
+    for key, pos in items.groupby(["symbol", "frequency"], sort=False).indices.items():
+        symbol, freq = key
+        if key not in dates.index:
+            print(f"[warn] No rows for {symbol}_{freq}")
+            continue
+        t = time.perf_counter()
+        wide = wide_frame(items.iloc[pos], matrix[pos], columns, dates[key], ts)
+        long = long_frame(wide, ts) if output in ("csv", "both") else None
+        pivot_s += time.perf_counter() - t
+
+        t = time.perf_counter()
+        if output in ("parquet", "both"):
+            from src.common.parquet_out import write_partition  # pyarrow is only needed here
+            written.append(write_partition(docs[key], PARQUET_DIR, symbol, freq)[0])
+        if output in ("csv", "both"):
+            written.extend(write_csvs(wide, long, symbol, freq, out_dir))
+        write_s += time.perf_counter() - t
+    timings["pivot"] = pivot_s
+    timings["write"] = write_s
+    return {"files": len(files), "written": written, "timings": {k: round(v, 3) for k, v in timings.items()}}
+
+
+def main():
+    res = convert(symbols=set(sys.argv[1:]) or None)
+    if not res["files"]:
+        raise SystemExit(f"No *_annual.json / *_quarterly.json in {IN_DIR}")
+    tm = res["timings"]
+    print(f"[ok] {res['files']} outputs -> {len(res['written'])} files "
+          f"(load {tm['load']}s, dates {tm['dates']}s, pivot {tm['pivot']}s, write {tm['write']}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,186 @@
 from playwright.sync_api import sync_playwright
 from urllib.parse import urljoin
+from pathlib import Path
+import os, sys, time
 import pandas as pd
 
 pd.set_option("display.max_colwidth", None)
 
 URL = "https://www.saudiexchange.sa/wps/portal/saudiexchange/ourmarkets/main-market-watch?locale=en"
 BASE = "https://www.saudiexchange.sa"
-
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page(user_agent="Mozilla/5.0")
-    page.goto(URL, wait_until="domcontentloaded")
-    page.wait_for_selector("#marketWatchTable1 tbody tr")
-
+OUT = Path("list of company urls.csv")
+CHANGES = Path("list of company urls.changes.csv")   # what the last refresh added/removed/changed
+TABLE = "#marketWatchTable1"
+COLUMNS = ["code", "name", "sector", "url"]
+
+# fast (default): rows read in one in-page call, scrolling ends when the row count stops changing
+# --slow / FINJSON_URLS_FAST=0: the original row-by-row locator walk with fixed 800 ms waits
+FAST = os.getenv("FINJSON_URLS_FAST", "1") != "0" and "--slow" not in sys.argv
+# A refresh that would drop more than this share of the known companies is more likely a
+# half-loaded table than delistings: the changes file is written, the list is left alone.
+# --allow-removals / FINJSON_URLS_ALLOW_REMOVALS=1 applies it anyway.
+MAX_REMOVED = float(os.getenv("FINJSON_URLS_MAX_REMOVED", "0.05"))
+ALLOW_REMOVALS = os.getenv("FINJSON_URLS_ALLOW_REMOVALS", "0") == "1" or "--allow-removals" in sys.argv
+QUIET_MS = 1500      # no new rows within this long after a scroll -> the list is complete
+SCROLL_LIMIT_MS = 60000
+
+# Scroll to the bottom, then wait for the table's row count to change (MutationObserver),
+# not for a fixed delay; stop after a scroll that adds nothing within QUIET_MS.
+SCROLL_JS = """async ([sel, quiet, limit]) => {
+    const table = document.querySelector(sel);
+    const count = () => table.querySelectorAll("tbody tr").length;
+    const t0 = performance.now();
+    let last = -1, rounds = 0;
+    while (count() !== last && performance.now() - t0 < limit) {
+        last = count();
+        rounds++;
+        await new Promise(resolve => {
+            const done = () => { obs.disconnect(); clearTimeout(timer); resolve(); };
+            const obs = new MutationObserver(() => { if (count() !== last) done(); });
+            const timer = setTimeout(done, quiet);
+            obs.observe(table, {childList: true, subtree: true});
+            window.scrollTo(0, document.body.scrollHeight);
+        });
+    }
+    return {rows: count(), rounds};
+}"""
+
+# Every row's text and company link in one round-trip. innerText is what
+# locator.inner_text() returns, so both modes parse the same strings.
+ROWS_JS = """sel => Array.from(document.querySelectorAll(sel + " tbody tr"), tr => {
+    const a = tr.querySelector("a.ellipsis");
+    return {text: tr.innerText, href: a ? a.getAttribute("href") || "" : null};
+})"""
+
+
+def scroll_slow(page):
     # scroll until row count stabilizes
     last_count = -1
     stable = 0
     while stable < 2:
         page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
         page.wait_for_timeout(800)
-        rows = page.locator("#marketWatchTable1 tbody tr")
-        count = rows.count()
+        count = page.locator(f"{TABLE} tbody tr").count()
         if count == last_count:
             stable += 1
         else:
             stable = 0
             last_count = count
 
-    companies = []
-    rows = page.locator("#marketWatchTable1 tbody tr")
-
-    name = ""
-    code = ""
-    sector = ""
-    url = ""
 
+def rows_slow(page):
+    rows = page.locator(f"{TABLE} tbody tr")
+    out = []
     for i in range(rows.count()):
         row = rows.nth(i)
-        txt = row.inner_text().strip()  
-        txt = txt.replace('\t', '\n')  
-              
-        # print(f"Row {i+1}:\n{txt}\n" + "-"*40)        # printing all the text inside each row  
+        link = row.locator("a.ellipsis")
+        href = (link.first.get_attribute("href") or "") if link.count() else None
+        out.append({"text": row.inner_text(), "href": href})
+    return out
 
-        row_text_content_list = txt.splitlines()
 
-        # print(row_text_content_list)
-
-        if len(row_text_content_list)==1:
-            sector = row_text_content_list[0]
-        else:
-            name = row_text_content_list[0]
-            code = row_text_content_list[1]
-
-        link = row.locator("a.ellipsis")  
-        if link.count() == 0:
+def parse_rows(rows):
+    """[{"text", "href"}] in table order -> company dicts. A single-line row is a
+    sector heading for the rows under it; other rows start with name, code."""
+    companies = []
+    name = code = sector = ""
+    for row in rows:
+        lines = row["text"].strip().replace("\t", "\n").splitlines()
+        if len(lines) == 1:
+            sector = lines[0]
+        elif len(lines) > 1:
+            name, code = lines[0], lines[1]
+        if row["href"] is None:
             continue
-
-        href = link.first.get_attribute("href") or ""
-
-        
-        # print(href)     # printing the name and href of each row
-
-        full_url = urljoin(BASE, href)
-
-    #     first_td = row.locator("td").first
-    #     cell_text = first_td.inner_text().strip()
-    #     parts = [ln.strip() for ln in cell_text.splitlines() if ln.strip()]
-    #     code = parts[-1] if parts else ""
-
         if name and code:
-            companies.append({"code": code, "name": name, "sector": sector, "url": full_url})
+            companies.append({"code": code, "name": name, "sector": sector, "url": urljoin(BASE, row["href"])})
+    return companies
+
+
+def scrape(fast=FAST):
+    """-> (companies DataFrame, {phase: seconds})."""
+    timings = {}
+    t = time.perf_counter()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page(user_agent="Mozilla/5.0")
+        page.goto(URL, wait_until="domcontentloaded")
+        page.wait_for_selector(f"{TABLE} tbody tr")
+        timings["load"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        if fast:
+            page.evaluate(SCROLL_JS, [TABLE, QUIET_MS, SCROLL_LIMIT_MS])
+        else:
+            scroll_slow(page)
+        timings["scroll"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        rows = page.evaluate(ROWS_JS, TABLE) if fast else rows_slow(page)
+        timings["rows"] = time.perf_counter() - t
+        browser.close()
+
+    df = pd.DataFrame(parse_rows(rows), columns=COLUMNS).drop_duplicates(subset=["code", "name"])
+    return df, timings
+
+
+def diff(old, new):
+    """Rows of `new` vs `old` keyed by code -> DataFrame with a leading "change" column
+    (added / removed / changed; a changed row shows its new values)."""
+    old = old.drop_duplicates(subset="code").set_index("code")
+    new_idx = new.drop_duplicates(subset="code").set_index("code")
+    added = new_idx.loc[new_idx.index.difference(old.index, sort=False)]
+    removed = old.loc[old.index.difference(new_idx.index, sort=False)]
+    both = new_idx.index.intersection(old.index, sort=False)
+    cols = [c for c in COLUMNS[1:] if c in old.columns]
+    changed = new_idx.loc[both][(new_idx.loc[both, cols] != old.loc[both, cols]).any(axis=1)]
+    parts = [part.assign(change=kind) for kind, part in (("added", added), ("removed", removed), ("changed", changed))]
+    out = pd.concat(parts).reset_index()
+    return out[["change"] + COLUMNS]
+
+
+def write_atomic(df, path):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def apply_diff(old, changes):
+    """The existing list with `changes` applied, keeping its row order; new codes go last."""
+    updates = changes[changes["change"] != "removed"].set_index("code")[COLUMNS[1:]]
+    removed = set(changes.loc[changes["change"] == "removed", "code"])
+    merged = old[~old["code"].isin(removed)].set_index("code")
+    merged.update(updates)
+    merged = pd.concat([merged, updates.loc[updates.index.difference(merged.index, sort=False)]])
+    return merged.reset_index()[COLUMNS]
+
+
+def main():
+    t0 = time.perf_counter()
+    new, timings = scrape()
+    if not OUT.exists():
+        write_atomic(new, OUT)
+        print(f"[ok] {len(new)} companies -> {OUT}")
+    else:
+        old = pd.read_csv(OUT, dtype=str, keep_default_na=False)
+        changes = diff(old, new)
+        counts = changes["change"].value_counts()
+        removed = counts.get("removed", 0)
+        if changes.empty:
+            print(f"[ok] {OUT}: up to date ({len(new)} companies)")
+        elif removed > MAX_REMOVED * len(old) and not ALLOW_REMOVALS:
+            write_atomic(changes, CHANGES)
+            raise SystemExit(f"[warn] {OUT}: refresh would remove {removed} of {len(old)} companies "
+                             f"(limit {MAX_REMOVED:.0%}); list left unchanged. Check {CHANGES}, "
+                             f"then rerun with --allow-removals to apply it.")
+        else:
+            write_atomic(apply_diff(old, changes), OUT)
+            write_atomic(changes, CHANGES)
+            print(f"[ok] {OUT}: +{counts.get('added', 0)} -{removed} "
+                  f"~{counts.get('changed', 0)} (details in {CHANGES})")
+    phases = " ".join(f"{k}={v:.1f}s" for k, v in timings.items())
+    print(f"[info] {'fast' if FAST else 'slow'} refresh in {time.perf_counter() - t0:.1f}s ({phases})")
 
-    browser.close()
 
-df = pd.DataFrame(companies).drop_duplicates(subset=["code", "name"])
-# print(df.to_string(index=False))
-# print("Total companies:", len(df))
-df.to_csv("list of company urls.csv", index=False)
-print("Saved to list of company urls.csv")
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 # Captures ALL network responses (json/html/text), clicking Annually/Quarterly to trigger loads.
 # Dumps bodies to ./financials_json/netdump/ + index.csv so we can mine them later.
 
-import os, re, json, time, base64, csv
+import os, re, json, time, base64, contextlib, csv
+from collections import Counter
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -13,6 +14,10 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from src.common import logging_utils as trace
+from src.common.blobstore import Blob, open_store
+from src.common.prescreen import NON_TABLE_MIME
+
 # Use env variable if available, else fallback to local folder
 
 # SYMBOL = "1111"  # <-- change if needed
@@ -30,15 +35,27 @@ NETDUMP.mkdir(parents=True, exist_ok=True)
 
 SYMBOL = "1111"  # <-- change if needed
 
-URL = ("https://www.saudiexchange.sa/wps/portal/saudiexchange/hidden/company-profile-main/"
-       "!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8ziTR3NDIw8LAz83d2MXA0C3SydAl1c3Q0NvE30I4EKzBEKDMKcTQzMDPxN3H19LAzdTU31w8syU8v1wwkpK8hOMgUA-oskdg!!/"
-       f"?companySymbol={SYMBOL}&locale=en")
+def company_url(symbol):
+    return ("https://www.saudiexchange.sa/wps/portal/saudiexchange/hidden/company-profile-main/"
+            "!ut/p/z1/04_Sj9CPykssy0xPLMnMz0vMAfIjo8ziTR3NDIw8LAz83d2MXA0C3SydAl1c3Q0NvE30I4EKzBEKDMKcTQzMDPxN3H19LAzdTU31w8syU8v1wwkpK8hOMgUA-oskdg!!/"
+            f"?companySymbol={symbol}&locale=en")
+
+URL = company_url(SYMBOL)
 
 HEADLESS = False
 CAPTURE_INITIAL = 6      # seconds pre-click
 CAPTURE_AFTER_CLICK = 5  # seconds after each tab click
 SCROLL_PAUSES = 6        # how many scroll steps in the panel/page
 
+# "idle": a capture window ends once tracked XHR/Fetch/Document requests are done and the
+# network has been quiet for CAPTURE_QUIET seconds; the window lengths above become hard timeouts.
+# "fixed": always wait out the full windows.
+CAPTURE_MODE = os.getenv("FINJSON_CAPTURE_MODE", "idle")
+CAPTURE_QUIET = float(os.getenv("FINJSON_CAPTURE_QUIET", "1.0"))
+BLOCKING_TYPES = {"XHR", "Fetch", "Document"}
+PERF_METHODS = ("Network.requestWillBeSent", "Network.responseReceived",
+                "Network.loadingFinished", "Network.loadingFailed")
+
 TOK_HITS = [  # strings to help you eyeball hits in console
     "Balance Sheet", "Statement Of Income", "Cash Flow",
     "Assets", "Liabilities", "Equity", "Revenue", "Profit",
@@ -50,8 +67,26 @@ NOISY_URL_BITS = [
     "Theme", "dojo", "font", ".js?", "icon", "manifest", "bootstrap"
 ]
 
+# Capture policy (FINJSON_CAPTURE_POLICY=0: pull every non-noisy body, block nothing).
+# BLOCK_URL_PATTERNS are refused inside the browser (Network.setBlockedURLs), so they are never
+# fetched. Scripts and stylesheets still load, since the portal builds its widgets with them, but
+# only BODY_TYPES responses get their bodies pulled. Every drop is written to index.csv.
+CAPTURE_POLICY = os.getenv("FINJSON_CAPTURE_POLICY", "1") != "0"
+BLOCK_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.svg*", "*.ico*", "*.webp*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*.mp4*", "*.webm*", "*.mp3*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*collect?*", "*hotjar*",
+]
+# Chrome's blocked-URL patterns: only "*" is a wildcard, "?" and "[" are literal, case matters
+RE_BLOCKED = re.compile("|".join(".*".join(map(re.escape, p.split("*"))) for p in BLOCK_URL_PATTERNS), re.S)
+BODY_TYPES = {"XHR", "Fetch", "Document"}
+MAX_BODY = int(os.getenv("FINJSON_CAPTURE_MAX_BODY", str(20_000_000)))  # encoded bytes
+INDEX_FIELDS = ["file", "url", "mime", "dropped", "blob"]
+
 
-def start_driver():
+def start_driver(port=9222, profile_dir=None):
+    """Chromium with performance logging. Give each concurrent browser its own
+    debugging `port` and `profile_dir` (--user-data-dir)."""
     opts = webdriver.ChromeOptions()
 
     # --- required for Docker ---
@@ -60,7 +95,9 @@ def start_driver():
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--disable-gpu")
     opts.add_argument("--window-size=1920,1080")
-    opts.add_argument("--remote-debugging-port=9222")
+    opts.add_argument(f"--remote-debugging-port={port}")
+    if profile_dir:
+        opts.add_argument(f"--user-data-dir={profile_dir}")
 
     # --- POINT TO system chromium & chromedriver in the image ---
     opts.binary_location = os.getenv("CHROME_BIN", "/usr/bin/chromium")
@@ -81,6 +118,8 @@ def start_driver():
             "maxTotalBufferSize": 100_000_000
         })
         drv.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        if CAPTURE_POLICY:
+            drv.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCK_URL_PATTERNS})
     except Exception:
         pass
 
@@ -132,7 +171,8 @@ def click_tab(driver, label):
                 except: pass
     return False
 
-def save_body(root, seq, url, mime, text, base64_flag):
+def save_body(root, seq, url, mime, text, base64_flag, store=None):
+    """Write one body as root/<seq>_<host><ext>, or into the blob `store` (-> Blob)."""
     # decode if base64
     if base64_flag:
         try:
@@ -145,89 +185,204 @@ def save_body(root, seq, url, mime, text, base64_flag):
     ext = ".json" if "json" in m else ".html" if "html" in m else ".txt"
     # filename
     host = urlparse(url).netloc.replace(":","_")
-    path = root / f"{seq:04d}_{host}{ext}"
+    name = f"{seq:04d}_{host}{ext}"
+    if store:
+        return Blob(store, name, store.put(text.encode("utf-8", errors="ignore")))
+    path = root / name
     path.write_text(text, encoding="utf-8", errors="ignore")
     return path
 
-def capture_all(drv, seconds, csv_writer, seen):
-    """poll performance logs; on loadingFinished, pull body & dump"""
+class NetState:
+    """Requests seen across the capture windows of one page (idle mode)."""
+
+    def __init__(self, quiet=CAPTURE_QUIET):
+        self.quiet = quiet
+        self.pending = {}      # reqId -> (url, mime), response seen, body not pulled yet
+        self.inflight = set()  # XHR/Fetch/Document reqIds not finished yet
+        self.last = time.monotonic()
+
+    def touch(self):
+        self.last = time.monotonic()
+
+    def done(self, req_id):
+        self.inflight.discard(req_id)
+        self.touch()
+
+    def idle(self):
+        return not self.inflight and time.monotonic() - self.last >= self.quiet
+
+
+def is_noisy(url):
+    return any(x in url for x in NOISY_URL_BITS)
+
+
+class CapturePolicy:
+    """Which responses capture_all() pulls; counts and indexes the rest."""
+
+    def __init__(self, enabled=CAPTURE_POLICY):
+        self.enabled = enabled
+        self.dropped = Counter()   # reason -> responses
+
+    def blocked(self, url):
+        return self.enabled and RE_BLOCKED.fullmatch(url) is not None
+
+    def drop_reason(self, rtype, url, mime):
+        """None when the body should be pulled."""
+        if is_noisy(url):
+            return "noisy"
+        if not self.enabled:
+            return None
+        if rtype not in BODY_TYPES:
+            return f"type:{rtype or '?'}"
+        if NON_TABLE_MIME.search(mime):
+            return "mime"
+        return None
+
+    def too_big(self, size):
+        return self.enabled and (size or 0) > MAX_BODY
+
+    def drop(self, csv_writer, url, mime, reason):
+        self.dropped[reason.split(":")[0]] += 1
+        csv_writer.writerow({"file": "", "url": url, "mime": mime, "dropped": reason})
+
+
+def capture_all(drv, seconds, csv_writer, seen, netdump=NETDUMP, net=None, policy=None, store=None):
+    """poll performance logs; on loadingFinished, pull body & dump into netdump/ (or the blob store).
+    With a NetState the window ends as soon as the page goes idle; `seconds` is then the hard timeout.
+    Returns the seconds spent."""
     t0 = time.time(); seq = len(seen)+1
-    pending = {}  # reqId -> (url, mime)
+    policy = policy or CapturePolicy()
+    pending = net.pending if net else {}  # reqId -> (url, mime)
+    if net:
+        net.touch()
     while time.time() - t0 < seconds:
         for e in drv.get_log("performance"):
+            # most entries are dataReceived & co: skip them without decoding
+            if not any(m in e["message"] for m in PERF_METHODS):
+                continue
             try:
                 msg = json.loads(e["message"])["message"]
             except Exception:
                 continue
             method = msg.get("method",""); params = msg.get("params",{})
-            if method == "Network.responseReceived":
+            if method == "Network.requestWillBeSent":
+                url = params.get("request", {}).get("url") or ""
+                if policy.blocked(url):
+                    policy.drop(csv_writer, url, "", "blocked")
+                    continue
+                if net and params.get("type") in BLOCKING_TYPES and not is_noisy(url):
+                    net.inflight.add(params.get("requestId"))
+                    net.touch()
+            elif method == "Network.loadingFailed":
+                if net:
+                    net.done(params.get("requestId"))
+                pending.pop(params.get("requestId"), None)
+            elif method == "Network.responseReceived":
                 resp = params.get("response", {})
                 req_id = params.get("requestId")
                 url = resp.get("url") or ""
                 mime = resp.get("mimeType") or ""
-                if any(x in url for x in NOISY_URL_BITS):
+                if net:
+                    net.touch()
+                reason = policy.drop_reason(params.get("type"), url, mime)
+                if reason:
+                    policy.drop(csv_writer, url, mime, reason)
                     continue
                 pending[req_id] = (url, mime)
             elif method == "Network.loadingFinished":
                 req_id = params.get("requestId")
+                if net:
+                    net.done(req_id)
                 if req_id in seen: 
                     continue
                 if req_id not in pending:
                     continue
                 url, mime = pending.pop(req_id)
+                if policy.too_big(params.get("encodedDataLength")):
+                    policy.drop(csv_writer, url, mime, f"size:{int(params['encodedDataLength'])}")
+                    continue
                 try:
                     body = drv.execute_cdp_cmd("Network.getResponseBody", {"requestId": req_id})
                     text = body.get("body") or ""
-                    path = save_body(NETDUMP, seq, url, mime, text, body.get("base64Encoded"))
+                    path = save_body(netdump, seq, url, mime, text, body.get("base64Encoded"), store)
                     if path:
                         seq += 1
                         seen.add(req_id)
                         # write index
-                        csv_writer.writerow({"file": path.name, "url": url, "mime": mime})
+                        csv_writer.writerow({"file": path.name, "url": url, "mime": mime,
+                                             "blob": getattr(path, "digest", "")})
                         # quick hit print
                         low = text.lower()
                         if any(t.lower() in low for t in TOK_HITS):
                             print("[HIT]", path.name, "←", url)
                 except Exception:
                     pass
+        if net and net.idle():
+            break
         time.sleep(0.15)
+    return time.time() - t0
+
+
+def capture_symbol(drv, url, writer, netdump=NETDUMP, politeness=None, store=None):
+    """Load one company page, click Annually/Quarterly and dump every response into netdump/.
+    `politeness`: optional callable(url) -> context manager held around the page load only;
+    entering it blocks until the host may be hit again.
+    `store`: optional BlobStore the bodies go to instead (index.csv then names their hashes).
+    Returns {"responses": n, "dropped": {reason: n}, "seconds": total, "windows": {name: seconds}}."""
+    seen = set()
+    net = NetState() if CAPTURE_MODE == "idle" else None
+    policy = CapturePolicy()
+    windows = {}
+    t0 = time.time()
+    print("Target:", url)
+    with politeness(url) if politeness else contextlib.nullcontext():
+        drv.get(url)
+    time.sleep(1.2)
+
+    # capture while idle
+    windows["initial"] = capture_all(drv, CAPTURE_INITIAL, writer, seen, netdump, net, policy, store)
+
+    # click Annually and capture
+    if click_tab(drv, "Annually"):
+        windows["annually"] = capture_all(drv, CAPTURE_AFTER_CLICK, writer, seen, netdump, net, policy, store)
+
+    # scroll a bit (some widgets lazy-load)
+    try:
+        drv.switch_to.default_content()
+        windows["scroll"] = 0.0
+        for _ in range(SCROLL_PAUSES):
+            drv.execute_script("window.scrollBy(0, 800);")
+            time.sleep(0.3)
+            windows["scroll"] += capture_all(drv, 1.0, writer, seen, netdump, net, policy, store)
+    except:
+        pass
+
+    # click Quarterly and capture
+    if click_tab(drv, "Quarterly"):
+        windows["quarterly"] = capture_all(drv, CAPTURE_AFTER_CLICK, writer, seen, netdump, net, policy, store)
+
+    trace.count("responses_captured", len(seen))
+    trace.count("responses_dropped", sum(policy.dropped.values()))
+    stats = {"responses": len(seen), "dropped": dict(policy.dropped), "seconds": round(time.time() - t0, 3),
+             "windows": {k: round(v, 3) for k, v in windows.items()}}
+    print(f"[latency] {url.rsplit('companySymbol=', 1)[-1].split('&')[0]}: {stats['seconds']:.1f}s "
+          f"({CAPTURE_MODE}) " + " ".join(f"{k}={v:.1f}s" for k, v in stats["windows"].items()))
+    return stats
 
 
 if __name__ == "__main__":
     index_csv = NETDUMP / "index.csv"
     fcsv = open(index_csv, "w", newline="", encoding="utf-8")
-    writer = csv.DictWriter(fcsv, fieldnames=["file", "url", "mime"])
+    writer = csv.DictWriter(fcsv, fieldnames=INDEX_FIELDS)
     writer.writeheader()
 
     drv = start_driver()
+    store = open_store(NETDUMP / "blobs")
     try:
-        print("Target:", URL)
-        drv.get(URL)
-        time.sleep(1.2)
-
-        seen = set()
-        # capture while idle
-        capture_all(drv, CAPTURE_INITIAL, writer, seen)
-
-        # click Annually and capture
-        if click_tab(drv, "Annually"):
-            capture_all(drv, CAPTURE_AFTER_CLICK, writer, seen)
-
-        # scroll a bit (some widgets lazy-load)
-        try:
-            drv.switch_to.default_content()
-            for _ in range(SCROLL_PAUSES):
-                drv.execute_script("window.scrollBy(0, 800);")
-                time.sleep(0.3)
-                capture_all(drv, 1.0, writer, seen)
-        except:
-            pass
-
-        # click Quarterly and capture
-        if click_tab(drv, "Quarterly"):
-            capture_all(drv, CAPTURE_AFTER_CLICK, writer, seen)
-
-        print(f"[ok] saved bodies in {NETDUMP}")
+        with trace.span("capture", url=URL):
+            capture_symbol(drv, URL, writer, store=store)
+        trace.report("capture")
+        print(f"[ok] saved bodies in {store.path if store else NETDUMP}")
         print(f"[ok] index -> {index_csv}")
 
     finally:
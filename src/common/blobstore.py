@@ -0,0 +1,158 @@
+"""Content-addressed, gzip-compressed storage for netdump capture bodies.
+
+Each body is keyed by the sha256 of its raw bytes (the parse cache key) and
+written once to <store>/<aa>/<sha256>.gz. Portal chrome and shared widgets,
+captured again for every symbol on every run, therefore take the space of
+one compressed copy. index.csv keeps the usual `file` name, for ordering and
+for its suffix, and adds a `blob` column with the hash.
+
+`captures()` lists a netdump folder as its plain capture files plus those
+blob entries. A Blob stands in for the Path of a plain capture and reads
+through a streaming gzip decompressor, so the extractors handle both
+layouts the same way.
+
+The store is netdump/blobs/ in the single-symbol layout, or one level up,
+shared by every netdump/<symbol>/ folder. The capture scripts write into it
+when FINJSON_NETDUMP_STORE=blobs.
+
+    python -m src.common.blobstore [netdump]      # size / dedup stats
+    python -m src.common.blobstore gc [netdump]   # drop blobs no index.csv points at
+"""
+import gzip, os, sys, threading
+from pathlib import Path
+
+from src.common.io_utils import decode_text, read_index
+from src.common.parse_cache import content_hash
+
+STORE_MODE = os.getenv("FINJSON_NETDUMP_STORE", "files")   # "blobs": capture into the store
+LEVEL = int(os.getenv("FINJSON_BLOB_LEVEL", "6"))           # gzip level
+DATA_SUFFIXES = {".json", ".html", ".txt"}
+
+
+class BlobStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.stored = self.deduped = self.bytes_in = self.bytes_written = 0
+
+    def blob_path(self, digest):
+        return self.path / digest[:2] / f"{digest}.gz"
+
+    def put(self, data: bytes) -> str:
+        """Store `data` unless an identical body is already there; returns its hash."""
+        digest = content_hash(data)
+        path = self.blob_path(digest)
+        written = 0
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp, "wb", compresslevel=LEVEL) as f:
+                f.write(data)
+            written = tmp.stat().st_size
+            os.replace(tmp, path)   # atomic: another worker may be storing the same body
+        with self.lock:
+            self.bytes_in += len(data)
+            if written:
+                self.stored += 1
+                self.bytes_written += written
+            else:
+                self.deduped += 1
+        return digest
+
+    def open(self, digest):
+        return gzip.open(self.blob_path(digest), "rb")
+
+    def stats(self):
+        return {"stored": self.stored, "deduped": self.deduped,
+                "bytes_in": self.bytes_in, "bytes_written": self.bytes_written}
+
+
+class Blob:
+    """A capture kept in a BlobStore; reads like the Path of a plain capture file."""
+
+    def __init__(self, store, name, digest):
+        self.store = store
+        self.name = name
+        self.suffix = Path(name).suffix
+        self.digest = digest
+
+    def open(self):
+        """Binary stream of the raw body, decompressed as it is read."""
+        return self.store.open(self.digest)
+
+    def read_bytes(self):
+        with self.open() as f:
+            return f.read()
+
+    def read_text(self, encoding="utf-8", errors="ignore"):
+        return decode_text(self.read_bytes())
+
+    def exists(self):
+        return self.store.blob_path(self.digest).exists()
+
+    def stat(self):
+        return self.store.blob_path(self.digest).stat()
+
+    def __repr__(self):
+        return f"Blob({self.name!r}, {self.digest[:12]})"
+
+
+def open_store(path):
+    """BlobStore at `path` for capturing, or None unless FINJSON_NETDUMP_STORE=blobs."""
+    return BlobStore(path) if STORE_MODE == "blobs" else None
+
+
+def find_store(netdump):
+    """The store a netdump folder's index.csv points into: netdump/blobs/ or ../blobs/."""
+    netdump = Path(netdump)
+    for path in (netdump / "blobs", netdump.parent / "blobs"):
+        if path.is_dir():
+            return BlobStore(path)
+    return None
+
+
+def captures(netdump):
+    """Captures of one netdump folder, sorted by name: plain .json/.html/.txt files,
+    plus the index.csv entries held in the blob store (a file on disk wins)."""
+    netdump = Path(netdump)
+    out = {p.name: p for p in netdump.iterdir() if p.suffix.lower() in DATA_SUFFIXES and p.is_file()}
+    store = find_store(netdump)
+    if store:
+        for name, row in read_index(netdump).items():
+            if row.get("blob") and name not in out:
+                out[name] = Blob(store, name, row["blob"])
+    return [out[name] for name in sorted(out)]
+
+
+def referenced(netdump):
+    """Blob hashes named by any index.csv under netdump/."""
+    refs = set()
+    for index in [netdump / "index.csv", *netdump.glob("*/index.csv")]:
+        if index.exists():
+            refs.update(row["blob"] for row in read_index(index.parent).values() if row.get("blob"))
+    return refs
+
+
+def format_stats(st):
+    return (f"stored={st['stored']} deduped={st['deduped']} in={st['bytes_in'] / 1e6:.1f}MB "
+            f"written={st['bytes_written'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    gc = bool(args) and args[0] == "gc"
+    args = args[1:] if gc else args
+    netdump = Path(args[0] if args else Path(os.getenv("FINJSON_ROOT", "./financials_json")) / "netdump")
+    store = find_store(netdump)
+    if store is None:
+        raise SystemExit(f"No blob store under {netdump}")
+    blobs = sorted(store.path.glob("*/*.gz"))
+    refs = referenced(netdump)
+    orphans = [b for b in blobs if b.name[:-3] not in refs]
+    size = sum(b.stat().st_size for b in blobs)
+    print(f"blobs={len(blobs)} size={size / 1e6:.1f}MB referenced={len(refs)} orphaned={len(orphans)}")
+    if gc:
+        for b in orphans:
+            b.unlink()
+        print(f"[ok] removed {len(orphans)} orphaned blobs")
@@ -0,0 +1,145 @@
+"""Date-header classification and normalisation shared by the extractors.
+
+The same few dozen header strings ("2023", "31/12/2023", "FY2022", ...) are
+classified thousands of times per run, so every entry point is memoised and
+the known formats are handled with one compiled pattern and `datetime`;
+pandas is only imported for the odd header nothing else understands.
+
+Two rule sets live here, matching the two scripts:
+  - annual.py:   looks_like_date_header / norm_date_header (permissive, year-end dates)
+  - Quaterly.py: dateish / norm_date (strict, pandas month-first semantics)
+"""
+import re
+from datetime import date
+from functools import lru_cache
+
+from src.common import logging_utils as trace
+
+MEMO_SIZE = 8192
+
+# any 4-digit year anywhere -- every annual header rule contains one, so this is the classifier
+RE_YEAR = re.compile(r"(19|20)\d{2}")
+
+# all the shapes with a pandas-free normalisation, one alternative per format
+RE_KNOWN = re.compile(r"""
+    (?P<year>(?:19|20)\d{2})
+  | (?P<iso_y>(?:19|20)\d{2})-(?P<iso_m>\d{2})-(?P<iso_d>\d{2})
+  | (?P<a>\d{1,2})/(?P<b>\d{1,2})/(?P<slash_y>(?:19|20)\d{2})
+  | (?P<span_y1>(?:19|20)\d{2})/(?P<span_y2>(?:19|20)\d{2})
+  | (?:FY|F/Y|FYE)\s*(?P<fy>(?:19|20)\d{2})
+  | (?P<fy_suffix>(?:19|20)\d{2})\s*(?:FY|Y|Annual|\(12M\))
+""", re.X | re.I)
+
+# Quaterly.dateish(): pure year, ISO date or d/m/Y only
+RE_STRICT = re.compile(r"(?:19|20)\d{2}(?:-\d{2}-\d{2})?|\d{1,2}/\d{1,2}/(?:19|20)\d{2}")
+
+
+def clean_text(s):
+    return (str(s) or "").replace("\u00A0", " ").strip()
+
+
+def _memo(fn):
+    """lru_cache for str arguments; anything unhashable/odd goes straight through."""
+    cached = lru_cache(maxsize=MEMO_SIZE)(fn)
+
+    def wrapper(s):
+        return cached(s) if type(s) is str else fn(s)
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.__doc__ = fn.__doc__
+    wrapper.__name__ = fn.__name__
+    return wrapper
+
+
+def _iso(y, m, d):
+    try:
+        return date(int(y), int(m), int(d)).isoformat()
+    except ValueError:
+        return None
+
+
+def _pandas_iso(s, dayfirst):
+    import pandas as pd
+    trace.count("dates_pandas_fallback")
+    dt = pd.to_datetime(s, dayfirst=dayfirst, errors="coerce")
+    return None if pd.isna(dt) else dt.strftime("%Y-%m-%d")
+
+
+@_memo
+def looks_like_date_header(s) -> bool:
+    return RE_YEAR.search(clean_text(s)) is not None
+
+
+def first_year(s):
+    m = RE_YEAR.search(clean_text(s))
+    return int(m.group()) if m else None
+
+
+@_memo
+def norm_date_header(s) -> str:
+    """Annual header -> ISO date; bare years / FY labels become year-end."""
+    s = clean_text(s)
+    m = RE_KNOWN.fullmatch(s)
+    if m:
+        g = m.groupdict()
+        if g["year"]:
+            return f"{s}-12-31"
+        if g["span_y2"]:
+            return f"{int(g['span_y2'])}-12-31"
+        if g["fy"] or g["fy_suffix"]:
+            return f"{int(g['fy'] or g['fy_suffix'])}-12-31"
+        if g["slash_y"]:
+            # 31/12/2023 is day-first; otherwise what pandas' month-first guess would give
+            iso = _iso(g["slash_y"], g["b"], g["a"]) or _iso(g["slash_y"], g["a"], g["b"])
+            return iso or f"{int(g['slash_y'])}-12-31"
+        iso = _iso(g["iso_y"], g["iso_m"], g["iso_d"])
+        if iso:
+            return iso
+
+    # fallback attempts
+    for dayfirst in (False, True):
+        iso = _pandas_iso(s, dayfirst)
+        if iso:
+            return iso
+    y = first_year(s)
+    return f"{y}-12-31" if y else s
+
+
+@_memo
+def dateish(s) -> bool:
+    return RE_STRICT.fullmatch((str(s) or "").strip()) is not None
+
+
+@_memo
+def norm_date(s) -> str:
+    """Quarterly header -> ISO date, same answers as pd.to_datetime(dayfirst=False, then True)."""
+    s = (str(s) or "").replace("\u00A0", " ").strip()
+    m = RE_KNOWN.fullmatch(s)
+    if m:
+        g = m.groupdict()
+        if g["year"]:
+            return f"{int(g['year'])}-01-01"   # int(): "20٢٣" -> 2023, as pandas reads it
+        iso = None
+        if g["slash_y"]:
+            iso = _iso(g["slash_y"], g["a"], g["b"]) or _iso(g["slash_y"], g["b"], g["a"])
+        elif g["iso_y"]:
+            iso = _iso(g["iso_y"], g["iso_m"], g["iso_d"])
+        if iso:
+            return iso
+
+    for dayfirst in (False, True):
+        iso = _pandas_iso(s, dayfirst)
+        if iso:
+            return iso
+    return s
+
+
+def _calls(*fns):
+    return sum(c.hits + c.misses for c in (fn.cache_info() for fn in fns))
+
+
+# classifier traffic for logging_utils, read from the memo stats instead of counted per call
+trace.gauge("header_classifications", lambda: _calls(looks_like_date_header, dateish))
+trace.gauge("header_normalisations", lambda: _calls(norm_date_header, norm_date))
+trace.gauge("header_memo_misses", lambda: sum(fn.cache_info().misses for fn in
+                                              (looks_like_date_header, dateish, norm_date_header, norm_date)))
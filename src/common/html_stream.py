@@ -0,0 +1,81 @@
+"""lxml-native alternative to BeautifulSoup for pulling <table>s out of capture pages.
+
+The page is fed through `lxml.etree.iterparse` and only <table> subtrees are
+kept: everything outside a table is cleared as soon as it closes, and each
+outermost table is cleared once it (and any tables nested in it) has been
+handed out. `Node` wraps an lxml element with the handful of BeautifulSoup
+calls the extractors use (`find`, `find_all`, `get_text`), so
+`parse_html_table()` in annual.py / Quaterly.py runs unchanged on either
+backend and yields the same `(rows, date_cols)`.
+
+Tables come out in document order, nested ones included, like
+`soup.find_all("table")`.
+"""
+import io
+from lxml import etree
+
+
+class Node:
+    """Just enough of bs4.Tag on top of an lxml element."""
+    __slots__ = ("el",)
+
+    def __init__(self, el):
+        self.el = el
+
+    def find(self, name):
+        return next((Node(e) for e in self.el.iterdescendants(name)), None)
+
+    def find_all(self, names):
+        names = (names,) if isinstance(names, str) else tuple(names)
+        return [Node(e) for e in self.el.iterdescendants(*names)]
+
+    def get_text(self, strip=False):
+        if strip:
+            return "".join(t.strip() for t in _strings(self.el))
+        return "".join(_strings(self.el))
+
+
+NO_TEXT = {"script", "style"}   # bs4's get_text() leaves their strings out too
+
+
+def _strings(el):
+    """el's text like bs4's get_text(): comments and <script>/<style> contents
+    are skipped but their tails kept; el's own tail is not part of it."""
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in NO_TEXT:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _drop(el):
+    """Free a finished element and the already-processed siblings before it."""
+    el.clear(keep_tail=True)
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def iter_tables(text):
+    """Yield a Node per <table> in an HTML page (str), in document order."""
+    depth = 0
+    events = etree.iterparse(io.BytesIO(text.encode("utf-8")), events=("start", "end"),
+                             html=True, encoding="utf-8", huge_tree=True, recover=True)
+    for event, el in events:
+        if not isinstance(el.tag, str):
+            continue  # comments / processing instructions
+        if el.tag == "table":
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth:
+                continue  # nested: handed out with its outermost table
+            for t in el.iter("table"):
+                yield Node(t)
+            _drop(el)
+        elif event == "end" and not depth:
+            _drop(el)
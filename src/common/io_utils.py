@@ -0,0 +1,37 @@
+import csv
+from pathlib import Path
+
+COMPANIES_CSV = Path(__file__).resolve().parents[2] / "saudiexchangecodefiles" / "list of company urls.csv"
+
+
+def load_symbols(path=None):
+    """Symbols from the company list CSV (column `code`), in file order, de-duplicated."""
+    path = Path(path or COMPANIES_CSV)
+    seen, out = set(), []
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            code = (row.get("code") or "").strip()
+            if code and code not in seen:
+                seen.add(code)
+                out.append(code)
+    return out
+
+
+def read_index(netdump):
+    """{file name: index.csv row} for one netdump folder: its own index.csv, else the
+    shared one a level up that capture_batch.py writes (files listed as <symbol>/<name>).
+    Rows without a file (dropped responses) are left out; {} when there is no index."""
+    netdump = Path(netdump)
+    for path, prefix in ((netdump / "index.csv", ""), (netdump.parent / "index.csv", f"{netdump.name}/")):
+        if path.exists():
+            with path.open(newline="", encoding="utf-8", errors="ignore") as f:
+                rows = {row["file"][len(prefix):]: row for row in csv.DictReader(f)
+                        if (row.get("file") or "").startswith(prefix) and row["file"] != prefix}
+            if rows:
+                return rows
+    return {}
+
+
+def decode_text(data: bytes) -> str:
+    """bytes -> str exactly like Path.read_text(encoding="utf-8", errors="ignore")."""
+    return data.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
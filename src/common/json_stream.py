@@ -0,0 +1,142 @@
+"""Event-based alternative to json.loads() + walk() for capture payloads.
+
+`candidate_nodes()` runs ijson over a capture and returns, in the same
+pre-order walk() would visit them, only the nodes shape_json() can turn
+into a table, built no further than shape_json() looks:
+
+  - objects holding any of TABLE_KEYS -> a dict of just those keys; array
+    values are built, object values only recorded as truthy/empty;
+  - list[dict] -> rows keep only their label / date-header keys, and the
+    list is dropped unless those could make a table;
+  - list[list] -> built whole, but only when its header row has a date.
+
+Everything else is streamed past: scalars are never built, and nested
+tables are found wherever they sit. The {"json": ...} capture wrapper is
+honoured like `payload.get("json", payload)`.
+
+Since list[dict] rows are trimmed, shape_json() may list their date columns
+in a different order than for the full rows -- set order, which was never
+stable across runs anyway (str hashing is randomised per process).
+"""
+import io
+
+import ijson
+
+from src.common.dates import looks_like_date_header
+
+TABLE_KEYS = frozenset(("columns", "headers", "dates", "Dates", "rows", "data", "items"))
+
+# how much of a value to build (ROW: a list[dict] row)
+SKIP, FULL, TRUTH, ROW = range(4)
+NO_ROW_KEYS = {}   # shared by every row without label/date keys; never mutated
+
+
+class _Scan:
+    def __init__(self, events, label_keys):
+        self.events = events
+        self.label_keys = frozenset(label_keys)
+        self.seq = 0
+        self.top = None          # index of the root key being scanned
+        self.json_top = None     # index of the last root "json" key
+        self.found = []          # (seq, root key index, node)
+
+    def value(self, event, value, mode):
+        if event == "start_map":
+            return self.map(mode)
+        if event == "start_array":
+            return self.array(mode)
+        return value if mode != SKIP else None
+
+    def map(self, mode, root=False):
+        seq = self.seq = self.seq + 1
+        obj = {} if mode in (FULL, ROW) else None
+        row = mode == ROW
+        tables = {}
+        empty = True
+        for event, key in self.events:
+            if event == "end_map":
+                break
+            empty = False
+            if root:
+                self.top = 0 if self.top is None else self.top + 1
+                if key == "json":
+                    self.json_top = self.top
+            ev, val = next(self.events)
+            if mode == FULL:
+                child = FULL
+            elif key in TABLE_KEYS:
+                child = FULL if ev == "start_array" else TRUTH
+            elif row and (key in self.label_keys or looks_like_date_header(key)):
+                child = FULL
+            else:
+                child = SKIP
+            v = self.value(ev, val, child)
+            if key in TABLE_KEYS:
+                tables[key] = v
+            if mode == FULL or row and child == FULL and key not in TABLE_KEYS:
+                obj[key] = v
+        if tables:
+            self.found.append((seq, None if root else self.top, obj if mode == FULL else tables))
+        if mode == TRUTH:
+            return {} if empty else True
+        return obj if obj or not row else NO_ROW_KEYS
+
+    def array(self, mode):
+        seq = self.seq = self.seq + 1
+        event, value = next(self.events)
+        if event == "end_array":
+            return [] if mode == FULL else None
+        if mode == FULL or event == "start_array":
+            # list[list] only counts with a date in its header row
+            first = self.value(event, value, FULL)
+            keep = mode == FULL or any(looks_like_date_header(h) for h in first)
+            items = [first] + self.rest(FULL if keep else SKIP)
+            if keep and isinstance(first, (dict, list)):
+                self.found.append((seq, self.top, items))
+            return items if mode == FULL else None
+        if event == "start_map":
+            rows = [self.map(ROW)] + self.rest(ROW)
+            if self.could_be_table(rows):
+                self.found.append((seq, self.top, rows))
+            return None
+        self.rest(SKIP)
+        return None
+
+    def could_be_table(self, rows):
+        """shape_json() needs a label key and two date keys across the rows."""
+        if not all(isinstance(r, dict) for r in rows):
+            return True   # shape_json() raises on it, as it always did
+        keys = set().union(*rows)
+        return any(k in self.label_keys for k in keys) and sum(map(looks_like_date_header, keys)) >= 2
+
+    def rest(self, mode):
+        """Remaining elements of the current array."""
+        out = []
+        for event, value in self.events:
+            if event == "end_array":
+                break
+            if mode == ROW and event == "start_array":
+                self.array(SKIP)
+                v = []   # a non-dict row: shape_json() fails on it either way
+            else:
+                v = self.value(event, value, FULL if mode == ROW and event != "start_map" else mode)
+            if mode != SKIP:
+                out.append(v)
+        return out
+
+
+def candidate_nodes(data, label_keys):
+    """shape_json() candidates of a capture (str or bytes), in walk() order.
+    `label_keys`: the extractor's LABEL_KEYS, whose row values must be kept."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    scan = _Scan(ijson.basic_parse(io.BytesIO(data), use_float=True), label_keys)
+    event, _ = next(scan.events)
+    if event != "start_map":
+        raise ValueError("capture JSON is not an object")
+    scan.map(SKIP, root=True)
+    found = scan.found
+    if scan.json_top is not None:
+        found = [f for f in found if f[1] == scan.json_top]
+    found.sort(key=lambda f: f[0])
+    return [node for _, _, node in found]
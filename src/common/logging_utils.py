@@ -0,0 +1,191 @@
+"""Timing spans and hot-path counters, written as JSON lines under ./logs.
+
+    from src.common import logging_utils as trace
+
+    with trace.span("parse", file=p.name):      # nests: extract/parse/shape ...
+        ...
+    trace.count("tables_found", len(shaped))
+    trace.report("annual")                       # end of run: summary line + table on stderr
+
+Every finished span is one line in <FINJSON_LOG_DIR>/<run>-<pid>.jsonl:
+
+    {"t": 1718000000.1, "run": "20240610-101500-4242", "pid": 4242,
+     "span": "extract/parse/shape", "ms": 3.2, "file": "0004_capture.json"}
+
+Spans are aggregated by their nested path (count, total, max) and counters by
+name. report() writes both as a {"summary": ...} line and prints the slowest
+paths. Worker processes share the parent's run id (it travels in the
+environment). They return snapshot(reset=True) with their results, and the
+parent merge()s them before it reports.
+
+Gauges are read at snapshot time instead of being counted on the hot path,
+e.g. the date-header classifiers' memo statistics.
+
+Off unless FINJSON_TRACE=1. While off, span() returns one shared no-op
+context manager and count() does nothing, and nothing is written.
+"""
+import atexit, contextlib, json, os, sys, threading, time
+from pathlib import Path
+
+ENABLED = os.getenv("FINJSON_TRACE", "0") != "0"
+LOG_DIR = Path(os.getenv("FINJSON_LOG_DIR", "./logs"))
+TOP = 12   # span paths shown by report()
+
+_NULL = contextlib.nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_spans = {}      # path -> [count, total seconds, max seconds]
+_counters = {}   # name -> n
+_gauges = {}     # name -> callable returning a running total
+_gauge_base = {}
+_out = None
+
+
+def run_id():
+    """Shared by a run's worker processes through FINJSON_TRACE_RUN."""
+    rid = os.environ.get("FINJSON_TRACE_RUN")
+    if not rid:
+        rid = os.environ["FINJSON_TRACE_RUN"] = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    return rid
+
+
+def enable(on=True, log_dir=None):
+    """Switch tracing on/off at runtime (e.g. from a benchmark)."""
+    global ENABLED, LOG_DIR
+    ENABLED = on
+    if log_dir is not None:
+        os.environ["FINJSON_LOG_DIR"] = str(log_dir)
+        LOG_DIR = Path(log_dir)
+    if on:
+        os.environ["FINJSON_TRACE"] = "1"   # worker processes started from here trace too
+        run_id()
+
+
+def _write(rec):
+    global _out
+    with _lock:
+        if _out is None:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            _out = (LOG_DIR / f"{run_id()}-{os.getpid()}.jsonl").open("a", encoding="utf-8")
+            atexit.register(_out.flush)
+        _out.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "t0", "path")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        _local.stack.pop()
+        with _lock:
+            agg = _spans.get(self.path)
+            if agg is None:
+                _spans[self.path] = [1, dt, dt]
+            else:
+                agg[0] += 1
+                agg[1] += dt
+                agg[2] = max(agg[2], dt)
+        rec = {"t": round(time.time(), 3), "run": run_id(), "pid": os.getpid(), "span": self.path,
+               "ms": round(dt * 1e3, 3)}
+        if exc[0] is not None:
+            rec["error"] = exc[0].__name__
+        rec.update(self.attrs)
+        _write(rec)
+        return False
+
+
+def span(name, **attrs):
+    """Time a block as a child of the enclosing span; a no-op when tracing is off."""
+    if not ENABLED:
+        return _NULL
+    return _Span(name, attrs)
+
+
+def count(name, n=1):
+    if ENABLED:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def gauge(name, fn):
+    """Report fn() (a running total) as a counter; read only at snapshot time."""
+    _gauges[name] = fn
+    _gauge_base.setdefault(name, fn())
+
+
+def flush():
+    with _lock:
+        if _out is not None:
+            _out.flush()
+
+
+def snapshot(reset=False):
+    """{"spans": {path: [count, seconds, max]}, "counters": {name: n}} of this process.
+    Also flushes the span log: pool workers exit without running atexit hooks."""
+    with _lock:
+        if _out is not None:
+            _out.flush()
+        snap = {"spans": {k: list(v) for k, v in _spans.items()}, "counters": dict(_counters)}
+        for name, fn in _gauges.items():
+            value = fn()
+            snap["counters"][name] = snap["counters"].get(name, 0) + value - _gauge_base[name]
+            if reset:
+                _gauge_base[name] = value
+        if reset:
+            _spans.clear()
+            _counters.clear()
+    return snap
+
+
+def merge(snap):
+    """Fold a worker's snapshot() into this process's totals."""
+    if not snap:
+        return
+    with _lock:
+        for path, (n, total, worst) in snap.get("spans", {}).items():
+            agg = _spans.setdefault(path, [0, 0.0, 0.0])
+            agg[0] += n
+            agg[1] += total
+            agg[2] = max(agg[2], worst)
+        for name, n in snap.get("counters", {}).items():
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def format_summary(snap, top=TOP):
+    lines = [f"{'span':<40} {'count':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9}"]
+    for path, (n, total, worst) in sorted(snap["spans"].items(), key=lambda kv: -kv[1][1])[:top]:
+        lines.append(f"{path:<40} {n:>7} {total:>9.3f} {total / n * 1e3:>9.2f} {worst * 1e3:>9.2f}")
+    if snap["counters"]:
+        lines.append("counters: " + " ".join(f"{k}={v}" for k, v in sorted(snap["counters"].items())))
+    return "\n".join(lines)
+
+
+def report(label="run"):
+    """End of run: write the summary line and print it to stderr; returns the snapshot (None when off)."""
+    if not ENABLED:
+        return None
+    snap = snapshot()
+    _write({"t": round(time.time(), 3), "run": run_id(), "pid": os.getpid(), "summary": label,
+            "spans": {k: {"count": n, "seconds": round(t, 6), "max_ms": round(m * 1e3, 3)}
+                      for k, (n, t, m) in snap["spans"].items()},
+            "counters": snap["counters"]})
+    flush()
+    print(f"[trace] {label} -> {_out.name}\n{format_summary(snap)}", file=sys.stderr)
+    return snap
+
+
+if ENABLED:
+    run_id()   # fixed before any worker process starts, so they all log under it
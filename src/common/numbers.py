@@ -0,0 +1,91 @@
+"""Whole-table numeric cleaning for the extractors' to_json().
+
+`to_number()` is the per-cell rule both annual.py and Quaterly.py use;
+`clean_matrix()` applies the same rule to every (row, date column) cell of a
+candidate table at once with NumPy string ops:
+
+  - NBSP -> space, surrounding whitespace stripped
+  - "", "-", "—", "–" are missing
+  - "(1,234)" -> -1234, thousands commas dropped
+
+JSON numbers skip the text steps, and only cells that are not plain
+[-+]digits[.digits] after cleaning go through float() one by one, so both
+give the same numbers.
+"""
+import re
+
+import numpy as np
+
+BLANKS = ("", "-", "—", "–")
+RE_PAREN_NEG = re.compile(r"^\((.*)\)$")
+SMALL_TABLE = 256   # cells; below this the per-cell loop beats the array setup
+
+
+def to_number(x):
+    if x is None:
+        return None
+    s = (str(x) or "").replace("\u00A0", " ").strip()
+    if s in BLANKS:
+        return None
+    s = RE_PAREN_NEG.sub(r"-\1", s)  # (1,234) -> -1234
+    s = s.replace(",", "")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _py_float(s):
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def _parse_floats(s, skip):
+    """float64 for a str array, NaN where unparseable or `skip`.
+    numpy's str->float cast accepts exactly what float() does."""
+    s = np.where(skip, "nan", s)
+    try:
+        return s.astype(np.float64)
+    except ValueError:
+        pass
+    # plain [-+]digits[.digits] cells are safe to cast in bulk; the rest go one by one.
+    # isdecimal, not isdigit: float() rejects superscripts like "²" that isdigit accepts
+    body = np.char.lstrip(s, "+-")
+    plain = (np.char.str_len(s) - np.char.str_len(body) <= 1) & np.char.isdecimal(np.char.replace(body, ".", "", 1))
+    out = np.empty(s.shape, dtype=np.float64)
+    out[plain] = s[plain].astype(np.float64)
+    odd = ~plain & ~skip
+    out[~plain] = np.nan
+    out[odd] = [_py_float(v) for v in s[odd]]
+    return out
+
+
+def clean_matrix(table, cols):
+    """float64 array of shape (len(table), len(cols)): to_number(row.get(col)), NaN for None."""
+    n, k = len(table), len(cols)
+    if n * k < SMALL_TABLE:
+        return np.array([[to_number(r.get(c)) for c in cols] for r in table], dtype=np.float64).reshape(n, k)
+    cells = np.fromiter((r.get(c) for r in table for c in cols), dtype=object, count=n * k)
+    out = np.full(n * k, np.nan)
+
+    # JSON numbers need no text cleaning: float(str(x)) == float(x)
+    kind = np.fromiter(map(type, cells), dtype=object, count=n * k)
+    num = (kind == int) | (kind == float)
+    text = ~num & (cells != None)  # noqa: E711 -- elementwise
+    if num.any():
+        out[num] = cells[num].astype(np.float64)
+    if text.any():
+        s = np.char.strip(np.char.replace(cells[text].astype(str), "\u00A0", " "))
+        # (1,234) -> -1234; like RE_PAREN_NEG, "." stops at newlines
+        neg = np.char.startswith(s, "(") & np.char.endswith(s, ")") & (np.char.find(s, "\n") < 0)
+        if neg.any():
+            s[neg] = ["-" + v[1:-1] for v in s[neg]]
+        out[text] = _parse_floats(np.char.replace(s, ",", ""), np.isin(s, BLANKS))
+    return out.reshape(n, k)
+
+
+def matrix_rows(mat):
+    """Rows of clean_matrix() as lists of float-or-None, ready for JSON."""
+    return [[None if v != v else v for v in row] for row in mat.tolist()]
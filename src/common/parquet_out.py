@@ -0,0 +1,89 @@
+"""Typed, partitioned Parquet output of the extracted financials.
+
+One file per (frequency, symbol), laid out hive-style:
+
+    <root>/frequency=annual/symbol=1111/part-0.parquet
+
+Columns: section and metric (dictionary-encoded strings), period (date32)
+and value (float64); frequency and symbol come from the path. Rows are
+sorted by metric and period, and empty cells or non-date periods are not
+stored. Writing a symbol replaces only its own partition, so new symbols
+are added without rewriting the others. A market-wide scan for one metric
+reads a single dictionary-encoded column per file:
+
+    python -m src.common.parquet_out "Total Assets" [parquet root]
+"""
+import os, sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema([
+    ("section", pa.dictionary(pa.int32(), pa.string())),
+    ("metric", pa.dictionary(pa.int32(), pa.string())),
+    ("period", pa.date32()),
+    ("value", pa.float64()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("frequency", pa.string()), ("symbol", pa.string())]), flavor="hive")
+PART_FILE = "part-0.parquet"
+
+
+def long_table(js):
+    """Extractor JSON -> pa.Table in SCHEMA; also returns the rows dropped for a non-date period."""
+    rows = [(section, item.get("metric") or "", period, value)
+            for section, items in (js.get("sections") or {}).items()
+            for item in items
+            for period, value in (item.get("values") or {}).items()
+            if value is not None]
+    df = pd.DataFrame(rows, columns=["section", "metric", "period", "value"])
+    df["period"] = pd.to_datetime(df["period"], format="ISO8601", errors="coerce")
+    dropped = int(df["period"].isna().sum())
+    df = df.dropna(subset=["period"]).sort_values(["metric", "period"], kind="stable")
+    table = pa.table({
+        "section": pa.array(df["section"], pa.string()).dictionary_encode(),
+        "metric": pa.array(df["metric"], pa.string()).dictionary_encode(),
+        "period": pa.array(df["period"].dt.date, pa.date32()),
+        "value": pa.array(df["value"], pa.float64()),
+    })
+    return table.cast(SCHEMA), dropped
+
+
+def partition_dir(root, frequency, symbol):
+    return Path(root) / f"frequency={frequency}" / f"symbol={symbol}"
+
+
+def write_partition(js, root, symbol=None, frequency=None):
+    """Write one extractor output as its (frequency, symbol) partition; returns (path, rows, dropped)."""
+    symbol = symbol or js.get("symbol")
+    frequency = frequency or js.get("frequency", "unknown")
+    table, dropped = long_table(js)
+    folder = partition_dir(root, frequency, symbol)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / PART_FILE
+    tmp = folder / f".{PART_FILE}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)   # readers never see a half-written partition
+    return path, table.num_rows, dropped
+
+
+def dataset(root):
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING)   # dot-prefixed tmp files are ignored
+
+
+def scan_metric(root, metric, frequency=None):
+    """One metric for every symbol -> DataFrame(frequency, symbol, section, period, value)."""
+    flt = ds.field("metric") == metric
+    if frequency:
+        flt &= ds.field("frequency") == frequency
+    table = dataset(root).to_table(columns=["frequency", "symbol", "section", "period", "value"], filter=flt)
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python -m src.common.parquet_out METRIC [parquet root]")
+    root = sys.argv[2] if len(sys.argv) > 2 else Path(os.getenv("FINJSON_ROOT", "./financials_json")) / "parquet"
+    print(scan_metric(root, sys.argv[1]).to_string(index=False))
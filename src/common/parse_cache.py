@@ -0,0 +1,134 @@
+"""On-disk cache of shaped candidate tables per netdump capture.
+
+Entries are keyed by sha256(capture bytes) + extractor name/version, so a
+byte-identical capture seen on a later run skips decoding, BeautifulSoup and
+header detection. Storage is a single SQLite file, evicted least-recently-used
+once it grows past `max_bytes`.
+
+    python -m src.common.parse_cache [cache.sqlite]   # lifetime stats
+"""
+import hashlib, json, os, sqlite3, sys, time
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("FINJSON_PARSE_CACHE_MB", "256")) * 1024 * 1024)
+ENABLED = os.getenv("FINJSON_PARSE_CACHE", "1") != "0"
+
+
+def cache_path(root):
+    return Path(root) / "cache" / "parse_cache.sqlite"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode_shaped(shaped):
+    # rows as (key, value) pairs: keeps non-str header keys intact through JSON
+    return json.dumps([[[list(r.items()) for r in table], list(date_cols)] for table, date_cols in shaped])
+
+
+def decode_shaped(blob):
+    return [([dict(r) for r in table], date_cols) for table, date_cols in json.loads(blob)]
+
+
+class ParseCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.bytes_saved = 0
+        self.used = {}   # key -> last_used of hits, written in close(): a hit takes no write lock
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.db.commit()
+
+    @staticmethod
+    def key(digest, extractor, version):
+        return f"{extractor}/{version}/{digest}"
+
+    def get(self, key, src_bytes=0):
+        """Shaped tables for `key`, or None. `src_bytes` is credited to bytes_saved on a hit."""
+        row = self.db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_saved += src_bytes
+        self.used[key] = time.time()
+        return decode_shaped(row[0])
+
+    def put(self, key, shaped):
+        blob = encode_shaped(shaped)
+        self.db.execute("INSERT OR REPLACE INTO entries(key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                        (key, blob, len(blob), time.time()))
+        self.db.commit()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache is back under max_bytes."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        dropped = 0
+        for key, size in self.db.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes * 0.9:
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            dropped += 1
+        self.db.commit()
+        return dropped
+
+    def stats(self):
+        entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved,
+                "entries": entries, "size_bytes": size}
+
+    def close(self):
+        if self.used:
+            self.db.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                [(t, key) for key, t in self.used.items()])
+            self.used.clear()
+        self.evict()
+        for name in ("hits", "misses", "bytes_saved"):
+            self.db.execute("INSERT INTO counters(name, value) VALUES (?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                            (name, getattr(self, name)))
+        self.db.commit()
+        self.db.close()
+
+
+def open_cache(root):
+    """ParseCache under <root>/cache/, or None when FINJSON_PARSE_CACHE=0."""
+    return ParseCache(cache_path(root)) if ENABLED else None
+
+
+def shaped_or_parse(cache, data, extractor, version, parse):
+    """Cached shaped tables for capture bytes `data`, else parse() and store the result."""
+    if cache is None:
+        return parse()
+    key = cache.key(content_hash(data), extractor, version)
+    shaped = cache.get(key, len(data))
+    if shaped is None:
+        shaped = parse()
+        cache.put(key, shaped)
+    return shaped
+
+
+def format_stats(st):
+    return (f"hits={st['hits']} misses={st['misses']} saved={st['bytes_saved'] / 1e6:.1f}MB "
+            f"entries={st['entries']} size={st['size_bytes'] / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else cache_path(os.getenv("FINJSON_ROOT", "./financials_json"))
+    if not path.exists():
+        raise SystemExit(f"No cache at {path}")
+    db = sqlite3.connect(path)
+    entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+    life = dict(db.execute("SELECT name, value FROM counters").fetchall())
+    print(format_stats({"hits": life.get("hits", 0), "misses": life.get("misses", 0),
+                        "bytes_saved": life.get("bytes_saved", 0), "entries": entries, "size_bytes": size}))
@@ -0,0 +1,127 @@
+"""Cheap byte-level pre-screen of netdump captures, run before any decoding/parsing.
+
+A capture can only yield a candidate table if it has at least two year
+tokens (every date header rule contains a 4-digit 19xx/20xx year) plus a
+table marker: `<table` for .html/.txt bodies, and for .json a `[{` / `[[`
+array or a "columns"/"headers"/"dates" key. Files are memory-mapped and
+scanned with bytes regexes, so rejected ones never reach BeautifulSoup or
+json.loads. When netdump/index.csv lists a capture's MIME type as a script,
+stylesheet, font or media, the file is not even opened.
+
+Years written in Arabic-Indic digits (raw UTF-8 or \\u escapes) count as
+well, since the header classifier accepts any Unicode digit.
+
+Captures kept in the compressed blob store (src.common.blobstore) are
+scanned chunk by chunk off the decompressing stream instead of mmap'd.
+
+Disable with FINJSON_PRESCREEN=0.
+"""
+import mmap, os, re
+from pathlib import Path
+
+from src.common.io_utils import read_index
+
+ENABLED = os.getenv("FINJSON_PRESCREEN", "1") != "0"
+
+NON_TABLE_MIME = re.compile(r"javascript|ecmascript|css|font|image/|audio/|video/", re.I)
+
+
+def _year_pattern():
+    alts = [rb"(?:19|20)[0-9]{2}"]
+    for zero in (0x0660, 0x06F0):   # Arabic-Indic, Extended Arabic-Indic digits
+        for enc in (lambda c: re.escape(c.encode("utf-8")),
+                    lambda c: re.escape(f"\\u{ord(c):04x}".encode())):
+            d = [enc(chr(zero + i)) for i in range(10)]
+            digit = b"(?:" + b"|".join(d) + b")"
+            alts.append(b"(?:" + d[1] + d[9] + b"|" + d[2] + d[0] + b")" + digit + digit)
+    return re.compile(b"|".join(alts), re.I)
+
+RE_YEAR_TOKEN = _year_pattern()
+RE_HTML_TABLE = re.compile(rb"<(?:[\w-]+:)?table\b", re.I)
+RE_JSON_TABLE = re.compile(rb'\[\s*[\[{]|"(?:columns|headers|dates|Dates)"\s*:')
+
+
+def load_index(netdump):
+    """{file name: mime} from the folder's index.csv (see io_utils.read_index)."""
+    return {name: row.get("mime") or "" for name, row in read_index(netdump).items()}
+
+
+def has_candidate_bytes(buf, suffix):
+    """Table marker + two year tokens in a bytes-like capture body."""
+    marker = RE_JSON_TABLE if suffix == ".json" else RE_HTML_TABLE
+    if not marker.search(buf):
+        return False
+    years = RE_YEAR_TOKEN.finditer(buf)
+    return next(years, None) is not None and next(years, None) is not None
+
+
+STREAM_CHUNK = 1 << 20
+STREAM_OVERLAP = 256   # re-scanned across chunk borders; longer than any token
+
+
+def scan_stream(f, suffix, chunk=STREAM_CHUNK):
+    """has_candidate_bytes() over a binary stream -> (verdict, bytes read).
+    Stops reading as soon as the verdict is True. Tokens are counted by offset,
+    so one seen twice in the overlap counts once; odd digit runs at a chunk
+    border can only tip the verdict towards keeping the capture."""
+    marker = RE_JSON_TABLE if suffix == ".json" else RE_HTML_TABLE
+    found_marker, years = False, set()
+    tail, offset = b"", 0
+    while True:
+        block = f.read(chunk)
+        if not block:
+            return False, offset
+        buf = tail + block
+        base = offset - len(tail)
+        found_marker = found_marker or marker.search(buf) is not None
+        years.update(base + m.start() for m in RE_YEAR_TOKEN.finditer(buf))
+        offset += len(block)
+        if found_marker and len(years) >= 2:
+            return True, offset
+        tail = buf[-STREAM_OVERLAP:]
+
+
+class Prescreen:
+    def __init__(self, netdump):
+        self.mime = load_index(netdump)
+        self.scanned = self.skipped_meta = self.skipped_scan = self.bytes_skipped = 0
+
+    def keep(self, path) -> bool:
+        """False when `path` (a capture file, or a blobstore.Blob) cannot hold a candidate table."""
+        self.scanned += 1
+        if NON_TABLE_MIME.search(self.mime.get(path.name, "")):
+            self.skipped_meta += 1
+            self.bytes_skipped += path.stat().st_size
+            return False
+        if not isinstance(path, Path):
+            with path.open() as f:
+                keep, size = scan_stream(f, path.suffix.lower())
+            if not keep:
+                self.skipped_scan += 1
+                self.bytes_skipped += size
+            return keep
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    if has_candidate_bytes(buf, path.suffix.lower()):
+                        return True
+        self.skipped_scan += 1
+        self.bytes_skipped += size
+        return False
+
+    def stats(self):
+        skipped = self.skipped_meta + self.skipped_scan
+        return {"scanned": self.scanned, "skipped": skipped, "skipped_meta": self.skipped_meta,
+                "skipped_scan": self.skipped_scan, "bytes_skipped": self.bytes_skipped,
+                "skip_ratio": round(skipped / self.scanned, 3) if self.scanned else 0.0}
+
+
+def open_prescreen(netdump):
+    """Prescreen for one netdump folder, or None when FINJSON_PRESCREEN=0."""
+    return Prescreen(netdump) if ENABLED else None
+
+
+def format_stats(st):
+    return (f"scanned={st['scanned']} skipped={st['skipped']} ({st['skip_ratio']:.0%}; "
+            f"index={st['skipped_meta']} bytes={st['skipped_scan']}) saved={st['bytes_skipped'] / 1e6:.1f}MB")
@@ -0,0 +1,145 @@
+"""Metric label -> statement section, shared by the extractors' to_json().
+
+The rule is the one annual.py and Quaterly.py applied per row. On the
+lowercased label, the first section with any keyword occurring as a
+substring wins, in the order Balance Sheet, Statement Of Income, Cash Flows.
+Otherwise the label has no section and the row is dropped. All keywords sit
+in one compiled pattern: a zero-width lookahead tries every position with
+the alternatives listed in section order, so the best section found over
+all positions is the one the per-section any() scans returned.
+
+The same few hundred labels repeat across every issuer, so answers are
+memoised. The memo is also kept in <root>/cache/metric_sections.json, so a
+label is classified once across symbols, worker processes and runs. The
+file is stamped with a hash of the keyword table and starts over when the
+table changes.
+
+Corrections go in <root>/metric_overrides.csv (FINJSON_METRIC_OVERRIDES),
+with columns label,section. A label is matched case-insensitively after
+whitespace cleanup. An empty section drops the row. Overrides are checked
+before the keywords and are never cached.
+
+    python -m src.common.sections "Total Assets" "Zakat provision"   # classify
+    python -m src.common.sections                                   # cache stats
+"""
+import csv, hashlib, json, os, re, sys
+from pathlib import Path
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+CACHE_FILE = "cache/metric_sections.json"
+OVERRIDES = "metric_overrides.csv"
+
+SECTION_KEYWORDS = (
+    ("Balance Sheet", ("equity", "assets", "liabil", "inventory", "payable", "receivable", "balance")),
+    ("Statement Of Income", ("revenue", "sales", "profit", "loss", "income", "operat", "eps", "expenses", "cost")),
+    ("Cash Flows", ("cash", "operating", "financing", "investing", "free cash")),
+)
+SECTIONS = tuple(name for name, _ in SECTION_KEYWORDS)
+RE_SECTIONS = re.compile("(?=" + "|".join(
+    f"(?P<s{i}>" + "|".join(map(re.escape, kws)) + ")" for i, (_, kws) in enumerate(SECTION_KEYWORDS)) + ")")
+VERSION = hashlib.sha1(json.dumps(SECTION_KEYWORDS).encode()).hexdigest()[:12]
+
+
+def match_section(m):
+    """Keyword rule on an already-lowercased label -> section name or None."""
+    best = len(SECTIONS)
+    for hit in RE_SECTIONS.finditer(m):
+        best = min(best, int(hit.lastgroup[1:]))
+        if best == 0:
+            break
+    return SECTIONS[best] if best < len(SECTIONS) else None
+
+
+def override_key(label):
+    return " ".join(str(label).split()).casefold()
+
+
+def load_overrides(path):
+    """{cleaned label: section or None} from the overrides CSV (empty when there is none)."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        return {override_key(row["label"]): (row.get("section") or "").strip() or None
+                for row in csv.DictReader(f) if (row.get("label") or "").strip()}
+
+
+class SectionClassifier:
+    def __init__(self, cache_path=None, overrides=None):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.overrides = overrides or {}
+        self.labels = {}   # lowercased label -> section or None
+        self.new = 0
+        self.hits = 0
+        if self.cache_path and self.cache_path.exists():
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                if data.get("version") == VERSION:
+                    self.labels = data["labels"]
+            except (ValueError, KeyError):
+                pass   # unreadable cache: start over
+
+    def __call__(self, metric):
+        if self.overrides:
+            key = override_key(metric or "")
+            if key in self.overrides:
+                return self.overrides[key]
+        m = (metric or "").lower()
+        try:
+            section = self.labels[m]
+            self.hits += 1
+            return section
+        except KeyError:
+            section = self.labels[m] = match_section(m)
+            self.new += 1
+            return section
+
+    def save(self):
+        """Merge new labels into the cache file (other processes may have added theirs)."""
+        if not (self.cache_path and self.new):
+            return
+        labels = {}
+        if self.cache_path.exists():
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                if data.get("version") == VERSION:
+                    labels = data["labels"]
+            except (ValueError, KeyError):
+                pass
+        labels.update(self.labels)
+        self.labels = labels
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": VERSION, "labels": labels}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+        self.new = 0
+
+    def stats(self):
+        return {"labels": len(self.labels), "new": self.new, "hits": self.hits, "overrides": len(self.overrides)}
+
+
+_shared = {}
+
+
+def classifier(root=None):
+    """The process-wide classifier for `root` (default FINJSON_ROOT)."""
+    root = Path(root or ROOT)
+    if root not in _shared:
+        overrides = load_overrides(os.getenv("FINJSON_METRIC_OVERRIDES") or root / OVERRIDES)
+        _shared[root] = SectionClassifier(root / CACHE_FILE, overrides)
+    return _shared[root]
+
+
+def infer_section(metric, root=None):
+    return classifier(root)(metric)
+
+
+def save(root=None):
+    classifier(root).save()
+
+
+if __name__ == "__main__":
+    clf = classifier()
+    for label in sys.argv[1:]:
+        print(f"{label!r}: {clf(label)}")
+    print(f"[ok] {CACHE_FILE}: {clf.stats()}")
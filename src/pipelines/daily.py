@@ -0,0 +1,264 @@
+"""Daily pipeline: a small dependency graph of tasks that skips unchanged work.
+
+    download_reports -> unzip_reports -> clean_transform     (-> tables/<symbol>/*.csv)
+    netdump/<symbol>/ captures -> extract -> update_sqlite
+
+Every Task names its input and output globs (relative to FINJSON_ROOT).
+When a task's dependencies are done, its inputs are fingerprinted by
+content hash and compared with the manifest of its last successful run in
+<root>/cache/pipeline_manifest.json. A file is re-hashed only when its size
+or mtime changed. If nothing changed and its outputs exist, the task is
+skipped. Otherwise a task that works per symbol is handed only the
+symbols whose inputs changed. Tasks with no inputs, such as the report
+download, always run; an unchanged download leaves everything after it
+skipped. A task that reports failed symbols ends "partial": only the inputs
+of the other symbols are recorded, so the failed ones are retried next run.
+
+Ready tasks run concurrently on threads, and each task parallelises over
+symbols itself. A task module that does not define run() yet is reported
+and skipped.
+
+    python -m src.pipelines.daily [--force] [task ...]
+"""
+import hashlib, importlib, json, os, sys, threading, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+MANIFEST = "cache/pipeline_manifest.json"
+SUMMARY = "daily_summary.json"
+WORKERS = int(os.getenv("FINJSON_DAILY_WORKERS", "2"))   # tasks in flight
+
+
+class Task:
+    """One node of the graph. `run(root, symbols)` does the work: `symbols` is None
+    for a full run, else the symbols whose inputs changed (when `symbol_of` is given)."""
+
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), symbol_of=None):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.symbol_of = symbol_of   # relative input path -> symbol
+
+
+def first_dir(rel):
+    """Symbol of <area>/<symbol>/... inputs."""
+    parts = Path(rel).parts
+    return parts[1] if len(parts) > 2 else None
+
+
+def name_prefix(rel):
+    """Symbol of <symbol>_<frequency>.json outputs."""
+    return Path(rel).name.split("_", 1)[0]
+
+
+def task_module(name):
+    """run() of src/tasks/<name>.py, or None while the module is still empty."""
+    return getattr(importlib.import_module(f"src.tasks.{name}"), "run", None)
+
+
+def run_extract(root, symbols):
+    import batch_extract   # pulls in the extractors only when there is something to extract
+    symbols = symbols or sorted(p.name for p in (root / "netdump").iterdir() if p.is_dir() and p.name != "blobs")
+    if not symbols:
+        return {"symbols": 0}
+    summary = batch_extract.run(symbols, root)
+    out = {k: summary[k] for k in ("symbols", "elapsed_s", "counts")}
+    # symbols that produced neither output (or whose worker died) are retried next run
+    out["failed"] = [r["symbol"] for r in summary["results"]
+                     if r.get("error") or not any(r.get(freq, {}).get("ok") for freq, _ in batch_extract.EXTRACTORS)]
+    return out
+
+
+def run_module(name):
+    def run(root, symbols):
+        fn = task_module(name)
+        if fn is None:
+            return {"skipped": "not implemented"}
+        return fn(symbols=symbols, root=root)
+    return run
+
+
+TASKS = [
+    Task("download_reports", run_module("download_reports"),
+         outputs=["reports/*/*"], symbol_of=first_dir),
+    Task("unzip_reports", run_module("unzip_reports"), deps=["download_reports"],
+         inputs=["reports/*/*.zip"], outputs=["reports_unzipped/*/*"], symbol_of=first_dir),
+    Task("clean_transform", run_module("clean_transform"), deps=["unzip_reports"],
+         inputs=["reports/*/*.xls*", "reports_unzipped/*/**/*"], outputs=["tables/*"], symbol_of=first_dir),
+    Task("extract", run_extract,
+         inputs=["netdump/*/*", "netdump/index.csv"], outputs=["*_annual.json", "*_quarterly.json"],
+         symbol_of=first_dir),
+    Task("update_sqlite", run_module("update_sqlite"), deps=["extract"],
+         inputs=["*_annual.json", "*_quarterly.json"], outputs=["financials.sqlite"], symbol_of=name_prefix),
+]
+
+
+class Manifest:
+    """Content hashes of task inputs, per task, as of its last successful run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        self.files = data.get("files", {})   # rel path -> [size, mtime_ns, sha256]
+        self.tasks = data.get("tasks", {})   # task -> {"inputs": {rel path: sha256}, "at": ts}
+
+    def digest(self, root, rel):
+        path = root / rel
+        st = path.stat()
+        with self.lock:
+            known = self.files.get(rel)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        with self.lock:
+            self.files[rel] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def fingerprint(self, root, globs):
+        rels = sorted({p.relative_to(root).as_posix() for g in globs for p in root.glob(g) if p.is_file()})
+        return {rel: self.digest(root, rel) for rel in rels}
+
+    def changed(self, task, inputs):
+        """Input paths added, removed or modified since the task last succeeded; None if it never did."""
+        with self.lock:
+            last = self.tasks.get(task)
+        if last is None:
+            return None
+        before = last["inputs"]
+        return {rel for rel in before.keys() | inputs.keys() if before.get(rel) != inputs.get(rel)}
+
+    def record(self, task, inputs):
+        with self.lock:
+            self.tasks[task] = {"inputs": inputs, "at": time.time()}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = json.dumps({"files": self.files, "tasks": self.tasks})
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def failed_symbols(task, root, out):
+    """Symbols a task's result lists under "failed" (symbols or input paths);
+    None when it cannot say which, e.g. a bare failure count."""
+    failed = out.get("failed")
+    if not failed:
+        return set()
+    if not isinstance(failed, list) or not task.symbol_of:
+        return None
+    symbols = set()
+    for item in failed:
+        path = Path(item)
+        if path.is_absolute():
+            if not path.is_relative_to(root):
+                return None
+            path = path.relative_to(root)
+        symbol = task.symbol_of(path.as_posix()) if len(path.parts) > 1 else path.as_posix()
+        if not symbol:
+            return None
+        symbols.add(symbol)
+    return symbols
+
+
+def has_outputs(root, task):
+    return all(next(root.glob(g), None) is not None for g in task.outputs)
+
+
+def execute(task, root, manifest, force=False):
+    """Run one task unless its inputs are unchanged; returns its result record."""
+    t0 = time.perf_counter()
+    inputs = manifest.fingerprint(root, task.inputs)
+    changed = None if force else manifest.changed(task.name, inputs)
+    res = {"task": task.name, "inputs": len(inputs)}
+    if task.inputs and changed is not None and not changed and has_outputs(root, task):
+        res.update(status="skipped", reason="inputs unchanged")
+    else:
+        symbols = None
+        if task.symbol_of and changed:
+            symbols = sorted({s for s in map(task.symbol_of, changed) if s})
+            if not symbols:   # only shared inputs (e.g. an index) changed: full run
+                symbols = None
+        res["symbols"] = "all" if symbols is None else symbols
+        try:
+            out = task.run(root, symbols) or {}
+            res.update(status="skipped" if out.get("skipped") else "ok", result=out)
+            if res["status"] == "ok":
+                failed = failed_symbols(task, root, out)
+                if failed:
+                    res.update(status="partial", failed=sorted(failed))
+                    inputs = {rel: h for rel, h in inputs.items() if task.symbol_of(rel) not in failed}
+                if failed is None:
+                    res["status"] = "partial"   # unknown which symbols failed: rerun everything
+                else:
+                    # inputs as they were when the run started: later edits are picked up next time
+                    manifest.record(task.name, inputs)
+        except Exception as e:
+            res.update(status="failed", error=f"{type(e).__name__}: {e}")
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res
+
+
+def run(root=ROOT, tasks=TASKS, only=None, force=False, workers=WORKERS):
+    """Run the graph (or just the `only` task names, dependencies taken as done)."""
+    t0 = time.perf_counter()
+    manifest = Manifest(root / MANIFEST)
+    todo = {t.name: t for t in tasks if not only or t.name in only}
+    done, results, running = set(), {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while todo or running:
+            for name, task in list(todo.items()):
+                deps = [d for d in task.deps if d in todo or d in running.values() or d in results]
+                if any(results.get(d, {}).get("status") in ("failed", "blocked") for d in deps):
+                    results[name] = {"task": name, "status": "blocked"}
+                    del todo[name]
+                elif all(d in done for d in deps):
+                    running[pool.submit(execute, task, root, manifest, force)] = name
+                    del todo[name]
+            if not running:
+                if todo:
+                    raise RuntimeError(f"dependency cycle among: {', '.join(sorted(todo))}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                results[name] = fut.result()
+                done.add(name)
+                manifest.save()
+                r = results[name]
+                print(f"[daily] {name}: {r['status']} ({r['seconds']}s)"
+                      + (f" {r['error']}" if r.get("error") else ""))
+    manifest.save()
+    summary = {"elapsed_s": round(time.perf_counter() - t0, 3),
+               "results": [results[t.name] for t in tasks if t.name in results]}
+    (root / SUMMARY).write_text(json.dumps(summary, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    return summary
+
+
+def main():
+    args = sys.argv[1:]
+    force = "--force" in args
+    only = {a for a in args if not a.startswith("--")} or None
+    unknown = (only or set()) - {t.name for t in TASKS}
+    if unknown:
+        raise SystemExit(f"Unknown task(s): {', '.join(sorted(unknown))}")
+    ROOT.mkdir(parents=True, exist_ok=True)
+    summary = run(only=only, force=force)
+    counts = {}
+    for r in summary["results"]:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"[ok] daily in {summary['elapsed_s']}s: " + " ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    if counts.get("failed"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Turn downloaded report workbooks and pages into long-form CSV tables.
+
+Inputs are the spreadsheets in <root>/reports/<symbol>/ and the members that
+unzip_reports extracted into <root>/reports_unzipped/<symbol>/ (anything
+unzip_reports.wanted() accepts). Each source file becomes one CSV,
+<root>/tables/<symbol>/<r|z>__<path below the symbol, "/" as "__">.csv
+(r: a download, z: an extracted member), with a row per non-empty cell:
+
+    source, sheet, table, section, metric, period, value
+
+Rows are cut the way annual.py cuts a captured table. A row with at least two
+looks_like_date_header() cells starts a table, and its first non-date column
+holds the metric. Because that rule also accepts year-like figures, a header
+row may hold no other numbers, and only rows at the top of a sheet or right
+after a blank or section row are considered. Rows with a single label become the section of the rows
+below them. Periods go through norm_date_header() and values through
+to_number().
+
+Workbooks are opened with openpyxl in read_only mode and walked row by row.
+Rows are written out every CHUNK_ROWS, so a worker's memory does not grow
+with the size of the workbook. HTML pages (including .xls files that are
+really HTML, as exchanges often serve) go through the lxml table stream.
+Legacy binary .xls workbooks have no reader here and are counted as
+unsupported. Files are spread over a process pool, largest first.
+
+    python -m src.tasks.clean_transform [symbol ...]
+"""
+import csv, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:   # Windows: no peak RSS
+    resource = None
+
+from src.common.dates import clean_text, looks_like_date_header, norm_date_header
+from src.common.numbers import BLANKS, to_number
+from src.tasks.unzip_reports import REPORTS, UNZIPPED, wanted
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+WORKERS = int(os.getenv("FINJSON_WORKERS", "0")) or os.cpu_count() or 1
+CHUNK_ROWS = int(os.getenv("FINJSON_TRANSFORM_CHUNK", "5000"))
+TABLES = "tables"
+COLUMNS = ["source", "sheet", "table", "section", "metric", "period", "value"]
+SPREADSHEET_EXT = (".xlsx", ".xlsm", ".xls")
+
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0"   # legacy .xls
+ZIP_MAGIC = b"PK\x03\x04"          # .xlsx / .xlsm
+
+
+def header_text(v):
+    """Spreadsheet header cell -> text: dates as ISO, whole-number years without ".0"."""
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.date().isoformat()
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return clean_text(v)
+
+
+class TableCutter:
+    """Feeds sheet rows through annual.py's header and cleaning rules, one row at a time."""
+
+    def __init__(self, emit):
+        self.emit = emit      # emit(table, section, metric, period, value)
+        self.header = None    # [(column, ISO period)] of the current table
+        self.metric_idx = 0
+        self.section = ""
+        self.tables = 0
+        self.armed = True     # a header may start here: top of a sheet, or after a blank / section row
+
+    def reset(self):
+        self.header = None
+        self.section = ""
+        self.armed = True
+
+    @staticmethod
+    def is_header(texts):
+        """At least two period cells, and no other cell holding a number. The year rule is
+        permissive (values like 2015 match), so a row of figures does not pass."""
+        dates = [looks_like_date_header(t) for t in texts]
+        return sum(dates) >= 2 and all(d or to_number(t) is None for d, t in zip(dates, texts))
+
+    def feed(self, cells):
+        texts = [header_text(c) for c in cells]
+        if self.armed and self.is_header(texts):
+            self.metric_idx = next((i for i, t in enumerate(texts) if not looks_like_date_header(t)), 0)
+            self.header = [(i, norm_date_header(t)) for i, t in enumerate(texts)
+                           if i != self.metric_idx and looks_like_date_header(t)]
+            self.section = ""
+            self.tables += 1
+            self.armed = False
+            return
+        filled = [t for t in texts if t not in BLANKS]
+        self.armed = not filled or (len(filled) == 1 and texts[0] not in BLANKS)
+        if self.header is None or not filled:
+            return
+        if self.armed:   # section-only row
+            self.section = texts[0]
+            return
+        metric = texts[self.metric_idx] if self.metric_idx < len(texts) else ""
+        if not metric:
+            return
+        for i, period in self.header:
+            if i < len(cells):
+                value = to_number(cells[i])
+                if value is not None:
+                    self.emit(self.tables, self.section, metric, period, value)
+
+
+class ChunkWriter:
+    """CSV rows buffered CHUNK_ROWS at a time into a temp file, renamed on close."""
+
+    def __init__(self, path, chunk=CHUNK_ROWS):
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = self.tmp.open("w", newline="", encoding="utf-8-sig")
+        self.w = csv.writer(self.f)
+        self.w.writerow(COLUMNS)
+        self.buf = []
+        self.chunk = chunk
+        self.rows = 0
+
+    def add(self, row):
+        self.buf.append(row)
+        if len(self.buf) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        self.w.writerows(self.buf)
+        self.rows += len(self.buf)
+        self.buf.clear()
+
+    def close(self, keep=True):
+        self.flush()
+        self.f.close()
+        if keep:
+            os.replace(self.tmp, self.path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+def workbook_rows(path):
+    """(sheet, row values) of every sheet, streamed."""
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            for row in ws.iter_rows(values_only=True):
+                yield ws.title, row
+    finally:
+        wb.close()
+
+
+def page_rows(path):
+    """("", row cells) of every <table> in an HTML page; a None row separates tables."""
+    from src.common.html_stream import iter_tables
+    from src.common.io_utils import decode_text
+    for tbl in iter_tables(decode_text(path.read_bytes())):
+        for tr in tbl.find_all("tr"):
+            cells = [clean_text(c.get_text()) for c in tr.find_all(["th", "td"])]
+            if cells:
+                yield "", cells
+        yield "", None
+
+
+def source_kind(path):
+    with path.open("rb") as f:
+        head = f.read(512)
+    if head.startswith(ZIP_MAGIC):
+        return "workbook"
+    if head.startswith(OLE2_MAGIC):
+        return "unsupported"
+    if head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<") or b"<table" in head.lower():
+        return "html"
+    return "unsupported"
+
+
+def cut_file(src, dest, source, kind):
+    """Stream one workbook or page through TableCutter into `dest`; returns its counts."""
+    rows = workbook_rows(src) if kind == "workbook" else page_rows(src)
+    out = ChunkWriter(dest)
+    sheet = None
+    cutter = TableCutter(lambda t, sec, m, p, v: out.add((source, sheet, t, sec, m, p, v)))
+    ok = False
+    try:
+        for name, cells in rows:
+            if cells is None or name != sheet:   # a new sheet or page table starts afresh
+                sheet = name
+                cutter.reset()
+            if cells is not None:
+                cutter.feed(cells)
+        ok = True
+    finally:
+        out.close(keep=ok and out.rows + len(out.buf) > 0)
+    return {"tables": cutter.tables, "rows": out.rows}
+
+
+def transform_file(src, dest, source):
+    """Worker: one source file -> one CSV; never raises."""
+    t0 = time.perf_counter()
+    res = {"source": source, "rows": 0, "tables": 0}
+    try:
+        kind = source_kind(src)
+        res["kind"] = kind
+        if kind != "unsupported":
+            res.update(cut_file(src, dest, source, kind))
+        res["ok"] = True
+    except Exception as e:
+        res.update(ok=False, error=f"{type(e).__name__}: {e}")
+    res["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res
+
+
+def find_sources(root=ROOT, symbols=None):
+    """[(symbol, path)] of the spreadsheets and extracted members of `symbols`."""
+    root = Path(root)
+    out = []
+    for path in sorted((root / REPORTS).glob("*/*")):
+        if path.is_file() and path.name.lower().endswith(SPREADSHEET_EXT):
+            out.append((path.parent.name, path))
+    for path in sorted((root / UNZIPPED).glob("*/**/*")):
+        if path.is_file() and not path.name.startswith(".") and wanted(path.name):
+            out.append((path.relative_to(root / UNZIPPED).parts[0], path))
+    return [(s, p) for s, p in out if symbols is None or s in symbols]
+
+
+def output_path(root, symbol, path):
+    rel = path.relative_to(root)
+    rel = Path(*rel.parts[2:])   # drop <area>/<symbol>
+    area = "z" if path.is_relative_to(root / UNZIPPED) else "r"
+    return root / TABLES / symbol / f"{area}__{'__'.join(rel.with_suffix('').parts)}.csv"
+
+
+def run(symbols=None, root=ROOT, workers=WORKERS):
+    """Transform the sources of `symbols` (default: all); returns the totals."""
+    t0 = time.perf_counter()
+    root = Path(root)
+    sources = find_sources(root, set(symbols) if symbols else None)
+    sources.sort(key=lambda sp: sp[1].stat().st_size, reverse=True)   # big files first
+    totals = {"files": len(sources), "rows": 0, "tables": 0, "unsupported": 0, "removed": 0,
+              "peak_rss_mb": None, "failed": []}
+    written = set()
+    if sources:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(sources)))) as pool:
+            futs = {}
+            for symbol, path in sources:
+                dest = output_path(root, symbol, path)
+                futs[pool.submit(transform_file, path, dest, path.relative_to(root).as_posix())] = dest
+            for fut in as_completed(futs):
+                try:
+                    res = fut.result()
+                except Exception as e:   # worker died
+                    res = {"source": str(futs[fut]), "ok": False, "error": f"{type(e).__name__}: {e}"}
+                if not res.get("ok"):
+                    print(f"[warn] transform: {res['source']}: {res['error']}")
+                    totals["failed"].append(res["source"])
+                    written.add(futs[fut])   # keep the last good output
+                    continue
+                if res["kind"] == "unsupported":
+                    totals["unsupported"] += 1
+                totals["rows"] += res["rows"]
+                totals["tables"] += res["tables"]
+                if res["peak_rss_mb"] is not None:
+                    totals["peak_rss_mb"] = max(totals["peak_rss_mb"] or 0.0, res["peak_rss_mb"])
+                if res["rows"]:
+                    written.add(futs[fut])
+    # outputs of sources that are gone (or no longer yield rows) for the symbols just processed
+    done = {s for s, _ in sources} | set(symbols or ())
+    for symbol in done:
+        for old in (root / TABLES / symbol).glob("*.csv"):
+            if old not in written:
+                old.unlink()
+                totals["removed"] += 1
+    totals["seconds"] = round(time.perf_counter() - t0, 3)
+    return totals
+
+
+def format_stats(st):
+    return (f"files={st['files']} tables={st['tables']} rows={st['rows']} unsupported={st['unsupported']} "
+            f"removed={st['removed']} failed={len(st['failed'])} peak_rss={st['peak_rss_mb'] if st['peak_rss_mb'] is not None else '-'}MB ({st['seconds']}s)")
+
+
+if __name__ == "__main__":
+    totals = run(sys.argv[1:] or None)
+    print("[ok] transform", format_stats(totals))
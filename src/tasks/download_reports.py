@@ -0,0 +1,251 @@
+"""Download issuer financial report files (XLSX/XLS/ZIP/PDF) for every symbol.
+
+Report links come from <root>/report_links.csv (columns symbol,url; optional)
+plus every report URL found in the symbol's netdump captures (absolute URLs,
+and hrefs resolved against the capture's own URL from index.csv). Files land
+in <root>/reports/<symbol>/.
+
+Downloads run on a thread pool. Each host has a concurrency cap and a token
+bucket (FINJSON_DL_RATE requests/s, FINJSON_DL_BURST burst). Bodies are
+streamed to <file>.part in chunks and renamed when complete. A .part
+interrupted mid-transfer is resumed with a Range request, guarded by If-Range
+and the validators kept in its .part.json sidecar. A file already on disk is
+re-requested conditionally (If-None-Match / If-Modified-Since), and a 304
+leaves it untouched.
+
+    python -m src.tasks.download_reports [symbol ...]
+"""
+import csv, hashlib, json, os, re, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.common.blobstore import captures
+from src.common.io_utils import decode_text, read_index
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+WORKERS = int(os.getenv("FINJSON_DL_WORKERS", "8"))
+PER_HOST = int(os.getenv("FINJSON_DL_PER_HOST", "4"))          # downloads in flight per host
+RATE = float(os.getenv("FINJSON_DL_RATE", "5"))                # requests/s per host
+BURST = int(os.getenv("FINJSON_DL_BURST", "10"))
+TIMEOUT = float(os.getenv("FINJSON_DL_TIMEOUT", "60"))
+CHUNK = 1 << 16
+LINKS_CSV = "report_links.csv"
+REPORTS = "reports"
+STATE = "cache/download_state.json"    # url -> {"etag", "last_modified", "file"}
+
+REPORT_EXT = ("xlsx", "xls", "zip", "pdf")
+RE_REPORT_URL = re.compile(r"""https?://[^\s"'<>\\]+?\.(?:%s)(?![\w.])""" % "|".join(REPORT_EXT), re.I)
+RE_REPORT_HREF = re.compile(r"""href\s*=\s*["']([^"'#]+?\.(?:%s))["']""" % "|".join(REPORT_EXT), re.I)
+
+
+class TokenBucket:
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.t = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Block until one request may start."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimits:
+    """Per-host concurrency cap + token bucket."""
+
+    def __init__(self, per_host=PER_HOST, rate=RATE, burst=BURST):
+        self.per_host, self.rate, self.burst = per_host, rate, burst
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def __call__(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = (threading.BoundedSemaphore(self.per_host), TokenBucket(self.rate, self.burst))
+            return self.hosts[host]
+
+
+def capture_links(netdump):
+    """Report URLs mentioned in one symbol's captures."""
+    index = read_index(netdump)
+    urls = []
+    for cap in captures(netdump):
+        text = decode_text(cap.read_bytes())
+        urls += RE_REPORT_URL.findall(text)
+        base = (index.get(cap.name) or {}).get("url")
+        if base:
+            urls += [urljoin(base, href) for href in RE_REPORT_HREF.findall(text)]
+    return urls
+
+
+def report_links(root=ROOT, symbols=None):
+    """{symbol: [url, ...]} from report_links.csv and the netdump captures, de-duplicated in order."""
+    links = {}
+
+    def add(symbol, url):
+        if symbols is None or symbol in symbols:
+            urls = links.setdefault(symbol, [])
+            if url not in urls:
+                urls.append(url)
+
+    path = root / LINKS_CSV
+    if path.exists():
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                if row.get("symbol") and row.get("url"):
+                    add(row["symbol"].strip(), row["url"].strip())
+    netdump = root / "netdump"
+    if netdump.is_dir():
+        for folder in sorted(p for p in netdump.iterdir() if p.is_dir() and p.name != "blobs"):
+            if symbols is None or folder.name in symbols:
+                for url in capture_links(folder):
+                    add(folder.name, url)
+    return links
+
+
+def file_names(urls):
+    """{url: file name}: the URL's basename, prefixed with a short URL hash when two collide."""
+    base = {u: unquote(Path(urlsplit(u).path).name) or "report" for u in urls}
+    counts = {}
+    for name in base.values():
+        counts[name] = counts.get(name, 0) + 1
+    return {u: n if counts[n] == 1 else f"{hashlib.sha1(u.encode()).hexdigest()[:8]}_{n}" for u, n in base.items()}
+
+
+def validators(r):
+    return {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+
+
+def download(session, url, dest, known, limits):
+    """Fetch one file into `dest`; never leaves a half-written `dest`.
+    Returns {"status": fetched|resumed|unchanged, "fetched": bytes, "skipped": bytes, "validators"}."""
+    part = dest.with_name(dest.name + ".part")
+    sidecar = dest.with_name(dest.name + ".part.json")
+    headers, have = {}, 0
+    resume = json.loads(sidecar.read_text(encoding="utf-8")) if part.exists() and sidecar.exists() else None
+    if resume and (resume.get("etag") or resume.get("last_modified")):
+        have = part.stat().st_size
+        headers["Range"] = f"bytes={have}-"
+        headers["If-Range"] = resume.get("etag") or resume["last_modified"]
+    elif dest.exists() and known:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    sem, bucket = limits(url)
+    with sem:
+        while True:
+            bucket.take()
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+                if r.status_code == 304:
+                    return {"status": "unchanged", "fetched": 0, "skipped": dest.stat().st_size, "validators": known}
+                if r.status_code == 206:
+                    if "Range" not in headers:
+                        raise requests.HTTPError("HTTP 206 without a Range request")
+                    if not r.headers.get("Content-Range", "").startswith(f"bytes {have}-"):
+                        # not the range we asked for: a failed resume, start over with the whole file
+                        part.unlink(missing_ok=True)
+                        sidecar.unlink(missing_ok=True)
+                        headers, have = {}, 0
+                        continue
+                    mode, status = "ab", "resumed"
+                elif r.ok:
+                    mode, status, have = "wb", "fetched", 0   # full body: the file changed, or no range support
+                else:
+                    raise requests.HTTPError(f"HTTP {r.status_code}")
+                val = validators(r)
+                sidecar.write_text(json.dumps(val), encoding="utf-8")
+                expected = r.headers.get("Content-Length")
+                fetched = 0
+                with part.open(mode) as f:
+                    for chunk in r.iter_content(CHUNK):
+                        f.write(chunk)
+                        fetched += len(chunk)
+                if r.headers.get("Content-Encoding") in (None, "identity") and expected and fetched != int(expected):
+                    raise IOError(f"short body: {fetched} of {expected} bytes (kept for resume)")
+            break
+    os.replace(part, dest)
+    sidecar.unlink(missing_ok=True)
+    return {"status": status, "fetched": fetched, "skipped": have, "validators": val}
+
+
+def make_session(workers=WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def run(symbols=None, root=ROOT, workers=WORKERS, limits=None):
+    """Download every report of `symbols` (default: all with links); returns the stats."""
+    t0 = time.perf_counter()
+    root = Path(root)
+    state_path = root / STATE
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+    limits = limits or HostLimits()
+    jobs = []
+    for symbol, urls in report_links(root, set(symbols) if symbols else None).items():
+        folder = root / REPORTS / symbol
+        folder.mkdir(parents=True, exist_ok=True)
+        jobs += [(symbol, url, folder / name) for url, name in file_names(urls).items()]
+
+    stats = {"files": len(jobs), "fetched": 0, "resumed": 0, "unchanged": 0, "failed_count": 0,
+             "failed": [], "bytes_fetched": 0, "bytes_skipped": 0, "errors": []}   # failed: reports/<symbol>/<file>
+    lock = threading.Lock()
+
+    with make_session(workers) as session:
+        def one(job):
+            symbol, url, dest = job
+            try:
+                res = download(session, url, dest, state.get(url), limits)
+            except Exception as e:
+                with lock:
+                    stats["failed_count"] += 1
+                    stats["failed"].append(dest.relative_to(root).as_posix())
+                    stats["errors"].append(f"{symbol} {url}: {type(e).__name__}: {e}")
+                return
+            with lock:
+                stats[res["status"]] += 1
+                stats["bytes_fetched"] += res["fetched"]
+                stats["bytes_skipped"] += res["skipped"]
+                state[url] = {**(res["validators"] or {}), "file": dest.relative_to(root).as_posix()}
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(one, jobs))
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 3)
+    stats["mb_per_s"] = round(stats["bytes_fetched"] / 1e6 / elapsed, 3) if elapsed else 0.0
+    return stats
+
+
+def format_stats(st):
+    return (f"files={st['files']} fetched={st['fetched']} resumed={st['resumed']} unchanged={st['unchanged']} "
+            f"failed={st['failed_count']} got={st['bytes_fetched'] / 1e6:.1f}MB skipped={st['bytes_skipped'] / 1e6:.1f}MB "
+            f"({st['mb_per_s']}MB/s, {st['seconds']}s)")
+
+
+if __name__ == "__main__":
+    stats = run(sys.argv[1:] or None)
+    for err in stats["errors"]:
+        print("[warn]", err)
+    print("[ok] download", format_stats(stats))
@@ -0,0 +1,161 @@
+"""Extract the downloaded report archives for clean_transform.
+
+Every <root>/reports/<symbol>/<name>.zip is unpacked into
+<root>/reports_unzipped/<symbol>/<name>/, keeping the member paths. Only
+members that wanted() accepts are written (spreadsheets and HTML pages by
+default, see MEMBER_EXT). Everything else in an archive, such as PDFs and
+images, never reaches clean_transform.
+
+Members are streamed to disk in CHUNK-sized pieces through a temp file that
+is renamed when complete. zipfile checks each member's CRC while it is read.
+A member whose CRC and size match what is already on disk is skipped. The
+CRC of each extracted file is kept in <root>/cache/unzip/<symbol>/<name>.json
+with its size and mtime, so an unchanged file is matched from its stat alone
+and is not read again. Files that an archive no longer contains are removed
+from its folder. Archives are spread over a process pool.
+
+    python -m src.tasks.unzip_reports [symbol ...]
+"""
+import json, os, sys, time, zipfile, zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+WORKERS = int(os.getenv("FINJSON_WORKERS", "0")) or os.cpu_count() or 1
+CHUNK = 1 << 20
+REPORTS = "reports"
+UNZIPPED = "reports_unzipped"
+STATE_DIR = "cache/unzip"
+MEMBER_EXT = (".xlsx", ".xlsm", ".xls", ".htm", ".html")
+
+
+def wanted(name, extensions=MEMBER_EXT):
+    """True for archive members clean_transform can read."""
+    return name.lower().endswith(extensions)
+
+
+def member_path(name):
+    """Relative output path of a member, or None for a directory or an unsafe name (absolute, ..)."""
+    p = PurePosixPath(name.replace("\\", "/"))
+    if name.endswith("/") or p.is_absolute() or ".." in p.parts or not p.parts:
+        return None
+    return Path(*p.parts)
+
+
+def file_crc(path):
+    crc = 0
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def is_current(dest, info, known):
+    """True if `dest` already holds this member: same size, and the same CRC (from the
+    state file when size and mtime are unchanged, otherwise recomputed from disk)."""
+    try:
+        st = dest.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != info.file_size:
+        return False
+    if known and known[1] == st.st_size and known[2] == st.st_mtime_ns:
+        return known[0] == info.CRC
+    return file_crc(dest) == info.CRC
+
+
+def extract_archive(archive, out_dir, state_path, extensions=MEMBER_EXT):
+    """Worker: unpack the wanted members of one archive; never raises."""
+    t0 = time.perf_counter()
+    res = {"archive": str(archive), "members": 0, "extracted": 0, "skipped": 0, "filtered": 0,
+           "removed": 0, "bytes_written": 0}
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        new_state = {}
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                rel = member_path(info.filename)
+                if rel is None:
+                    continue
+                res["members"] += 1
+                if not wanted(info.filename, extensions):
+                    res["filtered"] += 1
+                    continue
+                key = rel.as_posix()
+                dest = out_dir / rel
+                if is_current(dest, info, state.get(key)):
+                    res["skipped"] += 1
+                else:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+                    try:
+                        with zf.open(info) as src, tmp.open("wb") as f:
+                            for block in iter(lambda: src.read(CHUNK), b""):
+                                f.write(block)
+                        os.replace(tmp, dest)
+                    finally:
+                        tmp.unlink(missing_ok=True)   # left over only when the copy failed (e.g. bad CRC)
+                    res["extracted"] += 1
+                    res["bytes_written"] += info.file_size
+                st = dest.stat()
+                new_state[key] = [info.CRC, st.st_size, st.st_mtime_ns]
+        for key in state.keys() - new_state.keys():
+            stale = out_dir / key
+            if stale.exists():
+                stale.unlink()
+                res["removed"] += 1
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(new_state), encoding="utf-8")
+        res["ok"] = True
+    except Exception as e:
+        res.update(ok=False, error=f"{type(e).__name__}: {e}")
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res
+
+
+def find_archives(root=ROOT, symbols=None):
+    """[(symbol, archive path)] under <root>/reports."""
+    out = []
+    for path in sorted((Path(root) / REPORTS).glob("*/*.zip")):
+        symbol = path.parent.name
+        if symbols is None or symbol in symbols:
+            out.append((symbol, path))
+    return out
+
+
+def run(symbols=None, root=ROOT, workers=WORKERS, extensions=MEMBER_EXT):
+    """Unpack the archives of `symbols` (default: all) over `workers` processes; returns the totals."""
+    t0 = time.perf_counter()
+    root = Path(root)
+    archives = find_archives(root, set(symbols) if symbols else None)
+    totals = {"archives": len(archives), "members": 0, "extracted": 0, "skipped": 0, "filtered": 0,
+              "removed": 0, "bytes_written": 0, "failed": []}
+    if archives:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(archives)))) as pool:
+            futs = {pool.submit(extract_archive, path, root / UNZIPPED / symbol / path.stem,
+                                root / STATE_DIR / symbol / f"{path.stem}.json", extensions): path
+                    for symbol, path in archives}
+            for fut in as_completed(futs):
+                try:
+                    res = fut.result()
+                except Exception as e:   # worker died
+                    res = {"archive": str(futs[fut]), "ok": False, "error": f"{type(e).__name__}: {e}"}
+                if not res.get("ok"):
+                    print(f"[warn] unzip: {res['archive']}: {res['error']}")
+                    totals["failed"].append(res["archive"])
+                    continue
+                for k in ("members", "extracted", "skipped", "filtered", "removed", "bytes_written"):
+                    totals[k] += res[k]
+    totals["seconds"] = round(time.perf_counter() - t0, 3)
+    return totals
+
+
+def format_stats(st):
+    return (f"archives={st['archives']} members={st['members']} extracted={st['extracted']} "
+            f"skipped={st['skipped']} filtered={st['filtered']} removed={st['removed']} "
+            f"written={st['bytes_written'] / 1e6:.1f}MB failed={len(st['failed'])} ({st['seconds']}s)")
+
+
+if __name__ == "__main__":
+    totals = run(sys.argv[1:] or None)
+    print("[ok] unzip", format_stats(totals))
@@ -0,0 +1,153 @@
+"""Long-form SQLite store of the extracted financials.
+
+Loads every <symbol>_annual.json / <symbol>_quarterly.json under FINJSON_ROOT
+into one table, a row per (symbol, frequency, section, metric, period):
+
+    financials(symbol, frequency, section, metric, period, value, updated_at)
+
+Rows are upserted on a unique index over that key with one executemany per
+symbol, inside that symbol's transaction. The symbol's stored values are read
+first and only new or changed rows are sent, so re-loading unchanged outputs
+writes nothing. Stored rows of a loaded (symbol, frequency) that the new
+output no longer has are deleted in the same transaction, so the store never
+mixes rows from two different source tables. The (metric, period) and (symbol, period) indexes serve
+cross-sectional queries such as one metric for every symbol on a date.
+Periods are the extractors' ISO date headers, values their cleaned numbers
+(empty cells are not stored).
+
+    python -m src.tasks.update_sqlite [symbol ...]
+"""
+import json, os, sqlite3, sys, time
+from pathlib import Path
+
+ROOT = Path(os.getenv("FINJSON_ROOT", "./financials_json")).resolve()
+DB_FILE = "financials.sqlite"   # under root unless FINJSON_DB names the file
+FREQUENCIES = ("annual", "quarterly")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS financials (
+    symbol TEXT NOT NULL, frequency TEXT NOT NULL, section TEXT NOT NULL,
+    metric TEXT NOT NULL, period TEXT NOT NULL, value REAL NOT NULL, updated_at REAL NOT NULL);
+CREATE UNIQUE INDEX IF NOT EXISTS financials_key ON financials(symbol, frequency, section, metric, period);
+CREATE INDEX IF NOT EXISTS financials_metric_period ON financials(metric, period);
+CREATE INDEX IF NOT EXISTS financials_symbol_period ON financials(symbol, period);
+"""
+
+UPSERT = """
+INSERT INTO financials(symbol, frequency, section, metric, period, value, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(symbol, frequency, section, metric, period)
+DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+WHERE value IS NOT excluded.value
+"""
+
+MISSING = object()
+
+
+def db_path_for(root=ROOT):
+    return Path(os.getenv("FINJSON_DB") or Path(root) / DB_FILE)
+
+
+def connect(path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def long_rows(js):
+    """{(section, metric, period): value} of one extractor output."""
+    out = {}
+    for section, items in (js.get("sections") or {}).items():
+        for item in items:
+            metric = item.get("metric")
+            if not metric:
+                continue
+            for period, value in (item.get("values") or {}).items():
+                if value is not None:
+                    out[(section, metric, period)] = float(value)
+    return out
+
+
+def upsert_symbol(db, symbol, outputs):
+    """Load one symbol's {frequency: extractor JSON} in a single transaction.
+    Returns {"inserted": n, "updated": n, "unchanged": n, "deleted": n}."""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    now = time.time()
+    with db:
+        stored = {(f, s, m, p): v for f, s, m, p, v in db.execute(
+            "SELECT frequency, section, metric, period, value FROM financials WHERE symbol = ?", (symbol,))}
+        batch = []
+        fresh = set()
+        for freq, js in outputs.items():
+            for (section, metric, period), value in long_rows(js).items():
+                key = (freq, section, metric, period)
+                fresh.add(key)
+                old = stored.get(key, MISSING)
+                if old is MISSING:
+                    counts["inserted"] += 1
+                elif old == value:
+                    counts["unchanged"] += 1
+                    continue
+                else:
+                    counts["updated"] += 1
+                batch.append((symbol, *key, value, now))
+        if batch:
+            db.executemany(UPSERT, batch)
+        gone = [(symbol, *key) for key in stored if key[0] in outputs and key not in fresh]
+        if gone:
+            db.executemany("DELETE FROM financials WHERE symbol = ? AND frequency = ? AND section = ? "
+                           "AND metric = ? AND period = ?", gone)
+            counts["deleted"] = len(gone)
+    return counts
+
+
+def find_outputs(root=ROOT, symbols=None):
+    """{symbol: {frequency: path}} of the extractor outputs in root."""
+    found = {}
+    for freq in FREQUENCIES:
+        suffix = f"_{freq}.json"
+        for path in sorted(Path(root).glob(f"*{suffix}")):
+            symbol = path.name[:-len(suffix)]
+            if symbols is None or symbol in symbols:
+                found.setdefault(symbol, {})[freq] = path
+    return found
+
+
+def run(symbols=None, root=ROOT, db_path=None):
+    """Load the outputs of `symbols` (default: all in root) into `db_path`
+    (default: FINJSON_DB, else <root>/financials.sqlite); returns the totals."""
+    t0 = time.perf_counter()
+    db_path = Path(db_path or db_path_for(root))
+    totals = {"symbols": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "failed": [],
+              "db": str(db_path)}
+    db = connect(db_path)
+    try:
+        for symbol, paths in sorted(find_outputs(root, symbols).items()):
+            try:
+                outputs = {freq: json.loads(p.read_text(encoding="utf-8")) for freq, p in paths.items()}
+                counts = upsert_symbol(db, symbol, outputs)
+            except Exception as e:
+                print(f"[warn] sqlite: {symbol}: {type(e).__name__}: {e}")
+                totals["failed"].append(symbol)
+                continue
+            totals["symbols"] += 1
+            for k, v in counts.items():
+                totals[k] += v
+    finally:
+        db.close()
+    totals["seconds"] = round(time.perf_counter() - t0, 3)
+    return totals
+
+
+def format_stats(st):
+    return (f"symbols={st['symbols']} inserted={st['inserted']} updated={st['updated']} "
+            f"unchanged={st['unchanged']} deleted={st['deleted']} failed={len(st['failed'])} ({st['seconds']}s)")
+
+
+if __name__ == "__main__":
+    totals = run(set(sys.argv[1:]) or None)
+    print("[ok] sqlite", format_stats(totals), "->", totals["db"])
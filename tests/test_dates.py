@@ -0,0 +1,19 @@
+"""norm_date() must give what the pandas path (dayfirst=False, then True) gave."""
+import pandas as pd
+import pytest
+
+from src.common.dates import norm_date
+
+
+def baseline(s):
+    for dayfirst in (False, True):
+        dt = pd.to_datetime(s, dayfirst=dayfirst, errors="coerce")
+        if not pd.isna(dt):
+            return dt.strftime("%Y-%m-%d")
+    return s
+
+
+@pytest.mark.parametrize("s", ["2023", "20٢٣", "٢٠٢٣", "2023-03-31", "31/03/2023", "03/31/2023",
+                               "12/06/2023", "2023-02-30", "Q1 2023", "Mar 2023", "n/a"])
+def test_norm_date_matches_pandas(s):
+    assert norm_date(s) == baseline(s)
@@ -0,0 +1,112 @@
+"""download_reports against the bench's local report host: resume, 304s, a wrong 206 and the per-host cap."""
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from benchmarks.bench_download import StandIn, payload
+from src.tasks import download_reports as dl
+
+SIZE = 64 * 1024
+
+
+class WrongRange(StandIn):
+    """Answers every Range request from byte 0, as a broken cache in front of the host might."""
+
+    def serve(self):
+        if "Range" in self.headers and self.path in self.bodies:
+            body = self.bodies[self.path]
+            return self.reply(206, body, None, f"bytes 0-{len(body) - 1}/{len(body)}")
+        super().serve()
+
+
+def serve(handler):
+    StandIn.hits = {"200": 0, "206": 0, "304": 0, "404": 0}
+    StandIn.cut, StandIn.peak, StandIn.inflight = set(), 0, 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def site(tmp_path):
+    """(root, base, paths) with report_links.csv listing two files for each of three symbols."""
+    server, base = serve(StandIn)
+    paths = [f"/files/{s}/{name}" for s in ("3010", "3020", "3030") for name in ("annual.xlsx", "q1.zip")]
+    StandIn.bodies = {p: payload(p, SIZE) for p in paths}
+    with (tmp_path / dl.LINKS_CSV).open("w", encoding="utf-8") as f:
+        f.write("symbol,url\n" + "".join(f"{p.split('/')[2]},{base}{p}\n" for p in paths))
+    yield tmp_path, base, paths
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(root, per_host=4):
+    before = dict(StandIn.hits)
+    stats = dl.run(root=root, workers=4, limits=dl.HostLimits(per_host=per_host, rate=2000, burst=50))
+    return stats, {k: StandIn.hits[k] - before[k] for k in before}
+
+
+def on_disk(root, path):
+    return (root / "reports" / path.split("/", 2)[2]).read_bytes()
+
+
+def test_cut_body_fails_then_resumes_with_a_range(site):
+    root, _, paths = site
+    StandIn.cut = {paths[1]}
+    stats, _ = fetch(root)
+    assert stats["failed_count"] == 1
+    assert stats["failed"] == ["reports/" + paths[1].split("/", 2)[2]]
+    assert (root / "reports" / "3010" / "q1.zip.part").exists()
+
+    stats, hits = fetch(root)
+    assert stats["resumed"] == 1 and stats["failed"] == []
+    assert hits == {"200": 0, "206": 1, "304": len(paths) - 1, "404": 0}
+    assert stats["bytes_fetched"] + stats["bytes_skipped"] == len(paths) * SIZE
+    assert not list(root.glob("reports/*/*.part*"))
+    assert all(on_disk(root, p) == StandIn.bodies[p] for p in paths)
+
+
+def test_warm_run_is_all_304_and_a_change_is_refetched(site):
+    root, _, paths = site
+    fetch(root)
+    stats, hits = fetch(root)
+    assert hits["304"] == len(paths) and stats["bytes_fetched"] == 0
+
+    StandIn.bodies[paths[2]] = payload(paths[2], SIZE, bump=1)
+    stats, hits = fetch(root)
+    assert stats["fetched"] == 1 and hits["200"] == 1
+    assert on_disk(root, paths[2]) == StandIn.bodies[paths[2]]
+
+
+def test_206_for_the_wrong_range_restarts_the_whole_file(tmp_path):
+    server, base = serve(WrongRange)
+    path = "/files/3040/annual.xlsx"
+    body = StandIn.bodies[path] = payload(path, SIZE)
+    try:
+        dest = tmp_path / "annual.xlsx"
+        dest.with_name("annual.xlsx.part").write_bytes(body[:1000])
+        dest.with_name("annual.xlsx.part.json").write_text(json.dumps({"etag": '"x"'}), encoding="utf-8")
+        with dl.make_session(1) as session:
+            res = dl.download(session, base + path, dest, None, dl.HostLimits(rate=2000))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert res["status"] == "fetched" and res["skipped"] == 0
+    assert StandIn.hits["206"] == 1 and StandIn.hits["200"] == 1
+    assert dest.read_bytes() == body
+    assert not list(tmp_path.glob("*.part*"))
+
+
+def test_per_host_cap_holds(site):
+    root, base, paths = site
+    for s in ("3010", "3020", "3030"):
+        for i in range(4):
+            p = f"/files/{s}/extra{i}.pdf"
+            StandIn.bodies[p] = payload(p, SIZE)
+            with (root / dl.LINKS_CSV).open("a", encoding="utf-8") as f:
+                f.write(f"{s},{base}{p}\n")
+    stats, _ = fetch(root, per_host=2)
+    assert stats["fetched"] == len(StandIn.bodies)
+    assert 1 <= StandIn.peak <= 2
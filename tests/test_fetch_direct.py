@@ -0,0 +1,101 @@
+"""fetch_direct.py against the bench's local stand-in: conditional replay and body naming."""
+import hashlib
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import fetch_direct
+from benchmarks.bench_fetch import BROKEN, StandIn, fake_capture, statement
+
+fetch_direct.VERBOSE = False
+SYMBOLS = ["1010", "1020", "1030", BROKEN]
+
+
+class TwoPaths(StandIn):
+    """/api/other answers with a body of its own, so swapped bodies show."""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/api/other":
+            return super().do_GET()
+        body = statement(parse_qs(parts.query)["companySymbol"][0], bump=7)
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", etag)
+        self.reply(200, body, etag)
+
+
+@pytest.fixture
+def base():
+    StandIn.bodies = {s: statement(s) for s in SYMBOLS}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TwoPaths)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def root(tmp_path, base):
+    (tmp_path / "netdump").mkdir()
+    fake_capture(tmp_path / "netdump", base, SYMBOLS)
+    return tmp_path
+
+
+def fetch(root):
+    before = dict(StandIn.hits)
+    summary = fetch_direct.run(SYMBOLS, root=root, netdump=root / "netdump", workers=2, fallback=False)
+    return summary, {k: StandIn.hits[k] - before[k] for k in before}
+
+
+def body(root, base, symbol, path="/api/financials"):
+    url = f"{base}{path}?companySymbol={symbol}&locale=en"
+    return root / "netdump" / symbol / fetch_direct.body_name(url, "application/json")
+
+
+def test_cold_then_warm_then_changed(root, base):
+    n = len(SYMBOLS) - 1
+    summary, hits = fetch(root)
+    assert hits == {"200": n, "304": 0, "500": 1}
+    assert [r["symbol"] for r in summary["results"] if not r["ok"]] == [BROKEN]
+    assert not (root / "netdump" / SYMBOLS[0] / "0002_standin.txt").exists()   # stale capture body pruned
+
+    _, hits = fetch(root)
+    assert hits == {"200": 0, "304": n, "500": 1}
+
+    StandIn.bodies[SYMBOLS[1]] = statement(SYMBOLS[1], bump=1)
+    _, hits = fetch(root)
+    assert hits == {"200": 1, "304": n - 1, "500": 1}
+    assert body(root, base, SYMBOLS[1]).read_bytes() == StandIn.bodies[SYMBOLS[1]]
+
+
+def test_304_keeps_each_urls_own_body_when_endpoints_reorder(root, base):
+    symbol = SYMBOLS[0]
+    other = {"url": f"{base}/api/other?companySymbol={{symbol}}&locale=en", "mime": "application/json"}
+    fetch(root)   # learns the financials template
+    path = root / fetch_direct.ENDPOINTS
+    endpoints = json.loads(path.read_text())
+    endpoints[symbol] = endpoints[symbol] + [other]
+    path.write_text(json.dumps(endpoints))
+    fetch(root)
+    first = body(root, base, symbol).read_bytes()
+    second = body(root, base, symbol, "/api/other").read_bytes()
+    assert first != second
+
+    endpoints[symbol].reverse()
+    path.write_text(json.dumps(endpoints))
+    _, hits = fetch(root)
+    assert hits["200"] == 0   # both answered 304 ...
+    assert body(root, base, symbol).read_bytes() == first   # ... and neither body was swapped
+    assert body(root, base, symbol, "/api/other").read_bytes() == second
+
+
+def test_body_name_is_stable_per_url():
+    a = fetch_direct.body_name("https://x.test:8443/a?s=1", "application/json; charset=utf-8")
+    assert a == fetch_direct.body_name("https://x.test:8443/a?s=1", "application/json")
+    assert a.endswith("_x.test_8443.json")
+    assert a != fetch_direct.body_name("https://x.test:8443/a?s=2", "application/json")
+    assert fetch_direct.body_name("https://x.test/a", "text/html").endswith(".html")
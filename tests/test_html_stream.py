@@ -0,0 +1,49 @@
+"""The lxml streaming backend must give parse_html_table() the same input as BeautifulSoup."""
+import pytest
+from bs4 import BeautifulSoup
+
+import annual
+import Quaterly
+from benchmarks.bench_html import page
+from src.common.html_stream import iter_tables
+
+annual.VERBOSE = False
+
+
+def both(text, mod):
+    bs = [mod.parse_html_table(t) for t in BeautifulSoup(text, "lxml").find_all("table")]
+    lx = [mod.parse_html_table(t) for t in iter_tables(text)]
+    return bs, lx
+
+
+@pytest.mark.parametrize("mod", [annual, Quaterly])
+def test_backends_agree_on_portal_page(mod):
+    bs, lx = both(page(4), mod)
+    assert lx == bs
+    assert any(lx)
+
+
+def test_get_text_skips_script_and_style():
+    html = ("<table><tr><td>Total Assets<script>var y=2020;</script> (net)<style>td{}</style>"
+            "<!-- c --></td></tr></table>")
+    bs = BeautifulSoup(html, "lxml").find("td")
+    lx = next(iter_tables(html)).find("td")
+    assert lx.get_text() == bs.get_text() == "Total Assets (net)"
+    assert lx.get_text(strip=True) == bs.get_text(strip=True)
+
+
+@pytest.mark.parametrize("mod", [annual, Quaterly])
+def test_backends_agree_with_scripts_in_cells(mod):
+    years = ["2020", "2021", "2022"] if mod is annual else ["31/03/2023", "30/06/2023", "30/09/2023"]
+    head = "<tr><th>Item</th>" + "".join(f"<th>{y}<script>var y=1;</script></th>" for y in years) + "</tr>"
+    body = "".join(f"<tr><td>{m}<script>var y=2020;</script></td>" + "<td>1,234</td>" * 3 + "</tr>"
+                   for m in ("Total Assets", "Net Profit"))
+    bs, lx = both(f"<html><body><table>{head}{body}</table></body></html>", mod)
+    assert lx == bs
+    assert lx[0] and lx[0][0][0]["Metric"] == "Total Assets"
+
+
+def test_cache_version_tracks_backend(monkeypatch):
+    before = annual.cache_version()
+    monkeypatch.setattr(annual, "HTML_BACKEND", "lxml" if annual.HTML_BACKEND != "lxml" else "bs4")
+    assert annual.cache_version() != before
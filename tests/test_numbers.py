@@ -0,0 +1,32 @@
+"""clean_matrix() must give exactly what to_number() gives cell by cell."""
+import numpy as np
+import pytest
+
+from src.common.numbers import SMALL_TABLE, clean_matrix, matrix_rows, to_number
+
+CELLS = ["1,234", "(1,234)", " 12.5 ", "-", "—", "–", "", None, 7, 2.5, "abc", "1e3", "+4", "--5",
+         "12²", "¹", "١٢٣", "１２", "(12²)", "3.", ".5", "1.2.3", "nan", "inf", "(1\n2)"]
+
+
+def table(cells, cols):
+    rows = []
+    for i in range(0, len(cells), len(cols)):
+        rows.append(dict(zip(cols, cells[i:i + len(cols)])))
+    return rows
+
+
+@pytest.mark.parametrize("repeat", [1, SMALL_TABLE])   # per-cell path and vectorized path
+def test_clean_matrix_matches_to_number(repeat):
+    cols = ["2021", "2022", "2023", "2024", "2025"]
+    rows = table(CELLS * repeat, cols)
+    got = matrix_rows(clean_matrix(rows, cols))
+    want = [[to_number(r.get(c)) for c in cols] for r in rows]
+    assert np.array_equal(np.array(got, dtype=float), np.array(want, dtype=float), equal_nan=True)
+
+
+def test_superscript_digits_are_not_numbers():
+    cols = [str(y) for y in range(2000, 2016)]
+    rows = [{c: "12²" if i == 3 else "1,000" for c in cols} for i in range(SMALL_TABLE // len(cols) + 1)]
+    mat = clean_matrix(rows, cols)
+    assert np.isnan(mat[3]).all()
+    assert (mat[0] == 1000).all()
@@ -0,0 +1,67 @@
+"""unzip_reports: what is extracted, what is skipped or pruned on a rerun, and a bad CRC."""
+import zipfile
+
+from benchmarks.bench_unzip import MEMBERS, payload, write_archive
+from src.tasks import unzip_reports as uz
+
+SIZE = 4096
+WANTED = ["notes.html", "statements/balance.xlsx", "statements/income.xls"]
+
+
+def tree(out):
+    return sorted(p.relative_to(out).as_posix() for p in out.rglob("*") if p.is_file())
+
+
+def extract(tmp_path, archive):
+    return uz.extract_archive(archive, tmp_path / "out", tmp_path / "state.json")
+
+
+def test_only_wanted_safe_members_are_extracted(tmp_path):
+    archive = tmp_path / "fy2024.zip"
+    write_archive(archive, SIZE)
+    res = extract(tmp_path, archive)
+    assert res["ok"] and res["extracted"] == 3 and res["filtered"] == 1   # the .pdf; ../escape.xlsx is not a member
+    assert tree(tmp_path / "out") == WANTED
+    assert not (tmp_path / "escape.xlsx").exists()
+    assert (tmp_path / "out" / MEMBERS[0]).read_bytes() == payload(MEMBERS[0], SIZE)
+
+
+def test_rerun_skips_unchanged_and_prunes_dropped(tmp_path):
+    archive = tmp_path / "fy2024.zip"
+    write_archive(archive, SIZE)
+    extract(tmp_path, archive)
+    res = extract(tmp_path, archive)
+    assert res["skipped"] == 3 and res["extracted"] == 0 and res["bytes_written"] == 0
+
+    write_archive(archive, SIZE, bump=1, drop=("notes.html",))
+    res = extract(tmp_path, archive)
+    assert res["extracted"] == 1 and res["skipped"] == 1 and res["removed"] == 1
+    assert tree(tmp_path / "out") == WANTED[1:]
+    assert (tmp_path / "out" / MEMBERS[0]).read_bytes() == payload(MEMBERS[0], SIZE, 1)
+
+
+def test_bad_crc_fails_without_leaving_a_temp_file(tmp_path):
+    archive = tmp_path / "fy2024.zip"
+    body = payload("statements/balance.xlsx", SIZE)
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("statements/balance.xlsx", body)
+    data = bytearray(archive.read_bytes())
+    at = data.index(body) + 100
+    data[at] ^= 0xFF
+    archive.write_bytes(bytes(data))
+
+    res = extract(tmp_path, archive)
+    assert not res["ok"] and "BadZipFile" in res["error"]
+    assert tree(tmp_path / "out") == []
+    assert not (tmp_path / "state.json").exists()
+
+
+def test_run_reports_failed_archives(tmp_path):
+    for s in ("4010", "4020"):
+        (tmp_path / "reports" / s).mkdir(parents=True)
+    write_archive(tmp_path / "reports" / "4010" / "fy2024.zip", SIZE)
+    (tmp_path / "reports" / "4020" / "fy2024.zip").write_bytes(b"not a zip")
+    totals = uz.run(root=tmp_path, workers=1)
+    assert totals["extracted"] == 3
+    assert totals["failed"] == [str(tmp_path / "reports" / "4020" / "fy2024.zip")]
+    assert tree(tmp_path / uz.UNZIPPED / "4010" / "fy2024") == WANTED